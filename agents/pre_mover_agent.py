@@ -14,7 +14,10 @@ import sys
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-import json
+import logging
+import time
+
+import numpy as np
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -23,10 +26,30 @@ from config.config import *
 from utils.data_fetcher import DataFetcher
 from utils.technical_analysis import TechnicalAnalyzer
 from utils.ai_analyzer import AIAnalyzer
-from utils.logger import setup_logger
+from utils.logger import setup_logger, flush_sampled
+from utils.price_panel import open_panel
+from utils.feature_state import FeatureStateStore
+from utils.catalyst_index import CatalystIndex
+from utils.metrics import REGISTRY
+from utils.checkpoint import ScanCheckpoint
+from utils.alerts import AlertEngine
+from utils.horizons import HorizonFeatures, horizon_breadth
+from utils.cross_section import cross_sectional_scores, RANK_FEATURES
+from utils.snapshot import SnapshotRecorder, ReplayFetcher, ReplayAnalyzer, capture_config
+from utils.pattern_index import open_pattern_index
+from utils.market_regime import RegimeCache
+from utils.reports import ReportWriter, report_path, format_for_path
+import config.config as config_module
 
 logger = setup_logger(__name__)
 
+SCANS = REGISTRY.counter('scans_total', 'Completed market scans')
+SCAN_SECONDS = REGISTRY.gauge('scan_duration_seconds', 'Wall time of the last market scan')
+SCAN_RATE = REGISTRY.gauge('scan_symbols_per_second', 'Symbols analyzed per second in the last scan')
+SCAN_PROGRESS = REGISTRY.gauge('scan_symbols_done', 'Symbols processed so far in the current scan')
+SCAN_SYMBOLS = REGISTRY.counter('scan_symbols_total', 'Symbols seen by scans, by outcome', ['outcome'])
+SYMBOL_SECONDS = REGISTRY.histogram('symbol_analysis_seconds', 'Time to analyze one symbol')
+
 
 class PreMoverDetector:
     """
@@ -40,23 +63,105 @@ class PreMoverDetector:
     5. Red-Flag Removal
     """
     
-    def __init__(self):
-        """Initialize the Pre-Mover Detector"""
-        self.data_fetcher = DataFetcher()
-        self.technical_analyzer = TechnicalAnalyzer()
-        self.ai_analyzer = AIAnalyzer()
+    def __init__(self, panel_dir: Optional[str] = None, data_fetcher=None, ai_analyzer=None):
+        """
+        Initialize the Pre-Mover Detector
+        
+        Args:
+            panel_dir: Optional shared price panel to attach to read-only
+                       (defaults to PANEL_DIR when USE_PRICE_PANEL is set)
+            data_fetcher: Optional bar source (default: a DataFetcher)
+            ai_analyzer: Optional catalyst source (default: an AIAnalyzer)
+        """
+        if panel_dir is None and USE_PRICE_PANEL and data_fetcher is None:
+            panel_dir = PANEL_DIR
+        self.panel = open_panel(panel_dir) if panel_dir else None
+        
+        self.data_fetcher = data_fetcher or DataFetcher(panel=self.panel)
+        self.technical_analyzer = TechnicalAnalyzer(KERNEL_BACKEND)
+        self.ai_analyzer = ai_analyzer or AIAnalyzer()
+        self.feature_store = FeatureStateStore(FEATURE_STATE_PATH) if USE_INCREMENTAL_FEATURES else None
+        self.last_scan_summary = None
+        self._catalyst_prefetch = {}
+        
+        self.catalyst_index = None
+        self.catalyst_stats = {'local': 0, 'llm': 0}
+        if USE_CATALYST_INDEX:
+            self.catalyst_index = CatalystIndex(
+                CATALYST_FEEDS_DIR,
+                lookback_days=CATALYST_LOOKBACK_DAYS,
+                half_life_days=CATALYST_HALF_LIFE_DAYS,
+                ambiguous_band=CATALYST_AMBIGUOUS_BAND
+            )
+        
+        self.pattern_index = open_pattern_index(PATTERN_INDEX_DIR) if USE_PATTERN_INDEX else None
+        
+        # Market-wide context is computed once per panel update, not per symbol
+        self.regime_cache = None
+        if USE_MARKET_REGIME:
+            regime_panel = self.panel or open_panel(PANEL_DIR)
+            if regime_panel is not None:
+                self.regime_cache = RegimeCache(regime_panel)
+        self.regime = None
+        self.min_score = MIN_PROBABILITY_SCORE
+        
+        self.alerts = AlertEngine.from_config()
+        self.snapshot_dir = SNAPSHOT_DIR if SNAPSHOT_SCANS else None
+        self._recorder = None
+        
+        self.data_fetcher.add_corporate_action_listener(self._on_corporate_action)
         
         logger.info("Pre-Mover Detector initialized")
         logger.info(f"Tracking {len(IPO_WATCHLIST)} IPO candidates")
         logger.info(f"Monitoring {len(TRACK_SECTORS)} sectors")
+        if self.panel is not None:
+            logger.info(f"Attached to price panel {panel_dir} ({len(self.panel.symbols)} symbols)")
+        if self.catalyst_index is not None:
+            logger.info(f"Catalyst index loaded for {self.catalyst_index.tickers} tickers")
+        if self.pattern_index is not None:
+            logger.info(f"Pattern index loaded ({len(self.pattern_index)} historical windows)")
+        if REGISTRY.enabled:
+            try:
+                host, port = REGISTRY.start_server()
+            except OSError as e:
+                # Another detector on this host (e.g. a second scan_worker)
+                # holds METRICS_PORT; serve on a free port instead
+                logger.warning(f"Metrics port {METRICS_PORT} unavailable ({e}); using a free port")
+                host, port = REGISTRY.start_server(port=0)
+            logger.info(f"Metrics served at http://{host}:{port}/metrics")
+    
+    @classmethod
+    def from_snapshot(cls, snapshot) -> 'PreMoverDetector':
+        """
+        Detector that re-runs a recorded scan offline
+        
+        Bars and catalyst responses come from the snapshot; incremental
+        feature state, the local catalyst and pattern indexes, alerts and
+        recording are switched off, and the market regime is the recorded
+        one, so nothing outside the snapshot can change the result.
+        Restore the snapshot's config (utils.snapshot.restore_config)
+        before calling this.
+        """
+        detector = cls(data_fetcher=ReplayFetcher(snapshot), ai_analyzer=ReplayAnalyzer(snapshot))
+        detector.feature_store = None
+        detector.catalyst_index = None
+        detector.pattern_index = None
+        detector.regime_cache = None
+        detector.regime = snapshot.regime
+        detector.alerts = AlertEngine()
+        detector.snapshot_dir = None
+        return detector
     
-    def scan_market(self, stock_list: Optional[List[str]] = None) -> List[Dict]:
+    def scan_market(self, stock_list: Optional[List[str]] = None,
+                    checkpoint: Optional[ScanCheckpoint] = None) -> List[Dict]:
         """
         Scan the market for pre-mover candidates
         
         Args:
             stock_list: Optional list of stock symbols to scan. 
                        If None, scans IPO watchlist + bellwethers
+            checkpoint: Optional checkpoint; symbols it already holds are
+                        not refetched and every analysis is recorded in it
         
         Returns:
             List of candidate stocks with analysis
@@ -65,22 +170,80 @@ class PreMoverDetector:
             stock_list = IPO_WATCHLIST + BELLWETHER_STOCKS
         
         logger.info(f"Starting market scan for {len(stock_list)} stocks...")
+        scan_started = time.perf_counter()
+        SCAN_PROGRESS.set(0)
         
-        candidates = []
+        # Pick up bars the panel loader appended since the last scan
+        if self.panel is not None:
+            self.panel.refresh()
+        self._update_regime()
         
-        for symbol in stock_list:
-            try:
-                analysis = self.analyze_stock(symbol)
-                
-                if analysis and analysis['probability_score'] >= MIN_PROBABILITY_SCORE:
-                    candidates.append(analysis)
-                    logger.info(f"✓ {symbol}: Pre-mover candidate (score: {analysis['probability_score']})")
+        candidates = []
+        fetch_failures = []
+        analyzed = 0
+        self._recorder = SnapshotRecorder(self.snapshot_dir) if self.snapshot_dir else None
+        if self._recorder is not None:
+            self._recorder.record_regime(self.regime)
+        
+        # Resume: reuse analyses finished before a crash
+        to_fetch = stock_list
+        if checkpoint is not None:
+            to_fetch = checkpoint.remaining(stock_list)
+            resumed = set(stock_list) - set(to_fetch)
+            candidates.extend(
+                analysis for analysis in checkpoint.candidates(0 if SCORING_MODE == 'percentile' else self.min_score)
+                if analysis['symbol'] in resumed
+            )
+            if len(to_fetch) < len(stock_list):
+                logger.info(f"Resuming: {len(stock_list) - len(to_fetch)} symbols already analyzed for "
+                            f"{checkpoint.scan_date}, {len(to_fetch)} remaining")
+        
+        # Fetch concurrently under the adaptive rate limiter and analyze each
+        # symbol as soon as its bars arrive
+        bars = self.data_fetcher.iter_stock_data(to_fetch, days=MOMENTUM_DAYS + VOLUME_LOOKBACK_DAYS)
+        
+        # With catalyst batching, analyze in chunks so each chunk's
+        # catalysts are scored in one LLM request
+        chunk_size = self.ai_analyzer.batch_size if USE_CATALYST_BATCHING else 1
+        pending = []
+        
+        for symbol, data, status in bars:
+            if self._recorder is not None:
+                if data is None:
+                    self._recorder.record_failure(symbol, status)
                 else:
-                    logger.debug(f"✗ {symbol}: Below threshold")
-                    
-            except Exception as e:
-                logger.error(f"Error analyzing {symbol}: {e}")
+                    self._recorder.record_bars(symbol, data)
+            
+            if data is None:
+                fetch_failures.append({'symbol': symbol, 'status': status})
+                SCAN_SYMBOLS.inc(outcome='fetch_failed')
+                SCAN_PROGRESS.inc()
+                logger.warning("%s: Fetch failed (%s)", symbol, status, extra={'symbol': symbol, 'status': status})
                 continue
+            
+            pending.append((symbol, data))
+            if len(pending) >= chunk_size:
+                analyzed += self._analyze_chunk(pending, candidates, checkpoint)
+                pending = []
+                if USE_CATALYST_BATCHING:
+                    chunk_size = self.ai_analyzer.batch_size
+        
+        analyzed += self._analyze_chunk(pending, candidates, checkpoint)
+        if checkpoint is not None:
+            checkpoint.save()
+        self.alerts.flush(timeout=ALERT_WEBHOOK_TIMEOUT)
+        
+        # Keep the inputs so this scan can be replayed (replay_scan.py)
+        snapshot_id = None
+        if self._recorder is not None:
+            fetched = set(to_fetch)
+            self._recorder.save(stock_list, capture_config(config_module),
+                                resumed=[symbol for symbol in stock_list if symbol not in fetched])
+            snapshot_id = self._recorder.scan_id
+            self._recorder = None
+        
+        if SCORING_MODE == 'percentile':
+            candidates = self._rank_cross_section(candidates)
         
         # Sort by probability score (highest first)
         candidates.sort(key=lambda x: x['probability_score'], reverse=True)
@@ -88,34 +251,245 @@ class PreMoverDetector:
         # Return top N candidates
         top_candidates = candidates[:MAX_STOCKS_PER_SCAN]
         
+        if self.pattern_index is not None:
+            self._attach_analogues(top_candidates)
+        
+        # Persist rolled-forward feature state for tomorrow's scan
+        if self.feature_store is not None:
+            self.feature_store.save()
+            logger.info(
+                f"Feature state: {self.feature_store.stats['rolled']} rolled forward, "
+                f"{self.feature_store.stats['rebuilt']} rebuilt"
+            )
+        
+        self.last_scan_summary = {
+            'symbols_requested': len(stock_list),
+            'symbols_fetched': len(stock_list) - len(fetch_failures),
+            'symbols_analyzed': analyzed,
+            'symbols_resumed': len(stock_list) - len(to_fetch),
+            'coverage_pct': round(100.0 * (len(stock_list) - len(fetch_failures)) / len(stock_list), 1) if stock_list else 100.0,
+            'fetch_failures': fetch_failures,
+            'rate_limiter': self.data_fetcher.rate_limiter.stats(),
+            'alerts': dict(self.alerts.stats),
+            'snapshot': snapshot_id,
+            'regime': self.regime,
+            'min_score': self.min_score
+        }
+        if USE_CATALYST_BATCHING:
+            self.last_scan_summary['catalyst_batches'] = dict(self.ai_analyzer.batch_stats)
+        if self.catalyst_index is not None:
+            self.last_scan_summary['catalyst_sources'] = dict(self.catalyst_stats)
+        
+        elapsed = time.perf_counter() - scan_started
+        SCANS.inc()
+        SCAN_SECONDS.set(elapsed)
+        SCAN_RATE.set(analyzed / elapsed if elapsed > 0 else 0)
+        
         logger.info(f"Scan complete. Found {len(top_candidates)} high-probability pre-movers")
+        logger.info(
+            f"Coverage: {self.last_scan_summary['symbols_fetched']}/{len(stock_list)} symbols "
+            f"({self.last_scan_summary['coverage_pct']}%), {len(fetch_failures)} fetch failures"
+        )
+        flush_sampled(logger)
         
         return top_candidates
     
-    def analyze_stock(self, symbol: str) -> Optional[Dict]:
+    def _analyze_chunk(self, pending: List, candidates: List[Dict],
+                       checkpoint: Optional[ScanCheckpoint] = None) -> int:
+        """
+        Analyze fetched symbols, collecting those above the threshold
+        
+        Args:
+            pending: (symbol, data) pairs
+            candidates: List that qualifying analyses are appended to
+            checkpoint: Optional checkpoint recording each finished symbol
+        
+        Returns:
+            Number of symbols analyzed
+        """
+        if USE_CATALYST_BATCHING and pending:
+            # Symbols analyze_stock will reject for short history never reach
+            # the catalyst layer, so don't spend tokens on them
+            symbols = [symbol for symbol, data in pending if data is not None and len(data) >= MOMENTUM_DAYS]
+            contexts = {}
+            if self.catalyst_index is not None:
+                # Only cases the local rules can't settle need the LLM
+                local = {symbol: self.catalyst_index.score(symbol) for symbol in symbols}
+                symbols = [symbol for symbol in symbols if local[symbol]['ambiguous']]
+                contexts = {symbol: local[symbol]['context'] for symbol in symbols}
+            if symbols:
+                self._catalyst_prefetch.update(self.ai_analyzer.detect_catalysts_batch(symbols, contexts))
+        
+        # Per-symbol debug lines are skipped outright unless DEBUG is on
+        debug = logger.isEnabledFor(logging.DEBUG)
+        
+        try:
+            for symbol, data in pending:
+                # Exactly one outcome per symbol, so the outcomes sum to symbols seen
+                outcome = 'error'
+                try:
+                    with SYMBOL_SECONDS.time():
+                        analysis = self.analyze_stock(symbol, data)
+                    
+                    if checkpoint is not None:
+                        checkpoint.record(symbol, analysis)
+                    
+                    # Alert on this symbol now rather than after the scan is sorted
+                    # (percentile scores only exist once every symbol is in)
+                    if analysis and SCORING_MODE == 'percentile':
+                        outcome = 'ranked'
+                        candidates.append(analysis)
+                        continue
+                    if analysis:
+                        self.alerts.evaluate(analysis)
+                    
+                    if analysis and analysis['probability_score'] >= self.min_score:
+                        outcome = 'candidate'
+                        candidates.append(analysis)
+                        logger.info("✓ %s: Pre-mover candidate (score: %s)", symbol, analysis['probability_score'],
+                                    extra={'symbol': symbol, 'score': analysis['probability_score']})
+                    else:
+                        outcome = 'below_threshold' if analysis else 'no_analysis'
+                        if debug:
+                            logger.debug("✗ %s: Below threshold", symbol, extra={'symbol': symbol})
+                        
+                except Exception as e:
+                    logger.error("Error analyzing %s: %s", symbol, e, extra={'symbol': symbol})
+                    continue
+                
+                finally:
+                    SCAN_SYMBOLS.inc(outcome=outcome)
+                    SCAN_PROGRESS.inc()
+        finally:
+            # Prefetched answers are only good for this chunk; one left over
+            # (symbol rejected or errored before its catalyst layer) must not
+            # be served to a later scan
+            self._catalyst_prefetch.clear()
+        
+        return len(pending)
+    
+    def _update_regime(self):
+        """
+        Refresh the cached market regime and the threshold it implies
+        
+        MIN_PROBABILITY_SCORE moves by REGIME_SCORE_ADJUSTMENTS[label]; with no
+        (fresh) panel there is no regime and the threshold is unchanged.
+        """
+        if self.regime_cache is not None:
+            self.regime = self.regime_cache.update()
+        
+        self.min_score = MIN_PROBABILITY_SCORE
+        if USE_MARKET_REGIME and self.regime is not None:
+            self.min_score += REGIME_SCORE_ADJUSTMENTS.get(self.regime['label'], 0)
+            logger.info(
+                f"Market regime: {self.regime['label']} (breadth {self.regime['breadth']:.0%}, "
+                f"trend {self.regime['trend']}, {self.regime['volatility_regime']} volatility); "
+                f"threshold {self.min_score}"
+            )
+    
+    def _rank_cross_section(self, analyses: List[Dict]) -> List[Dict]:
+        """
+        Re-score momentum and volume as percentiles across every analyzed
+        symbol and keep those that clear the scan's threshold
+        
+        Args:
+            analyses: Every non-red-flagged analysis from this scan
+        
+        Returns:
+            Re-scored analyses above the threshold
+        """
+        ranked = [analysis for analysis in analyses if 'rank_features' in analysis]
+        if not ranked:
+            return []
+        
+        features = {
+            name: np.array([analysis['rank_features'][name] for analysis in ranked], dtype=np.float64)
+            for name in RANK_FEATURES
+        }
+        scores = cross_sectional_scores(features)
+        
+        candidates = []
+        for i, analysis in enumerate(ranked):
+            momentum_score = float(scores['momentum_score'][i])
+            volume_score = float(scores['volume_score'][i])
+            sector_score = analysis['sector_score']
+            catalyst_score = analysis['catalyst_score']
+            probability_score = (
+                momentum_score * 0.30 +
+                volume_score * 0.30 +
+                sector_score * 0.20 +
+                catalyst_score * 0.20
+            )
+            
+            analysis.update({
+                'probability_score': round(probability_score, 1),
+                'momentum_score': round(momentum_score, 1),
+                'volume_score': round(volume_score, 1),
+                'move_window': self._determine_move_window(momentum_score, volume_score, catalyst_score),
+                'reasons': self._generate_reasons(momentum_score, volume_score, sector_score, catalyst_score)
+            })
+            self.alerts.evaluate(analysis)
+            
+            if analysis['probability_score'] >= self.min_score:
+                candidates.append(analysis)
+        
+        logger.info(f"Ranked {len(ranked)} symbols cross-sectionally, {len(candidates)} above threshold")
+        return candidates
+    
+    def _attach_analogues(self, candidates: List[Dict]):
+        """
+        Add the most similar historical setups (and what they did next) to
+        each candidate
+        
+        Only the final candidates are looked up; their bars are still in
+        the fetcher's cache (or the panel) from the scan.
+        """
+        for analysis in candidates:
+            symbol = analysis['symbol']
+            try:
+                data = self.data_fetcher.get_stock_data(symbol, days=MOMENTUM_DAYS + VOLUME_LOOKBACK_DAYS)
+                if data is not None:
+                    analysis['analogues'] = self.pattern_index.analogues(data)
+            except Exception as e:
+                logger.warning("%s: Analogue lookup failed: %s", symbol, e, extra={'symbol': symbol})
+    
+    def analyze_stock(self, symbol: str, data=None) -> Optional[Dict]:
         """
         Perform comprehensive analysis on a single stock
         
         Args:
             symbol: Stock ticker symbol
+            data: Optional pre-fetched price data (fetched if not given)
         
         Returns:
             Analysis dictionary or None if analysis fails
         """
-        logger.debug(f"Analyzing {symbol}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Analyzing %s...", symbol, extra={'symbol': symbol})
         
         # Fetch market data
-        data = self.data_fetcher.get_stock_data(symbol, days=MOMENTUM_DAYS + VOLUME_LOOKBACK_DAYS)
+        if data is None:
+            data = self.data_fetcher.get_stock_data(symbol, days=MOMENTUM_DAYS + VOLUME_LOOKBACK_DAYS)
         
         if data is None or len(data) < MOMENTUM_DAYS:
-            logger.warning(f"{symbol}: Insufficient data")
+            logger.warning("%s: Insufficient data", symbol, extra={'symbol': symbol})
             return None
         
+        # Derive scoring features (rolled forward from yesterday's state if enabled)
+        if self.feature_store is not None:
+            features = self.feature_store.update(symbol, data)
+        else:
+            features = self._compute_features(symbol, data)
+        
+        # Every momentum horizon from one pass of prefix sums
+        if USE_MULTI_HORIZON:
+            features.update(HorizonFeatures(data['Close'].to_numpy(), data['Volume'].to_numpy()).latest())
+        
         # Layer 1: Momentum Analysis
-        momentum_score = self._analyze_momentum(symbol, data)
+        momentum_score = self._analyze_momentum(features)
         
         # Layer 2: Volume Analysis
-        volume_score = self._analyze_volume(symbol, data)
+        volume_score = self._analyze_volume(features)
         
         # Layer 3: Sector Rotation
         sector_score = self._analyze_sector_rotation(symbol)
@@ -124,10 +498,11 @@ class PreMoverDetector:
         catalyst_score = self._detect_catalysts(symbol)
         
         # Layer 5: Red Flag Check
-        has_red_flags = self._check_red_flags(symbol, data)
+        has_red_flags = self._check_red_flags(features)
         
         if has_red_flags:
-            logger.debug(f"{symbol}: Red flags detected, skipping")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s: Red flags detected, skipping", symbol, extra={'symbol': symbol})
             return None
         
         # Calculate overall probability score (weighted average)
@@ -138,12 +513,19 @@ class PreMoverDetector:
             catalyst_score * 0.20
         )
         
+        if self.feature_store is not None:
+            self.feature_store.record_scores(symbol, {
+                'momentum_score': momentum_score,
+                'volume_score': volume_score,
+                'probability_score': probability_score
+            })
+        
         # Determine expected move window
         move_window = self._determine_move_window(momentum_score, volume_score, catalyst_score)
         
         # Get current price and key metrics
-        current_price = data['Close'].iloc[-1]
-        volume_change = (data['Volume'].iloc[-1] / data['Volume'].iloc[-VOLUME_LOOKBACK_DAYS:-1].mean() - 1) * 100
+        current_price = features['current_price']
+        volume_change = (features['current_volume'] / features['avg_volume'] - 1) * 100
         
         # Compile analysis result
         analysis = {
@@ -160,41 +542,72 @@ class PreMoverDetector:
             'timestamp': datetime.now().isoformat()
         }
         
+        # Percentile mode re-scores momentum and volume once the whole
+        # universe is in (see _rank_cross_section)
+        if SCORING_MODE == 'percentile':
+            analysis['rank_features'] = {
+                'price_change': float(features['price_change']),
+                'relative_strength': float(features['relative_strength']),
+                'is_coiling': bool(features['is_coiling']),
+                'volume_ratio': float(features['current_volume'] / features['avg_volume']),
+                'is_accumulating': bool(features['is_accumulating'])
+            }
+        
         return analysis
     
-    def _analyze_momentum(self, symbol: str, data) -> float:
+    def _on_corporate_action(self, symbol: str, events: List[Dict]):
+        """Drop only this symbol's derived state after a split or dividend"""
+        if self.feature_store is not None:
+            self.feature_store.invalidate(symbol)
+        
+        for event in events:
+            logger.info(f"{symbol}: {event['type']} on {event['date']}, refreshed cached history")
+    
+    def _compute_features(self, symbol: str, data) -> Dict:
+        """Compute scoring features from the full price history"""
+        return {
+            'current_price': data['Close'].iloc[-1],
+            'price_change': data['Close'].iloc[-1] / data['Close'].iloc[-MOMENTUM_DAYS] - 1,
+            'relative_strength': self.technical_analyzer.calculate_relative_strength(symbol, data),
+            'is_coiling': self.technical_analyzer.detect_coiling_pattern(data),
+            'current_volume': data['Volume'].iloc[-1],
+            'avg_volume': data['Volume'].iloc[-VOLUME_LOOKBACK_DAYS:-1].mean(),
+            'is_accumulating': self.technical_analyzer.detect_accumulation(data, MIN_ACCUMULATION_DAYS),
+            'avg_volume_5': data['Volume'].iloc[-5:].mean(),
+            'is_pump_and_dump': self.technical_analyzer.is_pump_and_dump(data),
+        }
+    
+    def _analyze_momentum(self, features: Dict) -> float:
         """Analyze momentum conditions (Layer 1)"""
         score = 0.0
         
-        # Price acceleration (3-7 day)
-        price_change = (data['Close'].iloc[-1] / data['Close'].iloc[-MOMENTUM_DAYS] - 1)
-        if price_change >= MIN_PRICE_CHANGE:
+        # Price acceleration (3-7 day, or across MOMENTUM_HORIZONS in proportion
+        # to how many horizons clear their scaled threshold)
+        if USE_MULTI_HORIZON:
+            score += 40 * horizon_breadth({h: features[f'return_{h}d'] for h in MOMENTUM_HORIZONS})
+        elif features['price_change'] >= MIN_PRICE_CHANGE:
             score += 40
         
         # Rising relative strength vs sector
-        rs = self.technical_analyzer.calculate_relative_strength(symbol, data)
-        if rs >= MIN_RELATIVE_STRENGTH:
+        if features['relative_strength'] >= MIN_RELATIVE_STRENGTH:
             score += 30
         
         # Pre-breakout compression or coil pattern
-        if self.technical_analyzer.detect_coiling_pattern(data):
+        if features['is_coiling']:
             score += 30
         
         return min(score, 100)
     
-    def _analyze_volume(self, symbol: str, data) -> float:
+    def _analyze_volume(self, features: Dict) -> float:
         """Analyze volume & liquidity (Layer 2)"""
         score = 0.0
         
         # Unusual volume check
-        avg_volume = data['Volume'].iloc[-VOLUME_LOOKBACK_DAYS:-1].mean()
-        current_volume = data['Volume'].iloc[-1]
-        
-        if current_volume >= avg_volume * UNUSUAL_VOLUME_THRESHOLD:
+        if features['current_volume'] >= features['avg_volume'] * UNUSUAL_VOLUME_THRESHOLD:
             score += 50
         
         # Accumulation signatures (higher lows + rising volume)
-        if self.technical_analyzer.detect_accumulation(data, MIN_ACCUMULATION_DAYS):
+        if features['is_accumulating']:
             score += 50
         
         return min(score, 100)
@@ -216,21 +629,41 @@ class PreMoverDetector:
     def _detect_catalysts(self, symbol: str) -> float:
         """Detect catalysts & micro-catalysts (Layer 4)"""
         # Use AI to detect catalysts from news, filings, etc.
-        catalyst_info = self.ai_analyzer.detect_catalysts(symbol)
+        # (already scored in a batch when catalyst batching is on)
+        catalyst_info = self._catalyst_prefetch.pop(symbol, None)
+        
+        # Local filings/news index first; the LLM only sees ambiguous cases,
+        # along with the headlines the rules couldn't settle
+        if self.catalyst_index is not None:
+            if catalyst_info is None:
+                local = self.catalyst_index.score(symbol)
+                if local['ambiguous']:
+                    catalyst_info = self.ai_analyzer.detect_catalysts(symbol, local['context'])
+                else:
+                    catalyst_info = local
+                    self.catalyst_stats['local'] += 1
+            if catalyst_info is not None and 'events' not in catalyst_info:
+                self.catalyst_stats['llm'] += 1
+        
+        if catalyst_info is None:
+            catalyst_info = self.ai_analyzer.detect_catalysts(symbol)
+        
+        if self._recorder is not None:
+            self._recorder.record_catalysts(symbol, catalyst_info)
         
         if catalyst_info:
             return catalyst_info.get('score', 50)
         
         return 50  # Neutral if no catalyst data
     
-    def _check_red_flags(self, symbol: str, data) -> bool:
+    def _check_red_flags(self, features: Dict) -> bool:
         """Check for red flags (Layer 5)"""
         # Dead ticker (no volume)
-        if data['Volume'].iloc[-5:].mean() < MIN_LIQUIDITY:
+        if features['avg_volume_5'] < MIN_LIQUIDITY:
             return True
         
         # Extreme volatility without substance
-        if self.technical_analyzer.is_pump_and_dump(data):
+        if features['is_pump_and_dump']:
             return True
         
         return False
@@ -261,23 +694,41 @@ class PreMoverDetector:
         
         return reasons
     
-    def save_results(self, candidates: List[Dict], filename: Optional[str] = None):
-        """Save analysis results to file"""
+    def save_results(self, candidates: List[Dict], filename: Optional[str] = None) -> str:
+        """
+        Save analysis results to file
+        
+        Candidates are streamed to the report one at a time in REPORT_FORMAT
+        (see utils/reports.py; read back with load_report or open_report).
+        
+        Args:
+            candidates: Analyses to save
+            filename: Output path; a report extension (e.g. ".json",
+                      ".ndjson.gz") picks the format, otherwise
+                      REPORT_FORMAT's extension is added
+        
+        Returns:
+            Path written
+        """
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{REPORTS_DIR}pre_movers_{timestamp}.json"
+            filename = f"{REPORTS_DIR}pre_movers_{timestamp}"
         
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        requested = format_for_path(filename)
+        if requested is None:
+            report_format, compression = REPORT_FORMAT, REPORT_COMPRESSION
+            filename = report_path(filename, report_format, compression)
+        else:
+            report_format, compression = requested
         
-        with open(filename, 'w') as f:
-            json.dump({
-                'scan_time': datetime.now().isoformat(),
-                'candidates_found': len(candidates),
-                'candidates': candidates
-            }, f, indent=2)
+        with ReportWriter(filename, report_format, compression,
+                          header={'scan_time': datetime.now().isoformat()}) as writer:
+            for candidate in candidates:
+                writer.write(candidate)
+            writer.close({'coverage': self.last_scan_summary})
         
         logger.info(f"Results saved to {filename}")
-
+        return filename
 
 def main():
     """Main execution function"""
@@ -9,6 +9,7 @@ Date: December 2025
 
 import yfinance as yf
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 import json
@@ -17,6 +18,14 @@ import json
 import sys
 sys.path.insert(0, str(Path(__file__).parent))
 from agents.pre_mover_agent import PreMoverDetector
+from utils.signal_matrix import backtest_layers, layer_scores
+from utils.event_study import EventStudy
+from utils.portfolio import PortfolioSimulator
+from utils.price_panel import open_panel
+from config.config import (
+    PANEL_DIR, EVENT_MOVE_THRESHOLD, EVENT_LOOKBACK_DAYS, EVENT_SCORE_THRESHOLD,
+    SIM_SCORE_THRESHOLD
+)
 
 def print_header(title):
     """Print a nice header"""
@@ -43,6 +52,28 @@ def get_known_movers():
         'AVGO': ('2024-03-14', 14.2, 'AI revenue growth'),
     }
 
+def load_history(ticker, start_date, end_date, panel=None):
+    """
+    Load daily bars for a ticker, preferring the shared price panel
+    
+    Args:
+        ticker: Stock ticker
+        start_date: First date (inclusive)
+        end_date: Last date (exclusive)
+        panel: Optional read-only PricePanel
+    
+    Returns:
+        DataFrame with OHLCV data (may be empty)
+    """
+    if panel is not None:
+        data = panel.get_frame(ticker)
+        if data is not None:
+            data = data[(data.index >= start_date) & (data.index < end_date)]
+            if not data.empty:
+                return data
+    
+    return yf.download(ticker, start=start_date, end=end_date, progress=False)
+
 def backtest_single_stock(ticker, move_date, detector):
     """
     Backtest the detector on a single stock
@@ -64,7 +95,7 @@ def backtest_single_stock(ticker, move_date, detector):
     
     try:
         # Fetch historical data
-        data = yf.download(ticker, start=start_date, end=end_date, progress=False)
+        data = load_history(ticker, start_date, end_date, detector.panel)
         
         if data.empty:
             print(f"  ❌ No data available for {ticker}")
@@ -117,8 +148,100 @@ def backtest_single_stock(ticker, move_date, detector):
         print(f"  ❌ Error: {e}")
         return None
 
-def run_backtest():
-    """Run backtest on all known movers"""
+def load_price_matrix(tickers, start_date, end_date, panel=None):
+    """
+    Load aligned (date x symbol) OHLCV matrices for many tickers at once
+    
+    Args:
+        tickers: Stock tickers
+        start_date: First date (inclusive)
+        end_date: Last date (exclusive)
+        panel: Optional read-only PricePanel
+    
+    Returns:
+        (dates, tickers, fields) where fields maps 'High'/'Low'/'Close'/'Volume'
+        to 2-D arrays shaped (dates, tickers)
+    """
+    if panel is not None and all(t in panel.symbol_index for t in tickers):
+        dates = pd.DatetimeIndex(panel.dates)
+        rows = (dates >= start_date) & (dates < end_date)
+        columns = [panel.symbol_index[t] for t in tickers]
+        fields = {f: np.asarray(panel.field(f)[rows][:, columns], dtype=np.float64)
+                  for f in ('High', 'Low', 'Close', 'Volume')}
+        return dates[rows], list(tickers), fields
+    
+    # One batched download instead of one request per ticker
+    data = yf.download(list(tickers), start=start_date, end=end_date,
+                       progress=False, group_by='column', auto_adjust=True)
+    fields = {f: data[f].reindex(columns=tickers).to_numpy(dtype=np.float64)
+              for f in ('High', 'Low', 'Close', 'Volume')}
+    return data.index, list(tickers), fields
+
+def backtest_matrix(known_movers, panel=None, threshold=60):
+    """
+    Score every (date, ticker) cell in one vectorized pass and pull out the
+    signals preceding each known move
+    
+    Args:
+        known_movers: Output of get_known_movers()
+        panel: Optional read-only PricePanel
+        threshold: Minimum score to count as a signal
+    
+    Returns:
+        List of per-ticker results shaped like backtest_single_stock output
+    """
+    tickers = list(known_movers)
+    move_dates = {t: datetime.strptime(known_movers[t][0], '%Y-%m-%d') for t in tickers}
+    
+    # Enough history before the earliest move for the 20-day volume window
+    start_date = min(move_dates.values()) - timedelta(days=45)
+    end_date = max(move_dates.values())
+    
+    dates, tickers, fields = load_price_matrix(tickers, start_date, end_date, panel)
+    
+    layers = backtest_layers(fields['Close'], fields['Volume'])
+    scores = layers['score']
+    
+    dates = pd.DatetimeIndex(dates)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    
+    results = []
+    for j, ticker in enumerate(tickers):
+        move_date_dt = move_dates[ticker]
+        window = (dates >= move_date_dt - timedelta(days=15)) & (dates < move_date_dt)
+        window &= np.isfinite(fields['Close'][:, j])
+        
+        # Like backtest_single_stock, skip the last bar before the move
+        rows = np.flatnonzero(window)[:-1]
+        hits = rows[scores[rows, j] >= threshold]
+        
+        signals = [{
+            'date': dates[i].strftime('%Y-%m-%d'),
+            'days_before_move': (move_date_dt - dates[i]).days,
+            'score': round(float(scores[i, j]), 1),
+            'momentum_score': round(float(layers['momentum_score'][i, j]), 1),
+            'volume_score': round(float(layers['volume_score'][i, j]), 1),
+            'price': round(float(fields['Close'][i, j]), 2)
+        } for i in hits]
+        
+        results.append({
+            'ticker': ticker,
+            'move_date': known_movers[ticker][0],
+            'signals': signals,
+            'detected': len(signals) > 0
+        })
+    
+    return results
+
+def run_backtest(use_matrix=False):
+    """
+    Run backtest on all known movers
+    
+    Args:
+        use_matrix: Score all tickers and dates in one vectorized pass
+                    instead of walking each day per ticker
+    """
     print_header("🔬 SPY PREMOVER DETECTOR - BACKTEST")
     
     print("This backtest will check if the detector would have identified")
@@ -137,8 +260,16 @@ def run_backtest():
     detected_count = 0
     total_count = 0
     
+    if use_matrix:
+        print("⚡ Signal-matrix mode: scoring every (date, ticker) cell in one pass\n")
+        matrix_results = {r['ticker']: r for r in backtest_matrix(known_movers, detector.panel)}
+    
     for ticker, (move_date, gain, reason) in known_movers.items():
-        result = backtest_single_stock(ticker, move_date, detector)
+        if use_matrix:
+            print(f"\n📊 Backtesting {ticker}...")
+            result = matrix_results.get(ticker)
+        else:
+            result = backtest_single_stock(ticker, move_date, detector)
         if result:
             results.append(result)
             total_count += 1
@@ -218,5 +349,90 @@ def run_backtest():
     print("  • Try lowering MIN_VOLUME_SPIKE")
     print("  • Re-run backtest to see improvement\n")
 
+def run_event_study(panel_dir=PANEL_DIR):
+    """
+    Label every large move in the local price panel and measure the
+    detector's lead time, hit rate and false positives against them
+    """
+    print_header("🔬 SPY PREMOVER DETECTOR - EVENT STUDY")
+    
+    panel = open_panel(panel_dir)
+    if panel is None or not panel.n_dates:
+        print(f"❌ No price panel found at {panel_dir}")
+        print("   Build one first: python update_panel.py <symbols>")
+        return
+    
+    fields = {f: panel.field(f) for f in ('High', 'Low', 'Close', 'Volume')}
+    
+    study = EventStudy(move_threshold=EVENT_MOVE_THRESHOLD,
+                       lookback_days=EVENT_LOOKBACK_DAYS,
+                       score_threshold=EVENT_SCORE_THRESHOLD)
+    report = study.run(panel.dates, panel.symbols, fields)
+    
+    print(f"Symbols: {report['symbols']}  Trading days: {report['trading_days']}")
+    print(f"Events (>{EVENT_MOVE_THRESHOLD:.0%} one-day moves): {report['events']}")
+    print(f"Detected within {EVENT_LOOKBACK_DAYS} days: {report['events_detected']} "
+          f"(hit rate {report['hit_rate']}%)")
+    print(f"Mean lead time: {report['mean_lead_days']} days")
+    print(f"Signals: {report['signals']}  False positives: {report['false_positives']} "
+          f"(precision {report['precision']}%)")
+    print(f"Mean score before events: {report['score_profile']}")
+    
+    output_dir = Path("reports")
+    output_dir.mkdir(exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
+    with open(output_dir / f"event_study_{timestamp}.json", 'w') as f:
+        json.dump(report, f, indent=2)
+    study.event_table(panel.dates, panel.symbols, fields).to_csv(
+        output_dir / f"event_study_events_{timestamp}.csv", index=False
+    )
+    
+    print(f"\n💾 Results saved to: {output_dir}/event_study_{timestamp}.json")
+
+def run_portfolio_simulation(panel_dir=PANEL_DIR):
+    """
+    Trade every detector signal in the local price panel under the
+    configured sizing and exit rules
+    """
+    print_header("💼 SPY PREMOVER DETECTOR - PORTFOLIO SIMULATION")
+    
+    panel = open_panel(panel_dir)
+    if panel is None or not panel.n_dates:
+        print(f"❌ No price panel found at {panel_dir}")
+        print("   Build one first: python update_panel.py <symbols>")
+        return
+    
+    fields = {f: panel.field(f) for f in ('Open', 'High', 'Low', 'Close', 'Volume')}
+    scores = layer_scores(fields['High'], fields['Low'], fields['Close'], fields['Volume'])['technical_score']
+    signals = scores >= SIM_SCORE_THRESHOLD  # NaN (red-flagged) compares False
+    
+    result = PortfolioSimulator().run(panel.dates, panel.symbols, fields, signals, scores)
+    summary = result['summary']
+    
+    print(f"Signals: {summary['signals']}  Trades: {summary['trades']}  Skipped: {summary['skipped']}")
+    print(f"Equity: ${summary['initial_capital']:,.2f} → ${summary['final_equity']:,.2f} "
+          f"({summary['total_return_pct']:+.2f}%)")
+    print(f"Max drawdown: {summary['max_drawdown_pct']}%")
+    print(f"Win rate: {summary['win_rate_pct']}%  Avg return: {summary['avg_return_pct']}%  "
+          f"Avg bars held: {summary['avg_bars_held']}")
+    print(f"Exits: {summary['exits']}")
+    
+    output_dir = Path("reports")
+    output_dir.mkdir(exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
+    with open(output_dir / f"portfolio_{timestamp}.json", 'w') as f:
+        json.dump(summary, f, indent=2, default=str)
+    result['trades'].to_csv(output_dir / f"portfolio_trades_{timestamp}.csv", index=False)
+    result['equity'].to_csv(output_dir / f"portfolio_equity_{timestamp}.csv", index_label='date')
+    
+    print(f"\n💾 Results saved to: {output_dir}/portfolio_{timestamp}.json")
+
 if __name__ == "__main__":
-    run_backtest()
+    if '--events' in sys.argv:
+        run_event_study()
+    elif '--portfolio' in sys.argv:
+        run_portfolio_simulation()
+    else:
+        run_backtest(use_matrix='--matrix' in sys.argv)
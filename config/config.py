@@ -29,12 +29,25 @@ ALPHA_VANTAGE_KEY = os.getenv('ALPHA_VANTAGE_KEY', '')
 MOMENTUM_DAYS = 7  # Look back 3-7 days for price acceleration
 MIN_PRICE_CHANGE = 0.05  # Minimum 5% price change to consider
 MIN_RELATIVE_STRENGTH = 1.2  # Must be 20% stronger than sector
+USE_MULTI_HORIZON = False  # Score price momentum over every horizon below instead of MOMENTUM_DAYS only
+MOMENTUM_HORIZONS = [1, 3, 5, 7, 10, 20]  # Bars (1-20); MIN_PRICE_CHANGE scales by sqrt(h / MOMENTUM_DAYS)
+
+# Layer scoring: "absolute" step scores (+40/+30/...) or "percentile" ranks of each
+# feature across the day's scanned universe (same layer weights)
+SCORING_MODE = "absolute"
 
 # Volume settings
 UNUSUAL_VOLUME_THRESHOLD = 1.5  # 150% of 20-day average
 VOLUME_LOOKBACK_DAYS = 20
 MIN_ACCUMULATION_DAYS = 3  # Minimum days of rising volume
 
+# Rolling-window kernels for whole-array indicators ("auto" = numba if installed)
+KERNEL_BACKEND = "auto"
+
+# Whole-universe indicator batches (utils/batch_indicators.py)
+BATCH_INDICATOR_WORKERS = 0  # Worker processes (0 = one per CPU core)
+BATCH_INDICATOR_MIN_PARALLEL = 2000  # Smaller batches run in-process
+
 # Sector rotation
 TRACK_SECTORS = [
     'Technology',
@@ -89,9 +102,19 @@ STOP_LOSS_PERCENT = 0.08  # 8% stop loss
 
 # Position management
 PARTIAL_SELL_AT = 0.20  # Sell 50% at 20% profit
+PARTIAL_SELL_FRACTION = 0.5  # Fraction sold at PARTIAL_SELL_AT
 TRAIL_STOP_ACTIVATION = 0.15  # Activate trailing stop at 15% profit
 TRAIL_STOP_DISTANCE = 0.05  # Trail by 5%
 
+# Micro-cap proxy (no market caps offline): 20-day average dollar volume
+# below this uses MICROCAP_PROFIT_TARGET, otherwise LARGECAP_PROFIT_TARGET
+MICROCAP_DOLLAR_VOLUME = 5_000_000
+
+# Live position monitor (monitor_positions.py, checked every REALTIME_REFRESH seconds)
+POSITIONS_PATH = "data/positions.json"
+QUOTE_TIMEOUT = 10  # Seconds allowed for one batched quote request
+MONITOR_MAX_LATENCY = 2.0  # Warn if alerts go out later than this after the quotes arrive
+
 # =============================================================================
 # DATA SOURCES
 # =============================================================================
@@ -104,6 +127,57 @@ PREMARKET_SCAN_TIME = "08:00"  # Pre-market scan time
 # Data retention
 HISTORICAL_DAYS = 365  # Keep 1 year of historical data
 CACHE_EXPIRY = 300  # Cache API responses for 5 minutes
+COMPACT_CACHE = False  # Cache float32 prices + int64 volume arrays instead of full frames
+CORPORATE_ACTION_MIN_GAP = 0.3  # Overnight gaps >30% matching a reported split ratio are treated as unadjusted splits
+CORPORATE_ACTIONS_PATH = "data/corporate_actions.json"  # Events already acted on, kept across processes
+
+# Adaptive rate limiting (Yahoo throttles bursts of requests)
+FETCH_MAX_CONCURRENCY = 8  # Upper bound on simultaneous Yahoo requests
+FETCH_MIN_CONCURRENCY = 1  # Never go below one request at a time
+FETCH_MAX_RETRIES = 3  # Requeue throttled/failed symbols this many times
+FETCH_EMPTY_WINDOW = 20  # Recent Yahoo fetches checked for a burst of empty frames
+FETCH_EMPTY_BURST = 0.5  # Empty frames are treated as throttling once they are this share of that window
+FETCH_BACKOFF_SECONDS = 2.0  # Pause after a throttled response
+
+# Shared memory-mapped price panel (maintained by update_panel.py)
+USE_PRICE_PANEL = False  # Serve bars from the panel instead of Yahoo
+PANEL_DIR = "data/panel/"
+PANEL_DATE_CAPACITY = 520  # ~2 years of trading days
+PANEL_SYMBOL_CAPACITY = 12000  # Whole-exchange universe
+PANEL_MAX_AGE_DAYS = 4  # Ignore the panel if the loader fell behind (covers weekends)
+
+# Historical analogues (pattern index over the panel, built with find_analogues.py --build)
+USE_PATTERN_INDEX = False  # Attach the most similar past setups to each candidate
+PATTERN_INDEX_DIR = "data/pattern_index/"
+PATTERN_WINDOW = 20  # Bars per setup window
+PATTERN_SEGMENTS = 10  # Points each of the price and volume paths is averaged down to
+PATTERN_FORWARD_DAYS = [1, 5, 10]  # Forward returns stored with every window
+PATTERN_NEIGHBORS = 10  # Analogues per candidate
+PATTERN_TABLES = 8  # LSH hash tables
+PATTERN_BITS = 14  # Hash bits per table (~150 windows per bucket on a full panel)
+
+# Incremental re-scoring (roll yesterday's feature state forward by one bar)
+USE_INCREMENTAL_FEATURES = False
+FEATURE_STATE_PATH = "data/feature_state.json"
+
+# Distributed scans (run_daily_scan.py --distributed, scan_worker.py on each host)
+SPOOL_DIR = "data/spool/"  # Task queue directory; share it between hosts (e.g. NFS)
+SHARD_SIZE = 200  # Max symbols per task
+SHARD_LEASE_TIMEOUT = 60  # Seconds without a heartbeat before a worker's shards are reassigned
+SHARD_HEARTBEAT_INTERVAL = 10
+SHARD_DEADLINE = 900  # Seconds one claimed shard may run before its worker is treated as hung
+SHARD_MAX_ATTEMPTS = 3  # Workers a failing shard is tried on before its symbols are reported failed
+SHARD_SCAN_TIMEOUT = 3600  # Give up waiting for shards after this long
+HASH_RING_REPLICAS = 64  # Virtual nodes per worker on the consistent hash ring
+
+# Scan checkpoints (run_daily_scan.py --resume skips symbols already done today)
+CHECKPOINT_PATH = "data/scan_checkpoint.json"
+CHECKPOINT_EVERY = 100  # Save after this many analyzed symbols
+CHECKPOINT_INTERVAL = 30  # ...or this many seconds, whichever comes first
+
+# Scan snapshots (bars, catalyst responses and config, replayable with replay_scan.py)
+SNAPSHOT_SCANS = True
+SNAPSHOT_DIR = "data/snapshots/"  # Content-addressed; unchanged inputs are stored once across days
 
 # =============================================================================
 # AI AGENT SETTINGS
@@ -119,10 +193,51 @@ SWARM_MODELS = [
     "gemini-2.5-flash",
 ]
 
+# OpenAI-compatible endpoints for models not served by OpenAI
+# (point base_url at a local stub server, with any "api_key", to test the
+# swarm offline; models whose key is missing are left out of the swarm)
+SWARM_ENDPOINTS = {
+    "gemini-2.5-flash": {
+        "base_url": "https://generativelanguage.googleapis.com/v1beta/openai/",
+        "api_key_env": "GEMINI_API_KEY",
+    },
+}
+SWARM_TIMEOUT = 20  # Seconds allowed per model request
+SWARM_QUORUM = 2  # Models that must agree before answering early (capped at the usable models)
+SWARM_SCORE_TOLERANCE = 10  # Max score spread (points) that counts as agreement
+
+# Batched catalyst scoring (many symbols per request)
+USE_CATALYST_BATCHING = False
+CATALYST_BATCH_SIZE = 20  # Starting batch size (adapts between min and max)
+CATALYST_BATCH_MIN = 1
+CATALYST_BATCH_MAX = 50
+CATALYST_BATCH_RETRIES = 2  # Retries for symbols missing from a reply
+CATALYST_TOKENS_PER_SYMBOL = 80  # Reply token budget per symbol
+
+# Local filings/news index (rule-based catalysts; only ambiguous cases go to the LLM)
+USE_CATALYST_INDEX = False
+CATALYST_FEEDS_DIR = "data/feeds/"  # *.jsonl / *.jsonl.gz filing and headline dumps
+CATALYST_LOOKBACK_DAYS = 14
+CATALYST_HALF_LIFE_DAYS = 5  # Recency decay of event weights
+CATALYST_AMBIGUOUS_BAND = 10  # Net rule points below which mixed/unknown events go to the LLM
+
 # Analysis parameters
 MIN_PROBABILITY_SCORE = 70  # Minimum 70/100 to flag as pre-mover
 MAX_STOCKS_PER_SCAN = 10  # Return top 10 candidates
 
+# Market regime (breadth, index trend and volatility from the price panel at PANEL_DIR)
+USE_MARKET_REGIME = False  # Shift MIN_PROBABILITY_SCORE by the current regime
+REGIME_INDEX_SYMBOL = "SPY"  # Falls back to the panel's median daily return if not in the panel
+REGIME_TREND_DAYS = 50  # SMA length for index trend and breadth
+REGIME_VOLATILITY_DAYS = 20  # Realized volatility window
+REGIME_HIGH_VOLATILITY_PCT = 80  # Volatility above this percentile of its history is "high"
+REGIME_LOW_VOLATILITY_PCT = 20  # ...and below this one "low"
+REGIME_SCORE_ADJUSTMENTS = {  # Points added to MIN_PROBABILITY_SCORE per regime
+    'risk_on': -5,
+    'neutral': 0,
+    'risk_off': 10
+}
+
 # =============================================================================
 # NOTIFICATION SETTINGS
 # =============================================================================
@@ -131,10 +246,20 @@ MAX_STOCKS_PER_SCAN = 10  # Return top 10 candidates
 ENABLE_CONSOLE_ALERTS = True
 ENABLE_FILE_LOGGING = True
 LOG_FILE_PATH = "logs/detector.log"
+ENABLE_FILE_ALERTS = True
+ALERT_FILE_PATH = "logs/alerts.jsonl"  # One JSON alert per line
+ALERT_WEBHOOK_URL = None  # e.g. "http://127.0.0.1:8765/alerts" (POSTed as JSON)
+ALERT_WEBHOOK_TIMEOUT = 5
+
+# Log pipeline (structured JSON events, background writer, debug sampling)
+LOG_STRUCTURED = False  # One JSON object per line instead of plain text
+LOG_ASYNC = False  # Hand records to a queue; a background thread does the I/O
+LOG_SAMPLE_RATE = 1.0  # Fraction of DEBUG lines kept (dropped ones are counted per message)
 
 # Alert thresholds
 ALERT_ON_HIGH_PROBABILITY = 85  # Alert if probability > 85%
 ALERT_ON_VOLUME_SPIKE = 2.0  # Alert if volume > 200% of average
+ALERT_DEDUPE_WINDOW = 3600  # Seconds before the same alert can fire again for a symbol
 
 # =============================================================================
 # BACKTESTING SETTINGS
@@ -145,6 +270,15 @@ BACKTEST_END_DATE = "2025-12-31"
 INITIAL_CAPITAL = 10000
 COMMISSION = 0.001  # 0.1% commission per trade
 
+# Event study (backtest.py --events): every >10% day in the panel is an event
+EVENT_MOVE_THRESHOLD = 0.10  # One-day close-to-close move that labels an event
+EVENT_LOOKBACK_DAYS = 5  # Trading days before the event searched for signals
+EVENT_SCORE_THRESHOLD = 60  # Score that counts as a signal
+
+# Portfolio simulation (backtest.py --portfolio)
+SIM_SCORE_THRESHOLD = 70  # Technical score that opens a position
+SIM_MAX_HOLD_DAYS = 20  # Close at the last bar's close after this many trading days
+
 # =============================================================================
 # DEVELOPMENT & DEBUGGING
 # =============================================================================
@@ -153,3 +287,10 @@ DEBUG_MODE = False
 VERBOSE_LOGGING = True
 SAVE_ANALYSIS_REPORTS = True
 REPORTS_DIR = "reports/"
+REPORT_FORMAT = "json"  # "json" (one indented document), "ndjson" (one line per record) or "binary" (packed records)
+REPORT_COMPRESSION = None  # None, "gzip" or "zstd" (needs zstandard; falls back to gzip)
+
+# Prometheus-style metrics endpoint (http://METRICS_HOST:METRICS_PORT/metrics)
+METRICS_ENABLED = False
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Historical Analogues
+Builds the pattern index from the shared price panel and looks up the
+past setups that most resemble a symbol's latest bars
+
+Usage:
+    python find_analogues.py --build           # (Re)index every window in the panel
+    python find_analogues.py NVDA AMD          # Similar past setups and what they did next
+    python find_analogues.py NVDA -k 20        # More neighbours
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.config import *
+from utils.data_fetcher import DataFetcher
+from utils.price_panel import open_panel
+from utils.pattern_index import PatternIndex, open_pattern_index
+
+def build(panel_dir, index_dir):
+    """Index every complete window in the panel"""
+    panel = open_panel(panel_dir)
+    if panel is None:
+        print(f"❌ No price panel in {panel_dir} (run update_panel.py first)")
+        return
+
+    started = time.time()
+    index = PatternIndex.build(panel)
+    index.save(index_dir)
+    print(f"🗂️  Indexed {len(index):,} windows ({len(panel.symbols)} symbols x {panel.n_dates} dates) "
+          f"in {time.time() - started:.1f}s -> {index_dir}")
+
+def print_analogues(symbol, analogues):
+    """Print one symbol's nearest past setups"""
+    print(f"{'─' * 70}")
+    print(f"🔁 {symbol}: {len(analogues['matches'])} most similar past setups")
+    print(f"{'─' * 70}")
+
+    horizons = [f"forward_{h}d" for h in PATTERN_FORWARD_DAYS]
+    print(f"   {'Symbol':<8} {'Date':<12} {'Distance':>8} " + " ".join(f"{h[8:]:>8}" for h in horizons))
+    for match in analogues['matches']:
+        print(f"   {match['symbol']:<8} {match['date']:<12} {match['distance']:>8.3f} "
+              + " ".join(f"{match[h]:>+8.1%}" for h in horizons))
+
+    print()
+    for horizon, outcome in analogues['outcomes'].items():
+        print(f"   • {horizon}: avg {outcome['mean_return']:+.1%}, up {outcome['hit_rate']:.0%} of the time")
+    print()
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Find historical analogues of current setups")
+    parser.add_argument('symbols', nargs='*', help="Symbols to look up")
+    parser.add_argument('--build', action='store_true', help="Rebuild the index from the panel")
+    parser.add_argument('--panel-dir', default=PANEL_DIR, help="Panel directory")
+    parser.add_argument('--index-dir', default=PATTERN_INDEX_DIR, help="Pattern index directory")
+    parser.add_argument('-k', type=int, default=PATTERN_NEIGHBORS, help="Neighbours per symbol")
+    args = parser.parse_args()
+
+    if args.build:
+        build(args.panel_dir, args.index_dir)
+
+    if not args.symbols:
+        return
+
+    index = open_pattern_index(args.index_dir)
+    if index is None:
+        print(f"❌ No pattern index in {args.index_dir} (run with --build first)")
+        return
+
+    fetcher = DataFetcher(panel=open_panel(args.panel_dir))
+    for symbol in args.symbols:
+        data = fetcher.get_stock_data(symbol, days=MOMENTUM_DAYS + VOLUME_LOOKBACK_DAYS)
+        analogues = index.analogues(data, args.k) if data is not None else None
+        if analogues is None:
+            print(f"⚠️  {symbol}: not enough recent bars for a {index.window}-bar window\n")
+            continue
+        print_analogues(symbol, analogues)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Live Position Monitor
+Checks open positions every REALTIME_REFRESH seconds during the session
+and alerts when a stop-loss, trailing stop, partial sell or profit
+target triggers
+
+Usage:
+    python monitor_positions.py --add IPOE 12.40 500 --microcap   # Record an entry
+    python monitor_positions.py --remove IPOE                      # Record an exit
+    python monitor_positions.py --list
+    python monitor_positions.py                                    # Monitor until Ctrl+C
+    python monitor_positions.py --once                             # Single check
+"""
+
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.config import *
+from utils.position_monitor import PositionMonitor
+from utils.alerts import AlertEngine
+
+def print_positions(monitor):
+    """Print the monitored positions"""
+    if not monitor.symbols:
+        print("📭 No open positions")
+        return
+    for position in monitor.positions:
+        print(f"   {position['symbol']:<8} entry ${position['entry_price']:.2f}  "
+              f"peak ${position['peak']:.2f}  shares {position['shares']:g}"
+              f"{'  (micro-cap)' if position['is_microcap'] else ''}"
+              f"{'  [partial sold]' if position['partial_taken'] else ''}")
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Monitor open positions against the exit rules")
+    parser.add_argument('--positions', default=POSITIONS_PATH, help="Positions JSON file")
+    parser.add_argument('--add', nargs='+', metavar='ARG', help="SYMBOL ENTRY_PRICE [SHARES]")
+    parser.add_argument('--microcap', action='store_true', help="Use the micro-cap profit target for --add")
+    parser.add_argument('--remove', metavar='SYMBOL', help="Stop monitoring a symbol")
+    parser.add_argument('--list', action='store_true', help="List positions and exit")
+    parser.add_argument('--once', action='store_true', help="Check once and exit")
+    parser.add_argument('--interval', type=float, default=REALTIME_REFRESH, help="Seconds between checks")
+    args = parser.parse_args()
+
+    monitor = PositionMonitor(path=args.positions)
+    monitor.load()
+
+    if args.add:
+        if len(args.add) not in (2, 3):
+            parser.error("--add takes SYMBOL ENTRY_PRICE [SHARES]")
+        symbol = args.add[0].upper()
+        shares = float(args.add[2]) if len(args.add) == 3 else 0
+        monitor.add_position(symbol, float(args.add[1]), shares, is_microcap=args.microcap)
+        monitor.save()
+        print(f"✅ Monitoring {symbol} from ${float(args.add[1]):.2f}")
+        return
+
+    if args.remove:
+        if monitor.remove_position(args.remove.upper()):
+            monitor.save()
+            print(f"✅ Removed {args.remove.upper()}")
+        else:
+            print(f"❌ {args.remove.upper()} is not an open position")
+        return
+
+    print(f"📋 {len(monitor.symbols)} open positions")
+    print_positions(monitor)
+    if args.list or not monitor.symbols:
+        return
+
+    # Exit-rule alerts go through the same sinks and dedupe as scan alerts
+    alerts = AlertEngine.from_config()
+    monitor.add_alert_listener(alerts.notify)
+
+    if args.once:
+        monitor.run(iterations=1)
+        alerts.flush(timeout=ALERT_WEBHOOK_TIMEOUT)
+        return
+
+    print(f"\n👀 Checking every {args.interval:.0f}s (Ctrl+C to stop)\n")
+    try:
+        raised = monitor.run(interval=args.interval)
+    except KeyboardInterrupt:
+        monitor.stop()
+        monitor.save()
+        raised = None
+    alerts.flush(timeout=ALERT_WEBHOOK_TIMEOUT)
+
+    if raised is not None:
+        print(f"\n✅ Monitor stopped after {raised} alerts")
+
+if __name__ == "__main__":
+    main()
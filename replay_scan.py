@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Scan Replay
+Re-runs a recorded scan from its snapshot (bars, catalyst responses and
+config as they were at scan time), offline
+
+Usage:
+    python replay_scan.py --list                  # Recorded scans
+    python replay_scan.py                         # Replay the latest scan
+    python replay_scan.py 20260105_080012_123456  # Replay one scan
+    python replay_scan.py --current-config        # Replay with today's config.py
+"""
+
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import config.config as config_module
+from config.config import SNAPSHOT_DIR
+from utils.snapshot import Snapshot, restore_config, capture_config
+from utils.metrics import REGISTRY
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Replay a recorded scan from its snapshot")
+    parser.add_argument('scan_id', nargs='?', help="Snapshot to replay (default: latest)")
+    parser.add_argument('--snapshot-dir', default=SNAPSHOT_DIR, help="Snapshot directory")
+    parser.add_argument('--list', action='store_true', help="List recorded scans and exit")
+    parser.add_argument('--current-config', action='store_true',
+                        help="Score with today's config.py instead of the recorded one")
+    args = parser.parse_args()
+
+    scan_ids = Snapshot.list(args.snapshot_dir)
+    if args.list:
+        for scan_id in scan_ids:
+            print(scan_id)
+        return
+    if not scan_ids:
+        print(f"❌ No snapshots in {args.snapshot_dir}")
+        return
+
+    snapshot = Snapshot(args.snapshot_dir, args.scan_id or scan_ids[-1])
+    print(f"⏪ Replaying scan {snapshot.scan_id} (config {snapshot.config_hash[:12]})")
+
+    # Replays never serve metrics or touch the network
+    REGISTRY.enabled = False
+
+    # The agent star-imports config, so patch both copies before loading it
+    import agents.pre_mover_agent as agent_module
+    if args.current_config:
+        if capture_config(config_module) != snapshot.config:
+            print("⚠️  config.py changed since this scan; results may differ")
+    else:
+        changed = restore_config(snapshot.config, [config_module, agent_module])
+        if changed:
+            print(f"🔧 Restored {len(changed)} config values from the snapshot: {', '.join(changed)}")
+
+    if snapshot.manifest['resumed']:
+        print(f"⚠️  {len(snapshot.manifest['resumed'])} symbols came from a checkpoint and were not recorded")
+
+    detector = agent_module.PreMoverDetector.from_snapshot(snapshot)
+    candidates = detector.scan_market(snapshot.stock_list)
+
+    from run_daily_scan import print_results
+    print()
+    print_results(candidates)
+
+if __name__ == "__main__":
+    main()
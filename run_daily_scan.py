@@ -5,11 +5,14 @@ Run this script every morning before market open to identify potential movers
 
 Usage:
     python run_daily_scan.py
+    python run_daily_scan.py --distributed   # Shard across scan_worker.py hosts
+    python run_daily_scan.py --resume        # Continue today's scan after a crash
     
     Or schedule with cron:
     0 8 * * 1-5 cd /path/to/Mike-Shiva-stock-detector && python run_daily_scan.py
 """
 
+import argparse
 import sys
 import os
 from datetime import datetime
@@ -19,6 +22,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from agents.pre_mover_agent import PreMoverDetector
 from config.config import *
+from utils.sharding import SpoolQueue, ShardCoordinator
+from utils.checkpoint import ScanCheckpoint
 
 def print_banner():
     """Print welcome banner"""
@@ -61,6 +66,12 @@ def print_results(candidates):
             for reason in stock['reasons']:
                 print(f"   ✓ {reason}")
         
+        if stock.get('analogues'):
+            analogues = stock['analogues']
+            print(f"\n🔁 {len(analogues['matches'])} Similar Past Setups:")
+            for horizon, outcome in analogues['outcomes'].items():
+                print(f"   • {horizon}: avg {outcome['mean_return']:+.1%}, up {outcome['hit_rate']:.0%} of the time")
+        
         print()
     
     print("=" * 70)
@@ -76,8 +87,64 @@ def print_results(candidates):
     print("=" * 70)
     print()
 
+def print_coverage(summary):
+    """Print how many requested symbols were actually fetched and scored"""
+    if not summary:
+        return
+    
+    print(f"📡 Coverage: {summary['symbols_fetched']}/{summary['symbols_requested']} symbols "
+          f"({summary['coverage_pct']}%)")
+    if summary['fetch_failures']:
+        failed = ', '.join(f"{f['symbol']} ({f['status']})" for f in summary['fetch_failures'])
+        print(f"   ⚠️  Not fetched after retries: {failed}")
+    print()
+
+def print_regime(summary):
+    """Print the market regime the scan's threshold was adjusted for"""
+    if not summary or not summary.get('regime'):
+        return
+    
+    regime = summary['regime']
+    print(f"🌡️  Market regime: {regime['label'].upper().replace('_', '-')} "
+          f"(breadth {regime['breadth']:.0%}, index {regime['trend']} {regime['index_vs_sma']:+.1%} vs SMA, "
+          f"{regime['volatility_regime']} volatility)")
+    print(f"   Threshold this scan: {summary['min_score']}/100 (base {MIN_PROBABILITY_SCORE})")
+    print()
+
+def run_distributed(detector, spool_dir):
+    """Shard the scan across live workers and merge their top candidates"""
+    spool = SpoolQueue(spool_dir)
+    coordinator = ShardCoordinator(
+        spool,
+        shard_size=SHARD_SIZE,
+        lease_timeout=SHARD_LEASE_TIMEOUT,
+        shard_deadline=SHARD_DEADLINE,
+        max_attempts=SHARD_MAX_ATTEMPTS,
+        top_k=MAX_STOCKS_PER_SCAN,
+        replicas=HASH_RING_REPLICAS
+    )
+    
+    print(f"🌐 Distributing scan via {spool_dir} "
+          f"({len(spool.live_workers(SHARD_LEASE_TIMEOUT))} live workers)...\n")
+    candidates, summary = coordinator.run(IPO_WATCHLIST + BELLWETHER_STOCKS, timeout=SHARD_SCAN_TIMEOUT)
+    detector.last_scan_summary = summary
+    
+    shards = summary['shards']
+    print(f"🧩 Shards: {shards['completed']} completed, {shards['reassigned']} reassigned, "
+          f"{shards['retried']} retried, {shards['timed_out']} timed out "
+          f"({', '.join(shards['workers']) or 'no workers'})\n")
+    return candidates
+
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Daily pre-mover scan")
+    parser.add_argument('--distributed', action='store_true',
+                        help="Shard the scan across scan_worker.py processes")
+    parser.add_argument('--spool-dir', default=SPOOL_DIR, help="Shared spool directory for --distributed")
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip symbols already analyzed in today's checkpoint")
+    args = parser.parse_args()
+    
     print_banner()
     
     # Initialize detector
@@ -86,17 +153,29 @@ def main():
     print("✓ Detector ready\n")
     
     # Run scan
-    print("🔍 Scanning market...\n")
-    candidates = detector.scan_market()
+    if args.distributed:
+        candidates = run_distributed(detector, args.spool_dir)
+    else:
+        # Checkpoint as we go; --resume picks up today's earlier progress
+        options = {'save_every': CHECKPOINT_EVERY, 'save_interval': CHECKPOINT_INTERVAL}
+        if args.resume:
+            checkpoint = ScanCheckpoint.load(CHECKPOINT_PATH, **options)
+            print(f"♻️  Resuming {checkpoint.scan_date}: {checkpoint.resumed} symbols already analyzed\n")
+        else:
+            checkpoint = ScanCheckpoint(CHECKPOINT_PATH, **options)
+        
+        print("🔍 Scanning market...\n")
+        candidates = detector.scan_market(checkpoint=checkpoint)
     
     # Print results
     print_results(candidates)
+    print_coverage(detector.last_scan_summary)
+    print_regime(detector.last_scan_summary)
     
     # Save results
     if candidates:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"reports/daily_scan_{timestamp}.json"
-        detector.save_results(candidates, filename)
+        filename = detector.save_results(candidates, f"{REPORTS_DIR}daily_scan_{timestamp}")
         print(f"💾 Results saved to: {filename}\n")
     
     print("✅ Daily scan complete!\n")
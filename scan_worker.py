@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Distributed Scan Worker
+Run one of these on each scanning host; run_daily_scan.py --distributed
+then shards the universe across every worker with a live heartbeat
+
+Usage:
+    python scan_worker.py                          # Worker id = hostname
+    python scan_worker.py --worker-id host-a-2     # Several workers per host
+    python scan_worker.py --spool-dir /mnt/shared/spool
+"""
+
+import argparse
+import os
+import socket
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.config import *
+from agents.pre_mover_agent import PreMoverDetector
+from utils.sharding import SpoolQueue, ShardWorker
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Process scan shards from the shared spool")
+    parser.add_argument('--spool-dir', default=SPOOL_DIR, help="Shared spool directory")
+    parser.add_argument('--worker-id', default=socket.gethostname(), help="Unique worker name")
+    parser.add_argument('--max-idle', type=float, default=None,
+                        help="Exit after this many idle seconds (default: run forever)")
+    args = parser.parse_args()
+
+    print(f"🔧 Starting scan worker {args.worker_id} on {args.spool_dir}")
+    worker = ShardWorker(SpoolQueue(args.spool_dir), args.worker_id, PreMoverDetector(),
+                         heartbeat_interval=SHARD_HEARTBEAT_INTERVAL)
+
+    try:
+        processed = worker.run(max_idle=args.max_idle)
+    except KeyboardInterrupt:
+        worker.stop()
+        processed = None
+
+    if processed is not None:
+        print(f"✅ Worker {args.worker_id} processed {processed} shards")
+
+if __name__ == "__main__":
+    main()
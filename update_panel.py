@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Price Panel Loader
+Keeps the shared memory-mapped price panel up to date so the scanner,
+backtester and worker pools can attach to it read-only
+
+Usage:
+    python update_panel.py                  # One refresh of the default universe
+    python update_panel.py NVDA AMD TSLA    # Refresh specific symbols
+    python update_panel.py --loop           # Refresh every REALTIME_REFRESH seconds
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.config import *
+from utils.data_fetcher import DataFetcher
+from utils.price_panel import PanelLoader
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Update the shared price panel")
+    parser.add_argument('symbols', nargs='*', help="Symbols to load (default: IPO watchlist + bellwethers)")
+    parser.add_argument('--panel-dir', default=PANEL_DIR, help="Panel directory")
+    parser.add_argument('--days', type=int, default=HISTORICAL_DAYS, help="Days of history to fetch")
+    parser.add_argument('--loop', action='store_true', help="Keep refreshing every REALTIME_REFRESH seconds")
+    args = parser.parse_args()
+    
+    symbols = args.symbols or IPO_WATCHLIST + BELLWETHER_STOCKS
+    
+    # The loader is the only writer; it bypasses the panel when fetching
+    loader = PanelLoader(args.panel_dir, DataFetcher(),
+                         date_capacity=PANEL_DATE_CAPACITY,
+                         symbol_capacity=PANEL_SYMBOL_CAPACITY)
+    
+    while True:
+        started = time.time()
+        statuses = loader.update(symbols, args.days)
+        loaded = sum(1 for status in statuses.values() if status == 'ok')
+        
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] "
+              f"Panel updated: {loaded}/{len(symbols)} symbols, "
+              f"{loader.panel.n_dates} dates, {time.time() - started:.1f}s")
+        
+        if not args.loop:
+            break
+        
+        time.sleep(REALTIME_REFRESH)
+
+if __name__ == "__main__":
+    main()
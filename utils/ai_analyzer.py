@@ -5,13 +5,49 @@ Uses LLM to analyze catalysts and market sentiment
 
 import os
 from openai import OpenAI
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
+from collections import Counter
 import json
+import statistics
+
+from config.config import (
+    AI_MODEL, USE_SWARM_MODE, SWARM_MODELS, SWARM_ENDPOINTS,
+    SWARM_TIMEOUT, SWARM_QUORUM, SWARM_SCORE_TOLERANCE,
+    CATALYST_BATCH_SIZE, CATALYST_BATCH_MIN, CATALYST_BATCH_MAX,
+    CATALYST_BATCH_RETRIES, CATALYST_TOKENS_PER_SYMBOL
+)
+from utils.logger import setup_logger
+from utils.metrics import REGISTRY
+
+logger = setup_logger(__name__)
+
+LLM_SECONDS = REGISTRY.histogram('llm_request_seconds', 'LLM request latency', ['mode', 'model'])
+LLM_REQUESTS = REGISTRY.counter('llm_requests_total', 'LLM requests by outcome', ['mode', 'model', 'outcome'])
+LLM_BATCH_SYMBOLS = REGISTRY.counter('llm_batch_symbols_total', 'Symbols sent in batched catalyst requests')
+
+CATALYST_SYSTEM_PROMPT = "You are a financial analyst specializing in catalyst detection for stock trading."
+
+# Filings/headlines passed along with a catalyst prompt
+MAX_CONTEXT_LINES = 10
 
 class AIAnalyzer:
     """AI-powered analysis using OpenAI"""
     
-    def __init__(self):
+    def __init__(self, swarm_mode: bool = USE_SWARM_MODE, swarm_models: Optional[List[str]] = None,
+                 swarm_endpoints: Optional[Dict[str, Dict]] = None):
+        """
+        Args:
+            swarm_mode: Ask every swarm model and aggregate a consensus
+            swarm_models: Models to fan out to (defaults to SWARM_MODELS)
+            swarm_endpoints: Per-model OpenAI-compatible endpoints, e.g.
+                             {"model": {"base_url": "http://localhost:8001/v1",
+                                        "api_key_env": "STUB_KEY"}}
+        """
+        self.swarm_mode = swarm_mode
+        self.swarm_models = swarm_models or SWARM_MODELS
+        self.swarm_endpoints = SWARM_ENDPOINTS if swarm_endpoints is None else swarm_endpoints
+        
         api_key = os.getenv('OPENAI_API_KEY')
         if api_key:
             self.client = OpenAI()
@@ -19,14 +55,53 @@ class AIAnalyzer:
         else:
             self.client = None
             self.enabled = False
-            print("Warning: OPENAI_API_KEY not set. AI analysis disabled.")
+        
+        # One client per swarm model; models without their own endpoint
+        # share the default OpenAI client, models without a key are skipped
+        self.swarm_clients = {}
+        self.swarm_executor = None
+        self._swarm_in_flight = {}  # model -> its latest request's future
+        if self.swarm_mode:
+            for model in self.swarm_models:
+                client = self._endpoint_client(model) if model in self.swarm_endpoints else self.client
+                if client is not None:
+                    self.swarm_clients[model] = client
+                else:
+                    logger.warning("Swarm model %s has no API key; leaving it out of the swarm", model)
+            self.enabled = bool(self.swarm_clients)
+        
+        # A quorum larger than the usable swarm could never be reached
+        self.swarm_quorum = max(1, min(SWARM_QUORUM, len(self.swarm_clients)))
+        if self.swarm_clients:
+            # Shared by every swarm call; a model never has more than one
+            # request running, so a worker per model means requests start as
+            # soon as they are submitted and never queue behind stragglers
+            self.swarm_executor = ThreadPoolExecutor(max_workers=len(self.swarm_clients),
+                                                     thread_name_prefix='swarm')
+        
+        if not self.enabled:
+            logger.warning("OPENAI_API_KEY not set. AI analysis disabled.")
+        
+        self.batch_size = CATALYST_BATCH_SIZE
+        self.batch_stats = {'requests': 0, 'symbols': 0, 'retried': 0, 'failed': 0}
     
-    def detect_catalysts(self, symbol: str) -> Optional[Dict]:
+    def _endpoint_client(self, model: str) -> Optional[OpenAI]:
+        """Build a client for a model with its own endpoint (None without an API key)"""
+        endpoint = self.swarm_endpoints.get(model)
+        if not endpoint:
+            return None
+        api_key = os.getenv(endpoint.get('api_key_env', ''), '') or endpoint.get('api_key')
+        if not api_key:
+            return None
+        return OpenAI(base_url=endpoint['base_url'], api_key=api_key)
+    
+    def detect_catalysts(self, symbol: str, context: Optional[List[str]] = None) -> Optional[Dict]:
         """
         Use AI to detect catalysts for a stock
         
         Args:
             symbol: Stock ticker symbol
+            context: Recent filings/headlines from the local catalyst index
         
         Returns:
             Dictionary with catalyst information and score
@@ -34,9 +109,83 @@ class AIAnalyzer:
         if not self.enabled:
             return {'score': 50, 'catalysts': []}
         
+        if self.swarm_mode:
+            return self.swarm_detect_catalysts(symbol, context)
+        
         try:
-            prompt = f"""Analyze the stock {symbol} for potential catalysts that could drive price movement.
-
+            return self._request_catalysts(self.client, AI_MODEL, symbol, context=context)
+            
+        except Exception as e:
+            logger.error("AI analysis error for %s: %s", symbol, e, extra={'symbol': symbol})
+            return {'score': 50, 'catalysts': []}
+    
+    def swarm_detect_catalysts(self, symbol: str, context: Optional[List[str]] = None) -> Dict:
+        """
+        Fan the catalyst prompt out to every swarm model concurrently
+        
+        Returns as soon as SWARM_QUORUM models (or every usable model, if
+        fewer are configured) agree within
+        SWARM_SCORE_TOLERANCE points, so the call costs roughly the latency
+        of the slowest quorum member rather than the sum of all calls.
+        Each model request is bounded by SWARM_TIMEOUT seconds. A model
+        still working on an earlier symbol's request (a straggler left
+        behind by an early quorum) sits this symbol out.
+        
+        Args:
+            symbol: Stock ticker symbol
+            context: Recent filings/headlines from the local catalyst index
+        
+        Returns:
+            Consensus dictionary with score, catalysts, confidence, the
+            per-model scores and whether a quorum was reached
+        """
+        responses = []
+        futures = {}
+        for model, client in self.swarm_clients.items():
+            previous = self._swarm_in_flight.get(model)
+            if previous is not None and not previous.done():
+                logger.debug("Swarm model %s still busy; skipping it for %s", model, symbol,
+                             extra={'symbol': symbol, 'model': model})
+                continue
+            future = self.swarm_executor.submit(self._request_catalysts, client, model, symbol,
+                                                SWARM_TIMEOUT, context)
+            self._swarm_in_flight[model] = future
+            futures[future] = model
+        quorum = min(self.swarm_quorum, len(futures))
+        
+        agreed = None
+        try:
+            for future in as_completed(futures, timeout=SWARM_TIMEOUT):
+                model = futures[future]
+                try:
+                    result = future.result()
+                    if not isinstance(result, dict):
+                        raise ValueError(f"expected a JSON object, got {type(result).__name__}")
+                    responses.append((model, result))
+                except Exception as e:
+                    logger.warning("Swarm model %s failed for %s: %s", model, symbol, e,
+                                   extra={'symbol': symbol, 'model': model})
+                    continue
+                
+                agreed = find_quorum(responses, quorum, SWARM_SCORE_TOLERANCE)
+                if agreed:
+                    break
+        except FutureTimeoutError:
+            logger.warning("Swarm timed out for %s with %d/%d responses", symbol, len(responses), len(futures),
+                           extra={'symbol': symbol})
+        finally:
+            # Early exit: don't wait for stragglers (they finish within their
+            # own SWARM_TIMEOUT while their model sits out later symbols)
+            for future in futures:
+                future.cancel()
+        
+        return aggregate_swarm(responses, agreed)
+    
+    def _request_catalysts(self, client: OpenAI, model: str, symbol: str,
+                           timeout: Optional[float] = None, context: Optional[List[str]] = None) -> Dict:
+        """Send the catalyst prompt for one symbol to one model"""
+        prompt = f"""Analyze the stock {symbol} for potential catalysts that could drive price movement.
+{format_catalyst_context(context)}
 Consider:
 - Recent SEC filings (8-K, 10-Q, S-1)
 - FDA approvals or clinical trial results (if biotech)
@@ -55,22 +204,138 @@ Respond in JSON format:
 
 If no recent catalysts found, return score of 50."""
 
-            response = self.client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[
-                    {"role": "system", "content": "You are a financial analyst specializing in catalyst detection for stock trading."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=300
-            )
-            
+        mode = 'swarm' if self.swarm_mode else 'single'
+        try:
+            with LLM_SECONDS.time(mode=mode, model=model):
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": CATALYST_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=300,
+                    timeout=timeout
+                )
             result = json.loads(response.choices[0].message.content)
-            return result
+        except Exception:
+            LLM_REQUESTS.inc(mode=mode, model=model, outcome='error')
+            raise
+        
+        LLM_REQUESTS.inc(mode=mode, model=model, outcome='ok')
+        return result
+    
+    def detect_catalysts_batch(self, symbols: List[str],
+                               contexts: Optional[Dict[str, List[str]]] = None) -> Dict[str, Dict]:
+        """
+        Score catalysts for many symbols with one request per batch
+        
+        The shared instructions are sent once per batch and the model
+        returns a JSON array with one entry per symbol. Symbols missing from
+        a reply or with unparsable entries are retried (up to
+        CATALYST_BATCH_RETRIES times); the batch size halves when a reply
+        fails to parse or is truncated and grows again after clean replies.
+        
+        Args:
+            symbols: Stock ticker symbols
+            contexts: Optional recent filings/headlines per symbol
+        
+        Returns:
+            Dictionary mapping each symbol to its catalyst result
+        """
+        neutral = {'score': 50, 'catalysts': []}
+        contexts = contexts or {}
+        if not self.enabled:
+            return {symbol: dict(neutral) for symbol in symbols}
+        
+        # Swarm consensus is per symbol; reuse it rather than batching
+        if self.swarm_mode or self.client is None:
+            return {symbol: self.detect_catalysts(symbol, contexts.get(symbol)) for symbol in symbols}
+        
+        results = {}
+        attempts = {}
+        queue = list(dict.fromkeys(symbols))
+        
+        while queue:
+            batch, queue = queue[:self.batch_size], queue[self.batch_size:]
+            self.batch_stats['requests'] += 1
+            self.batch_stats['symbols'] += len(batch)
             
-        except Exception as e:
-            print(f"AI analysis error for {symbol}: {e}")
-            return {'score': 50, 'catalysts': []}
+            try:
+                parsed, truncated = self._request_catalyst_batch(batch, contexts)
+            except Exception as e:
+                logger.error("AI batch analysis error for %d symbols: %s", len(batch), e)
+                parsed, truncated = {}, True
+            
+            missing = [symbol for symbol in batch if symbol not in parsed]
+            results.update(parsed)
+            
+            # Adapt: shrink on bad replies, grow after clean ones
+            if truncated or len(missing) > len(batch) // 2:
+                self.batch_size = max(CATALYST_BATCH_MIN, self.batch_size // 2)
+            elif not missing:
+                self.batch_size = min(CATALYST_BATCH_MAX, self.batch_size + max(1, self.batch_size // 4))
+            
+            for symbol in missing:
+                attempts[symbol] = attempts.get(symbol, 0) + 1
+                if attempts[symbol] <= CATALYST_BATCH_RETRIES:
+                    self.batch_stats['retried'] += 1
+                    queue.append(symbol)
+                else:
+                    self.batch_stats['failed'] += 1
+                    results[symbol] = dict(neutral)
+        
+        return results
+    
+    def _request_catalyst_batch(self, symbols: List[str],
+                                contexts: Optional[Dict[str, List[str]]] = None) -> Tuple[Dict[str, Dict], bool]:
+        """
+        Send one batched catalyst prompt
+        
+        Returns:
+            (results parsed per symbol, whether the reply was truncated or unparsable)
+        """
+        prompt = f"""Analyze each of these stocks for potential catalysts that could drive price movement:
+{', '.join(symbols)}
+{format_batch_context(symbols, contexts)}
+Consider:
+- Recent SEC filings (8-K, 10-Q, S-1)
+- FDA approvals or clinical trial results (if biotech)
+- Partnership announcements
+- Insider buying activity
+- IPO or uplisting news
+- Product launches
+- Earnings surprises
+
+Respond with a JSON array containing exactly one object per stock, in any order:
+[
+  {{"symbol": "<ticker>", "score": <0-100>, "catalysts": ["catalyst1"], "confidence": "high|medium|low"}}
+]
+
+Use a score of 50 for stocks with no recent catalysts. Respond with the JSON array only."""
+
+        LLM_BATCH_SYMBOLS.inc(len(symbols))
+        try:
+            with LLM_SECONDS.time(mode='batch', model=AI_MODEL):
+                response = self.client.chat.completions.create(
+                    model=AI_MODEL,
+                    messages=[
+                        {"role": "system", "content": CATALYST_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=CATALYST_TOKENS_PER_SYMBOL * len(symbols) + 50
+                )
+        except Exception:
+            LLM_REQUESTS.inc(mode='batch', model=AI_MODEL, outcome='error')
+            raise
+        
+        choice = response.choices[0]
+        parsed = parse_catalyst_batch(choice.message.content, symbols)
+        truncated = choice.finish_reason == 'length' or parsed is None
+        LLM_REQUESTS.inc(mode='batch', model=AI_MODEL, outcome='truncated' if truncated else 'ok')
+        
+        return parsed or {}, truncated
     
     def analyze_pre_mover_probability(self, stock_data: Dict) -> Dict:
         """
@@ -107,7 +372,7 @@ Respond in JSON format:
 }}"""
 
             response = self.client.chat.completions.create(
-                model="gpt-4.1-mini",
+                model=AI_MODEL,
                 messages=[
                     {"role": "system", "content": "You are an expert stock market analyst specializing in pre-mover detection."},
                     {"role": "user", "content": prompt}
@@ -120,8 +385,133 @@ Respond in JSON format:
             return result
             
         except Exception as e:
-            print(f"AI probability analysis error: {e}")
+            logger.error("AI probability analysis error: %s", e)
             return {
                 'assessment': 'Analysis error',
                 'confidence': 'low'
             }
+
+
+def format_catalyst_context(context: Optional[List[str]]) -> str:
+    """Prompt section listing locally indexed filings/headlines (empty if none)"""
+    if not context:
+        return ''
+    lines = '\n'.join(f"- {line}" for line in context[:MAX_CONTEXT_LINES])
+    return f"\nRecent filings and headlines on record:\n{lines}\n"
+
+
+def format_batch_context(symbols: List[str], contexts: Optional[Dict[str, List[str]]]) -> str:
+    """Per-symbol filings/headlines section for the batched prompt (empty if none)"""
+    sections = [
+        f"{symbol}: " + '; '.join(contexts[symbol][:MAX_CONTEXT_LINES])
+        for symbol in symbols if contexts and contexts.get(symbol)
+    ]
+    if not sections:
+        return ''
+    return "\nRecent filings and headlines on record:\n" + '\n'.join(sections) + "\n"
+
+
+def find_quorum(responses: List[Tuple[str, Dict]], quorum: int, tolerance: float) -> Optional[List[Tuple[str, Dict]]]:
+    """
+    Find the largest group of responses whose scores agree within tolerance
+    
+    Args:
+        responses: (model, result) pairs received so far
+        quorum: Minimum group size
+        tolerance: Maximum score spread inside the group
+    
+    Returns:
+        The agreeing responses, or None if no group reaches the quorum
+    """
+    scored = sorted(
+        ((model, result) for model, result in responses if isinstance(result.get('score'), (int, float))),
+        key=lambda item: item[1]['score']
+    )
+    
+    best = []
+    start = 0
+    for end in range(len(scored)):
+        while scored[end][1]['score'] - scored[start][1]['score'] > tolerance:
+            start += 1
+        if end - start + 1 > len(best):
+            best = scored[start:end + 1]
+    
+    return best if len(best) >= quorum else None
+
+
+def aggregate_swarm(responses: List[Tuple[str, Dict]], agreed: Optional[List[Tuple[str, Dict]]]) -> Dict:
+    """
+    Combine swarm responses into one catalyst result
+    
+    The agreeing group (or every response if no quorum was reached) gives
+    the median score, the majority confidence and the union of catalysts.
+    """
+    group = agreed or [(m, r) for m, r in responses if isinstance(r.get('score'), (int, float))]
+    if not group:
+        return {'score': 50, 'catalysts': [], 'confidence': 'low', 'models': {}, 'quorum_reached': False}
+    
+    catalysts = []
+    for _, result in group:
+        for catalyst in result.get('catalysts', []):
+            if catalyst not in catalysts:
+                catalysts.append(catalyst)
+    
+    confidence = Counter(result.get('confidence', 'low') for _, result in group).most_common(1)[0][0]
+    
+    return {
+        'score': statistics.median(result['score'] for _, result in group),
+        'catalysts': catalysts,
+        'confidence': confidence if agreed else 'low',
+        'models': {model: result.get('score') for model, result in responses},
+        'quorum_reached': agreed is not None
+    }
+
+
+def parse_catalyst_batch(content: str, symbols: List[str]) -> Optional[Dict[str, Dict]]:
+    """
+    Parse a batched catalyst reply into per-symbol results
+    
+    Accepts a bare JSON array or an object wrapping one (e.g. {"results": [...]}),
+    optionally inside a markdown code fence. Entries for symbols that were
+    not requested or without a numeric score are dropped.
+    
+    Returns:
+        Dictionary of valid results, or None if the reply is not valid JSON
+    """
+    text = (content or '').strip()
+    if text.startswith('```'):
+        text = text.strip('`')
+        text = text[text.find('\n') + 1:] if '\n' in text else text
+    
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError:
+        # Salvage the outermost array if the model added prose around it
+        start, end = text.find('['), text.rfind(']')
+        if start < 0 or end <= start:
+            return None
+        try:
+            payload = json.loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+    
+    if isinstance(payload, dict):
+        payload = next((value for value in payload.values() if isinstance(value, list)), [])
+    if not isinstance(payload, list):
+        return None
+    
+    requested = {symbol.upper(): symbol for symbol in symbols}
+    results = {}
+    for entry in payload:
+        if not isinstance(entry, dict):
+            continue
+        symbol = requested.get(str(entry.get('symbol', '')).upper())
+        if symbol is None or not isinstance(entry.get('score'), (int, float)):
+            continue
+        results[symbol] = {
+            'score': entry['score'],
+            'catalysts': entry.get('catalysts', []),
+            'confidence': entry.get('confidence', 'low')
+        }
+    
+    return results
@@ -0,0 +1,229 @@
+"""
+Alerts Engine
+Evaluates alert rules as each symbol is scored and fans alerts out to
+console, file and webhook sinks without blocking the scan
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.logger import setup_logger
+from utils.metrics import REGISTRY
+from config.config import (
+    ALERT_ON_HIGH_PROBABILITY, ALERT_ON_VOLUME_SPIKE, ALERT_DEDUPE_WINDOW,
+    ENABLE_CONSOLE_ALERTS, ENABLE_FILE_ALERTS, ALERT_FILE_PATH,
+    ALERT_WEBHOOK_URL, ALERT_WEBHOOK_TIMEOUT
+)
+
+logger = setup_logger(__name__)
+
+ALERTS = REGISTRY.counter('alerts_total', 'Alerts by type and outcome', ['type', 'outcome'])
+SINK_FAILURES = REGISTRY.counter('alert_sink_failures_total', 'Alerts a sink failed to deliver', ['sink'])
+
+ALERT_ICONS = {
+    'high_probability': '🔥',
+    'volume_spike': '📊',
+    'stop_loss': '🛑',
+    'trailing_stop': '📉',
+    'partial_sell': '💵',
+    'profit_target': '🎯'
+}
+
+
+def format_alert(alert: Dict) -> str:
+    """One-line human-readable description of an alert"""
+    kind = alert['type']
+    title = f"{alert['symbol']}: {kind.replace('_', ' ').upper()}"
+    if kind == 'high_probability':
+        return f"{title} {alert['probability_score']}/100 at ${alert['price']:.2f}"
+    if kind == 'volume_spike':
+        return f"{title} {alert['volume_ratio']:.1f}x average volume at ${alert['price']:.2f}"
+    if 'level' in alert:
+        return (f"{title} at ${alert['price']:.2f} (level ${alert['level']:.2f}, "
+                f"{alert['return_pct']:+.1f}% from entry)")
+    return title
+
+
+class ConsoleSink:
+    """Print alerts to stdout"""
+
+    name = 'console'
+
+    def send(self, alert: Dict):
+        icon = ALERT_ICONS.get(alert['type'], '⚠️')
+        print(f"{icon} {alert['timestamp'][11:19]} {alert['message']}", flush=True)
+
+
+class FileSink:
+    """Append alerts to a JSON Lines file"""
+
+    name = 'file'
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def send(self, alert: Dict):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(alert, default=str, ensure_ascii=False) + '\n')
+
+
+class WebhookSink:
+    """POST each alert as JSON to a URL (e.g. a local relay for chat or SMS)"""
+
+    name = 'webhook'
+
+    def __init__(self, url: str, timeout: float = 5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert: Dict):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(alert, default=str).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class AlertEngine:
+    """
+    Threshold alerts with per-(type, symbol) de-duplication
+
+    evaluate() checks one freshly scored analysis, so alerts go out while
+    the scan is still running; notify() takes alerts produced elsewhere
+    (the position monitor registers it as a listener). Delivery happens on
+    a background thread, so a slow webhook never holds up scoring.
+    """
+
+    def __init__(self, sinks: Optional[List] = None,
+                 high_probability: Optional[float] = ALERT_ON_HIGH_PROBABILITY,
+                 volume_spike: Optional[float] = ALERT_ON_VOLUME_SPIKE,
+                 dedupe_window: float = ALERT_DEDUPE_WINDOW):
+        """
+        Args:
+            sinks: Objects with a send(alert) method
+            high_probability: Alert when probability_score exceeds this (None disables)
+            volume_spike: Alert when volume exceeds this multiple of its
+                          average (None disables)
+            dedupe_window: Seconds during which a repeat of the same alert
+                           type for the same symbol is suppressed
+        """
+        self.sinks = list(sinks or [])
+        self.high_probability = high_probability
+        self.volume_spike = volume_spike
+        self.dedupe_window = dedupe_window
+        self.stats = {'sent': 0, 'suppressed': 0}
+
+        self._last_sent = {}  # (type, symbol) -> time.monotonic()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+
+    @classmethod
+    def from_config(cls) -> 'AlertEngine':
+        """Engine with the sinks enabled in config.py"""
+        sinks = []
+        if ENABLE_CONSOLE_ALERTS:
+            sinks.append(ConsoleSink())
+        if ENABLE_FILE_ALERTS:
+            sinks.append(FileSink(ALERT_FILE_PATH))
+        if ALERT_WEBHOOK_URL:
+            sinks.append(WebhookSink(ALERT_WEBHOOK_URL, ALERT_WEBHOOK_TIMEOUT))
+        return cls(sinks)
+
+    def evaluate(self, analysis: Dict) -> List[Dict]:
+        """
+        Check one scored symbol against the alert thresholds
+
+        Args:
+            analysis: Result of PreMoverDetector.analyze_stock
+
+        Returns:
+            Alerts sent (duplicates inside the window are left out)
+        """
+        alerts = []
+        base = {
+            'symbol': analysis['symbol'],
+            'price': analysis['current_price'],
+            'probability_score': analysis['probability_score']
+        }
+
+        if self.high_probability is not None and analysis['probability_score'] > self.high_probability:
+            alerts.append(dict(base, type='high_probability'))
+
+        volume_ratio = 1 + analysis['volume_change_pct'] / 100
+        if self.volume_spike is not None and volume_ratio > self.volume_spike:
+            alerts.append(dict(base, type='volume_spike', volume_ratio=round(volume_ratio, 2)))
+
+        return [alert for alert in alerts if self.notify(alert)]
+
+    def notify(self, alert: Dict) -> bool:
+        """
+        De-duplicate and queue an alert for delivery
+
+        Args:
+            alert: Dictionary with at least 'type' and 'symbol'
+
+        Returns:
+            False if an identical alert went out within the window
+        """
+        key = (alert['type'], alert['symbol'])
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_sent.get(key)
+            if last is not None and now - last < self.dedupe_window:
+                self.stats['suppressed'] += 1
+                ALERTS.inc(type=alert['type'], outcome='suppressed')
+                return False
+            self._last_sent[key] = now
+            self.stats['sent'] += 1
+
+        alert.setdefault('timestamp', datetime.now().isoformat())
+        alert.setdefault('message', format_alert(alert))
+        ALERTS.inc(type=alert['type'], outcome='sent')
+
+        if self.sinks:
+            self._ensure_worker()
+            self._queue.put(alert)
+        return True
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until every queued alert has been handed to the sinks"""
+        if self._worker is None:
+            return
+        if timeout is None:
+            self._queue.join()
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._deliver, name='alert-sinks', daemon=True)
+                self._worker.start()
+
+    def _deliver(self):
+        while True:
+            alert = self._queue.get()
+            try:
+                for sink in self.sinks:
+                    try:
+                        sink.send(alert)
+                    except Exception as e:
+                        SINK_FAILURES.inc(sink=sink.name)
+                        logger.warning("Alert sink %s failed for %s: %s", sink.name, alert['symbol'], e)
+            finally:
+                self._queue.task_done()
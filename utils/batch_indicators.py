@@ -0,0 +1,250 @@
+"""
+Batch Indicators
+Computes the TechnicalAnalyzer indicator suite for thousands of symbols at
+once, split across a process pool that reads its inputs from shared memory
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.config import (
+    MOMENTUM_DAYS, VOLUME_LOOKBACK_DAYS, MIN_ACCUMULATION_DAYS,
+    BATCH_INDICATOR_WORKERS, BATCH_INDICATOR_MIN_PARALLEL
+)
+
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# Feature matrix columns; each is what the matching TechnicalAnalyzer
+# method (or PreMoverDetector feature) returns for the last bar
+FEATURES = (
+    'rsi', 'macd', 'macd_signal', 'macd_histogram',
+    'relative_strength', 'price_change', 'volume_ratio',
+    'coiling', 'accumulation', 'breakout', 'pump_and_dump'
+)
+
+# Shared-memory segments a worker process has attached to, by name
+_attached = {}
+
+
+class BatchIndicators:
+    """
+    Indicator feature matrix for a whole universe
+
+    Inputs are stacked into one (field, date, symbol) float64 array in a
+    shared-memory segment; each worker attaches to it by name and writes
+    its block of symbols straight into a shared (symbol, feature) output,
+    so neither bars nor results are pickled. Every block is vectorized
+    across its symbols, so the work splits evenly over cores. Batches
+    smaller than min_parallel are computed in-process, where the pool's
+    start-up cost would dominate.
+    """
+
+    def __init__(self, workers: int = BATCH_INDICATOR_WORKERS,
+                 min_parallel: int = BATCH_INDICATOR_MIN_PARALLEL,
+                 rsi_period: int = 14):
+        """
+        Args:
+            workers: Worker processes (0 = one per CPU core)
+            min_parallel: Symbol count below which no pool is used
+            rsi_period: RSI lookback
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.min_parallel = min_parallel
+        self.params = (rsi_period, MOMENTUM_DAYS, VOLUME_LOOKBACK_DAYS, MIN_ACCUMULATION_DAYS)
+        self._executor = None
+
+    def compute(self, fields: Dict[str, np.ndarray], symbols: List[str]) -> pd.DataFrame:
+        """
+        Compute every feature for every symbol
+
+        Args:
+            fields: 'High'/'Low'/'Close'/'Volume' -> (dates, symbols) arrays,
+                    oldest row first; shorter histories are NaN-padded at the top
+            symbols: Symbol axis of the arrays
+
+        Returns:
+            DataFrame indexed by symbol with one column per feature
+        """
+        n_dates, n_symbols = np.asarray(fields['Close']).shape
+        shape = (len(FIELDS), n_dates, n_symbols)
+
+        if self.workers <= 1 or n_symbols < self.min_parallel:
+            stack = np.full(shape, np.nan)
+            _fill_stack(stack, fields)
+            return pd.DataFrame(compute_block(stack, self.params), index=symbols, columns=FEATURES)
+
+        inputs = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+        outputs = shared_memory.SharedMemory(create=True, size=n_symbols * len(FEATURES) * 8)
+        try:
+            stack = np.ndarray(shape, dtype=np.float64, buffer=inputs.buf)
+            stack[:] = np.nan
+            _fill_stack(stack, fields)
+            del stack
+
+            # A few blocks per worker evens out stragglers
+            bounds = np.linspace(0, n_symbols, min(n_symbols, self.workers * 4) + 1).astype(int)
+            executor = self._pool()
+            futures = [
+                executor.submit(_run_block, inputs.name, shape, outputs.name, start, stop, self.params)
+                for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+            ]
+            for future in futures:
+                future.result()
+
+            result = np.ndarray((n_symbols, len(FEATURES)), dtype=np.float64, buffer=outputs.buf).copy()
+            return pd.DataFrame(result, index=symbols, columns=FEATURES)
+        finally:
+            inputs.close()
+            inputs.unlink()
+            outputs.close()
+            outputs.unlink()
+
+    def compute_frames(self, frames: Dict[str, pd.DataFrame], days: Optional[int] = None) -> pd.DataFrame:
+        """
+        Compute features from per-symbol OHLCV frames (as DataFetcher returns them)
+
+        Args:
+            frames: symbol -> DataFrame
+            days: Keep only the last this many bars of each frame
+
+        Returns:
+            DataFrame indexed by symbol with one column per feature
+        """
+        symbols = list(frames)
+        n_dates = max((len(frame) for frame in frames.values()), default=0)
+        if days is not None:
+            n_dates = min(n_dates, days)
+
+        fields = {name: np.full((n_dates, len(symbols)), np.nan) for name in FIELDS}
+        for j, symbol in enumerate(symbols):
+            frame = frames[symbol].iloc[-n_dates:] if n_dates else frames[symbol].iloc[:0]
+            for name in FIELDS:
+                if name in frame:
+                    fields[name][n_dates - len(frame):, j] = frame[name].to_numpy(dtype=np.float64)
+        return self.compute(fields, symbols)
+
+    def close(self):
+        """Shut the worker pool down"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Kept across calls so repeated batches don't pay process start-up
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+
+def compute_block(stack: np.ndarray, params) -> np.ndarray:
+    """
+    Last-bar features for a block of symbols
+
+    Args:
+        stack: (field, dates, symbols) array in FIELDS order
+        params: (rsi_period, momentum_days, volume_days, accumulation_days)
+
+    Returns:
+        (symbols, features) array in FEATURES order; indicators without
+        enough history get the same defaults as TechnicalAnalyzer
+    """
+    rsi_period, momentum_days, volume_days, accumulation_days = params
+    _, high, low, close, volume = stack
+    n_symbols = close.shape[1]
+    n_valid = np.sum(~np.isnan(close), axis=0)
+    out = np.full((n_symbols, len(FEATURES)), np.nan)
+
+    def last(values, k):
+        return values[-k:] if k <= len(values) else np.full((k, n_symbols), np.nan)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # RSI: simple-average gains and losses over the last rsi_period moves
+        delta = np.diff(last(close, rsi_period + 1), axis=0)
+        gain = np.mean(np.where(delta > 0, delta, 0.0), axis=0)
+        loss = np.mean(np.where(delta < 0, -delta, 0.0), axis=0)
+        rsi = 100 - 100 / (1 + gain / loss)
+        out[:, 0] = np.where(n_valid >= rsi_period + 1, rsi, 50.0)
+
+        # MACD: 12/26 EMAs and a 9 EMA signal, seeded at each symbol's first bar
+        macd = _ema(close, 12) - _ema(close, 26)
+        signal = _ema(macd, 9)
+        out[:, 1] = macd[-1]
+        out[:, 2] = signal[-1]
+        out[:, 3] = macd[-1] - signal[-1]
+
+        latest_close = close[-1]
+        out[:, 4] = np.where(n_valid >= 7, latest_close / last(close, 7)[0], np.nan)
+        out[:, 5] = np.where(n_valid >= momentum_days, latest_close / last(close, momentum_days)[0] - 1, np.nan)
+        prior_volume = last(volume, volume_days)[:-1]
+        out[:, 6] = volume[-1] / (np.nansum(prior_volume, axis=0) / np.sum(~np.isnan(prior_volume), axis=0))
+
+        # Coiling: 5-day range under 5% of the average close
+        coil_range = (np.max(last(high, 5), axis=0) - np.min(last(low, 5), axis=0)) / np.mean(last(close, 5), axis=0)
+        out[:, 7] = (n_valid >= 5) & (coil_range < 0.05)
+
+        # Accumulation: higher lows (within 2%) and rising volume
+        lows = last(low, accumulation_days + 1)
+        higher_lows = np.all(lows[1:] >= lows[:-1] * 0.98, axis=0)
+        rising_volume = volume[-1] > last(volume, accumulation_days + 1)[0]
+        out[:, 8] = (n_valid >= accumulation_days + 1) & higher_lows & rising_volume
+
+        # Breakout: close 2% above the prior 20-day high
+        resistance = np.max(last(high, 21)[:-1], axis=0)
+        out[:, 9] = (n_valid >= 21) & (latest_close > resistance * 1.02)
+
+        # Pump and dump: >50% 10-day swing with volume collapsing
+        swing = (np.max(last(high, 10), axis=0) - np.min(last(low, 10), axis=0)) / np.min(last(low, 10), axis=0)
+        volume_drop = volume[-1] / np.mean(last(volume, 5)[:-1], axis=0)
+        out[:, 10] = (n_valid >= 10) & (swing > 0.5) & (volume_drop < 0.3)
+
+    return out
+
+
+def _ema(values: np.ndarray, span: int) -> np.ndarray:
+    """pandas ewm(span, adjust=False) down each column, skipping leading NaNs"""
+    alpha = 2 / (span + 1)
+    out = np.empty_like(values)
+    current = np.full(values.shape[1], np.nan)
+    for i, row in enumerate(values):
+        current = np.where(np.isnan(current), row, np.where(np.isnan(row), current, current + alpha * (row - current)))
+        out[i] = current
+    return out
+
+
+def _fill_stack(stack: np.ndarray, fields: Dict[str, np.ndarray]):
+    for i, name in enumerate(FIELDS):
+        if fields.get(name) is not None:
+            stack[i] = fields[name]
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to a segment once per worker, dropping segments of earlier batches"""
+    if name not in _attached:
+        for stale in list(_attached):
+            _attached.pop(stale).close()
+        _attached[name] = shared_memory.SharedMemory(name=name)
+    return _attached[name]
+
+
+def _run_block(in_name: str, shape, out_name: str, start: int, stop: int, params):
+    """Worker task: compute symbols [start, stop) from shared inputs into shared outputs"""
+    inputs = _attach(in_name)
+    stack = np.ndarray(shape, dtype=np.float64, buffer=inputs.buf)
+    result = compute_block(stack[:, :, start:stop], params)
+
+    outputs = shared_memory.SharedMemory(name=out_name)
+    try:
+        np.ndarray((shape[2], len(FEATURES)), dtype=np.float64, buffer=outputs.buf)[start:stop] = result
+    finally:
+        outputs.close()
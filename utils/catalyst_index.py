@@ -0,0 +1,280 @@
+"""
+Catalyst Index
+Loads local filings/news dumps into a ticker -> date inverted index and
+scores catalysts with fast rules, leaving only ambiguous cases for the LLM
+"""
+
+import glob
+import gzip
+import json
+import os
+import re
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List
+
+# Filing forms and what they usually mean for a pre-mover
+FORM_WEIGHTS = {
+    'S-1': 10,       # IPO registration
+    'F-1': 10,
+    'SC 13D': 10,    # Activist stake
+    '8-K': 0,        # Scored by item below
+    'S-3': -10,      # Shelf registration (future dilution)
+    '424B5': -15,    # Offering prospectus
+    '424B4': -10,
+    'NT 10-K': -15,  # Late annual report
+    'NT 10-Q': -10,
+}
+
+# 8-K items
+ITEM_WEIGHTS = {
+    '1.01': 15,   # Material definitive agreement
+    '2.01': 10,   # Completed acquisition
+    '2.02': 5,    # Results of operations
+    '3.01': -20,  # Delisting notice
+    '3.02': -10,  # Unregistered equity sale
+    '5.02': -5,   # Officer departure
+    '7.01': 5,    # Reg FD disclosure
+    '8.01': 5,    # Other events
+}
+
+# Headline / text keywords
+KEYWORD_WEIGHTS = [
+    (r'\bfda (approval|approves|approved|clears|clearance)\b', 30),
+    (r'\bbreakthrough therapy\b', 20),
+    (r'\b(topline|positive) (results|data)\b', 15),
+    (r'\b(partnership|collaboration|strategic alliance)\b', 15),
+    (r'\b(contract|award(ed)?|purchase order)\b', 10),
+    (r'\b(to acquire|acquisition of|merger agreement|buyout)\b', 20),
+    (r'\b(beats|tops|exceeds) (estimates|expectations)\b', 15),
+    (r'\braises (guidance|outlook)\b', 15),
+    (r'\b(uplist|uplisting|ipo pricing|prices ipo)\b', 15),
+    (r'\binsider (buying|purchase)\b', 10),
+    (r'\b(public offering|registered direct|at-the-market|dilution)\b', -20),
+    (r'\breverse (stock )?split\b', -15),
+    (r'\b(delisting|delisted|deficiency notice)\b', -20),
+    (r'\b(bankruptcy|chapter 11|going concern)\b', -30),
+    (r'\b(misses|falls short of) (estimates|expectations)\b', -15),
+    (r'\blowers (guidance|outlook)\b', -15),
+    (r'\b(investigation|subpoena|class action)\b', -10),
+    (r'\b(complete response letter|crl|clinical hold)\b', -25),
+]
+_KEYWORD_PATTERNS = [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in KEYWORD_WEIGHTS]
+
+# Form 4 transaction code for an open-market purchase
+INSIDER_PURCHASE_WEIGHT = 10
+
+
+class CatalystIndex:
+    """
+    Inverted index of filings and headlines keyed by ticker and date
+
+    Each feed is a JSONL file of records such as
+        {"ticker": "ABCD", "date": "2025-12-01", "form": "8-K",
+         "items": ["1.01"], "title": "Entry into a Material Definitive Agreement"}
+        {"ticker": "ABCD", "published_at": "2025-12-02T13:05:00Z",
+         "headline": "ABCD announces partnership with ..."}
+    Unknown fields are ignored; gzip-compressed feeds (.jsonl.gz) are supported.
+    """
+
+    def __init__(self, feeds_dir: Optional[str] = None, lookback_days: int = 14,
+                 half_life_days: float = 5, ambiguous_band: float = 10):
+        """
+        Args:
+            feeds_dir: Directory of *.jsonl / *.jsonl.gz feeds to load
+            lookback_days: Days of events considered by score()
+            half_life_days: Recency half-life applied to event weights
+            ambiguous_band: Net rule score (points from neutral) below which
+                            unmatched or conflicting events count as ambiguous
+        """
+        self.lookback_days = lookback_days
+        self.half_life_days = half_life_days
+        self.ambiguous_band = ambiguous_band
+
+        self._dates = {}    # ticker -> sorted list of 'YYYY-MM-DD'
+        self._events = {}   # ticker -> events aligned with _dates
+        self._dirty = set()
+
+        if feeds_dir and os.path.isdir(feeds_dir):
+            self.load_dir(feeds_dir)
+
+    def load_dir(self, feeds_dir: str) -> int:
+        """Load every feed in a directory, returning the number of records indexed"""
+        paths = sorted(glob.glob(os.path.join(feeds_dir, '*.jsonl')) +
+                       glob.glob(os.path.join(feeds_dir, '*.jsonl.gz')))
+        return sum(self.load_jsonl(path) for path in paths)
+
+    def load_jsonl(self, path: str) -> int:
+        """Load one JSONL feed, returning the number of records indexed"""
+        opener = gzip.open if path.endswith('.gz') else open
+        count = 0
+        with opener(path, 'rt') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if self.add(record):
+                    count += 1
+        return count
+
+    def add(self, record: Dict) -> bool:
+        """
+        Index one filing or headline record
+
+        Returns:
+            True if the record had a ticker and a date
+        """
+        tickers = record.get('ticker') or record.get('symbol') or record.get('tickers')
+        date = _parse_date(record.get('date') or record.get('filed_at') or
+                           record.get('published_at') or record.get('datetime'))
+        if not tickers or not date:
+            return False
+
+        event = {
+            'date': date,
+            'form': str(record.get('form') or record.get('form_type') or '').upper(),
+            'items': [str(item) for item in record.get('items', [])],
+            'text': record.get('headline') or record.get('title') or record.get('summary') or '',
+            'transaction_code': record.get('transaction_code')
+        }
+
+        for ticker in ([tickers] if isinstance(tickers, str) else tickers):
+            ticker = ticker.upper()
+            self._dates.setdefault(ticker, []).append(date)
+            self._events.setdefault(ticker, []).append(event)
+            self._dirty.add(ticker)
+        return True
+
+    def _sort(self, ticker: str):
+        """Sort a ticker's postings by date after appends"""
+        order = sorted(range(len(self._dates[ticker])), key=self._dates[ticker].__getitem__)
+        self._dates[ticker] = [self._dates[ticker][i] for i in order]
+        self._events[ticker] = [self._events[ticker][i] for i in order]
+        self._dirty.discard(ticker)
+
+    def lookup(self, symbol: str, as_of: Optional[str] = None, days: Optional[int] = None) -> List[Dict]:
+        """
+        Events for a symbol in the window (as_of - days, as_of]
+
+        Args:
+            symbol: Stock ticker symbol
+            as_of: Window end date (YYYY-MM-DD), default today
+            days: Window length, default lookback_days
+        """
+        symbol = symbol.upper()
+        if symbol not in self._dates:
+            return []
+        if symbol in self._dirty:
+            self._sort(symbol)
+
+        end = as_of or datetime.now().strftime('%Y-%m-%d')
+        start = (datetime.strptime(end, '%Y-%m-%d') - timedelta(days=days or self.lookback_days)).strftime('%Y-%m-%d')
+
+        dates = self._dates[symbol]
+        return self._events[symbol][bisect_right(dates, start):bisect_right(dates, end)]
+
+    def score(self, symbol: str, as_of: Optional[str] = None) -> Dict:
+        """
+        Rule-based catalyst score for a symbol
+
+        Returns:
+            Dictionary with score (0-100), catalysts, confidence, the number
+            of events seen, whether the case is ambiguous and the raw
+            headlines (context for an LLM follow-up)
+        """
+        as_of = as_of or datetime.now().strftime('%Y-%m-%d')
+        events = self.lookup(symbol, as_of)
+        if not events:
+            return {'score': 50, 'catalysts': [], 'confidence': 'low', 'events': 0,
+                    'ambiguous': False, 'context': []}
+
+        as_of_dt = datetime.strptime(as_of, '%Y-%m-%d')
+        positive = negative = 0.0
+        catalysts = []
+        unmatched = 0
+
+        for event in events:
+            age = (as_of_dt - datetime.strptime(event['date'], '%Y-%m-%d')).days
+            decay = 0.5 ** (age / self.half_life_days)
+
+            weight, reasons = _event_weight(event)
+            if not reasons:
+                unmatched += 1
+                continue
+
+            if weight >= 0:
+                positive += weight * decay
+            else:
+                negative += -weight * decay
+            catalysts.extend(f"{reason} ({event['date']})" for reason in reasons)
+
+        net = positive - negative
+        conflicting = positive >= self.ambiguous_band and negative >= self.ambiguous_band
+        weak = abs(net) < self.ambiguous_band
+
+        if abs(net) >= 2 * self.ambiguous_band and not conflicting:
+            confidence = 'high'
+        elif abs(net) >= self.ambiguous_band:
+            confidence = 'medium'
+        else:
+            confidence = 'low'
+
+        return {
+            'score': round(max(0.0, min(100.0, 50 + net)), 1),
+            'catalysts': catalysts,
+            'confidence': confidence,
+            'events': len(events),
+            'ambiguous': conflicting or (weak and unmatched > 0),
+            'context': [' '.join(part for part in (e['date'], e['form'], e['text']) if part) for e in events]
+        }
+
+    @property
+    def tickers(self) -> int:
+        """Number of tickers with at least one event"""
+        return len(self._dates)
+
+
+def _event_weight(event: Dict):
+    """Sum rule weights for one event, returning (weight, matched reasons)"""
+    weight = 0
+    reasons = []
+
+    form = event['form']
+    if form in FORM_WEIGHTS and FORM_WEIGHTS[form]:
+        weight += FORM_WEIGHTS[form]
+        reasons.append(f"{form} filing")
+
+    for item in event['items']:
+        if item in ITEM_WEIGHTS:
+            weight += ITEM_WEIGHTS[item]
+            reasons.append(f"{form or '8-K'} item {item}")
+
+    if form == '4' and str(event.get('transaction_code', '')).upper() == 'P':
+        weight += INSIDER_PURCHASE_WEIGHT
+        reasons.append("Insider open-market purchase")
+
+    text = event['text']
+    if text:
+        for pattern, keyword_weight in _KEYWORD_PATTERNS:
+            if pattern.search(text):
+                weight += keyword_weight
+                reasons.append(text[:120])
+                break
+
+    return weight, reasons
+
+
+def _parse_date(value) -> Optional[str]:
+    """Normalize ISO timestamps / YYYYMMDD strings to YYYY-MM-DD"""
+    if not value:
+        return None
+    value = str(value)
+    if re.match(r'^\d{4}-\d{2}-\d{2}', value):
+        return value[:10]
+    if re.match(r'^\d{8}$', value):
+        return f"{value[:4]}-{value[4:6]}-{value[6:]}"
+    return None
@@ -0,0 +1,106 @@
+"""
+Scan Checkpoint
+Periodically persists per-symbol analyses so a crashed scan can resume
+where it stopped instead of refetching and rescoring everything
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.serialization import json_default
+
+
+class ScanCheckpoint:
+    """
+    Completed per-symbol analyses for one scan date
+
+    Every analyzed symbol is recorded, including those below the threshold
+    (stored as their analysis) and those skipped by red flags or short
+    history (stored as None), so a resumed scan can rebuild the full
+    candidate list. Fetch failures are not recorded and are retried on resume.
+    """
+
+    def __init__(self, path: str, scan_date: Optional[str] = None,
+                 save_every: int = 100, save_interval: float = 30):
+        """
+        Args:
+            path: Checkpoint JSON file
+            scan_date: Date the checkpoint belongs to (default today)
+            save_every: Save after this many newly recorded symbols
+            save_interval: ...or after this many seconds, whichever comes first
+        """
+        self.path = path
+        self.scan_date = scan_date or datetime.now().strftime('%Y-%m-%d')
+        self.save_every = save_every
+        self.save_interval = save_interval
+
+        self.analyses = {}  # symbol -> analysis dict or None
+        self.resumed = 0
+        self._unsaved = 0
+        self._last_save = time.time()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str, scan_date: Optional[str] = None, **kwargs) -> 'ScanCheckpoint':
+        """
+        Load a checkpoint for scan_date, or start an empty one if the file
+        is missing, unreadable or from another day
+        """
+        checkpoint = cls(path, scan_date, **kwargs)
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return checkpoint
+
+        if state.get('scan_date') == checkpoint.scan_date:
+            checkpoint.analyses = state.get('analyses', {})
+            checkpoint.resumed = len(checkpoint.analyses)
+        return checkpoint
+
+    def is_done(self, symbol: str) -> bool:
+        return symbol in self.analyses
+
+    def remaining(self, symbols: List[str]) -> List[str]:
+        """Symbols not yet analyzed, in their original order"""
+        return [symbol for symbol in symbols if symbol not in self.analyses]
+
+    def record(self, symbol: str, analysis: Optional[Dict]):
+        """Record a finished symbol, saving if enough work has accumulated"""
+        with self._lock:
+            self.analyses[symbol] = analysis
+            self._unsaved += 1
+            due = (self._unsaved >= self.save_every or
+                   time.time() - self._last_save >= self.save_interval)
+        if due:
+            self.save()
+
+    def candidates(self, min_score: float) -> List[Dict]:
+        """Recorded analyses at or above min_score"""
+        return [
+            analysis for analysis in self.analyses.values()
+            if analysis and analysis['probability_score'] >= min_score
+        ]
+
+    def save(self):
+        """Atomically write the checkpoint"""
+        with self._lock:
+            state = {
+                'scan_date': self.scan_date,
+                'saved_at': datetime.now().isoformat(),
+                'analyses': dict(self.analyses)
+            }
+            self._unsaved = 0
+            self._last_save = time.time()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, default=json_default)
+        os.replace(tmp_path, self.path)
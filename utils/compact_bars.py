@@ -0,0 +1,91 @@
+"""
+Compact Bars
+Column-pruned, downcast OHLCV storage for in-memory caches
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# OHLCV: the scoring layers, the panel loader and split checks read these
+COMPACT_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class CompactBars:
+    """
+    Daily bars held as contiguous numpy arrays
+
+    Compared with the DataFrame returned by ticker.history this drops the
+    Dividends and Stock Splits columns, stores prices as float32 (so
+    missing bars stay NaN), volume as int64 with a boolean mask marking
+    missing values (float32 is only exact up to 2**24 shares) and dates as
+    naive datetime64[D] instead of a tz-aware index.
+    """
+
+    __slots__ = ('dates', 'open', 'high', 'low', 'close', 'volume', 'volume_missing')
+
+    def __init__(self, dates: np.ndarray, open: np.ndarray, high: np.ndarray, low: np.ndarray,
+                 close: np.ndarray, volume: np.ndarray, volume_missing: np.ndarray):
+        self.dates = dates
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.volume_missing = volume_missing
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> 'CompactBars':
+        """
+        Build compact bars from a yfinance-style DataFrame
+
+        Args:
+            data: DataFrame with Open, High, Low, Close and Volume columns
+
+        Returns:
+            CompactBars instance
+        """
+        index = pd.DatetimeIndex(data.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+
+        volume = data['Volume'].to_numpy(dtype=np.float64)
+        volume_missing = np.isnan(volume)
+
+        return cls(
+            dates=np.ascontiguousarray(index.values.astype('datetime64[D]')),
+            open=np.ascontiguousarray(data['Open'].to_numpy(dtype=np.float32)),
+            high=np.ascontiguousarray(data['High'].to_numpy(dtype=np.float32)),
+            low=np.ascontiguousarray(data['Low'].to_numpy(dtype=np.float32)),
+            close=np.ascontiguousarray(data['Close'].to_numpy(dtype=np.float32)),
+            volume=np.ascontiguousarray(np.where(volume_missing, 0, np.round(volume)).astype(np.int64)),
+            volume_missing=np.ascontiguousarray(volume_missing)
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Expand back into a DataFrame the scoring layers can consume"""
+        volume = self.volume
+        if self.volume_missing.any():
+            volume = np.where(self.volume_missing, np.nan, volume)
+
+        return pd.DataFrame(
+            {'Open': self.open, 'High': self.high, 'Low': self.low, 'Close': self.close,
+             'Volume': volume},
+            index=pd.DatetimeIndex(self.dates.astype('datetime64[ns]'))
+        )
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def nbytes(self) -> int:
+        """Total bytes held by the bar arrays"""
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+
+def frame_nbytes(data: Optional[pd.DataFrame]) -> int:
+    """Bytes held by a DataFrame including its index"""
+    if data is None:
+        return 0
+    return int(data.memory_usage(index=True, deep=True).sum())
@@ -0,0 +1,237 @@
+"""
+Corporate Action Detector
+Spots splits, dividends and unadjusted price discontinuities so only the
+affected symbol's cached and stored history is invalidated or re-adjusted
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Overnight gaps this close to a common split ratio are checked against the split column
+SPLIT_RATIOS = [1.5, 2, 3, 4, 5, 8, 10, 15, 20, 25, 30, 50, 100]
+SPLIT_RATIO_TOLERANCE = 0.03
+
+
+class CorporateActionDetector:
+    """
+    Detect corporate actions in freshly fetched or stored bars
+
+    Events already acted on are remembered per symbol in a JSON file, so a
+    new process does not re-announce (and re-invalidate state for) every
+    split and dividend still inside the fetch window.
+    """
+
+    def __init__(self, min_gap: float = 0.3, path: Optional[str] = None):
+        """
+        Args:
+            min_gap: Minimum overnight gap (fraction) before checking it
+                     against split ratios
+            path: File the handled events are persisted to (None = memory only)
+        """
+        self.min_gap = min_gap
+        self.path = path
+        self.handled = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.handled = {symbol: {tuple(key) for key in keys} for symbol, keys in json.load(f).items()}
+
+    def detect(self, symbol: str, data: pd.DataFrame) -> List[Dict]:
+        """
+        Find corporate actions in a price frame
+
+        Overnight gaps near a split ratio only count as unadjusted splits
+        when the Stock Splits column reports that split on the same day;
+        a real pump or collapse of the same size is left alone.
+
+        Args:
+            symbol: Stock ticker symbol
+            data: yfinance-style DataFrame (Stock Splits / Dividends optional)
+
+        Returns:
+            List of event dictionaries with symbol, date, type and ratio/amount
+            (handled or not; see unhandled())
+        """
+        events = []
+
+        if 'Stock Splits' in data.columns:
+            splits = data['Stock Splits']
+            for date, ratio in splits[splits.fillna(0) != 0].items():
+                events.append({'symbol': symbol, 'date': _day(date), 'type': 'split', 'ratio': float(ratio)})
+
+        if 'Dividends' in data.columns:
+            dividends = data['Dividends']
+            for date, amount in dividends[dividends.fillna(0) != 0].items():
+                events.append({'symbol': symbol, 'date': _day(date), 'type': 'dividend', 'amount': float(amount)})
+
+        split_ratios = {e['date']: e['ratio'] for e in events if e['type'] == 'split'}
+        for gap in self.find_discontinuities(symbol, data):
+            reported = split_ratios.get(gap['date'])
+            if reported and abs(reported / gap['ratio'] - 1) <= SPLIT_RATIO_TOLERANCE:
+                events.append(gap)
+            else:
+                logger.debug("%s: %.2fx overnight gap on %s has no matching split; history left as is",
+                             symbol, 1 / gap['ratio'], gap['date'], extra={'symbol': symbol})
+
+        return events
+
+    def unhandled(self, symbol: str, events: List[Dict]) -> List[Dict]:
+        """
+        Events not acted on before, marking them handled (and persisting that)
+
+        Args:
+            symbol: Stock ticker symbol
+            events: Output of detect()
+
+        Returns:
+            The new events
+        """
+        with self._lock:
+            seen = self.handled.setdefault(symbol, set())
+            new_events = [e for e in events if (e['date'], e['type']) not in seen]
+            if new_events:
+                seen.update((e['date'], e['type']) for e in new_events)
+                self._save()
+        return new_events
+
+    def find_discontinuities(self, symbol: str, data: pd.DataFrame) -> List[Dict]:
+        """
+        Find overnight gaps whose size matches a split ratio (candidates
+        only: see detect())
+
+        Returns:
+            'discontinuity' events; ratio is the factor earlier prices must be
+            divided by to line up with later ones
+        """
+        if len(data) < 2 or 'Open' not in data.columns:
+            return []
+
+        prev_close = data['Close'].to_numpy(dtype=np.float64)[:-1]
+        opens = data['Open'].to_numpy(dtype=np.float64)[1:]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = prev_close / opens
+
+        events = []
+        for i in np.flatnonzero(np.abs(ratio - 1) > self.min_gap):
+            split_ratio = _nearest_split_ratio(ratio[i])
+            if split_ratio is not None:
+                events.append({
+                    'symbol': symbol,
+                    'date': _day(data.index[i + 1]),
+                    'type': 'discontinuity',
+                    'ratio': split_ratio
+                })
+
+        return events
+
+    def forget(self, symbol: str):
+        """Forget handled events for a symbol"""
+        with self._lock:
+            if self.handled.pop(symbol, None) is not None:
+                self._save()
+
+    def _save(self):
+        """Persist the handled events (caller holds the lock)"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({symbol: sorted(keys) for symbol, keys in self.handled.items()}, f)
+        os.replace(tmp_path, self.path)
+
+
+def adjust_for_discontinuities(data: pd.DataFrame, events: List[Dict]) -> pd.DataFrame:
+    """
+    Back-adjust bars before each discontinuity so the series is continuous
+
+    Args:
+        data: Price frame containing the discontinuities
+        events: Events from CorporateActionDetector.detect (only
+                'discontinuity' events are applied)
+
+    Returns:
+        Adjusted copy of data
+    """
+    adjusted = data.copy()
+    days = pd.DatetimeIndex(adjusted.index).strftime('%Y-%m-%d')
+
+    for event in events:
+        if event['type'] != 'discontinuity':
+            continue
+        before = days < event['date']
+        for column in ('Open', 'High', 'Low', 'Close'):
+            if column in adjusted.columns:
+                adjusted[column] = adjusted[column].astype(np.float64)
+                adjusted.loc[before, column] = adjusted.loc[before, column] / event['ratio']
+        if 'Volume' in adjusted.columns:
+            adjusted['Volume'] = adjusted['Volume'].astype(np.float64)
+            adjusted.loc[before, 'Volume'] = adjusted.loc[before, 'Volume'] * event['ratio']
+
+    return adjusted
+
+
+def history_adjustment(stored: pd.DataFrame, fresh: pd.DataFrame, tolerance: float = 1e-3,
+                       sample: int = 5) -> Optional[float]:
+    """
+    Compare stored bars with freshly fetched bars at the start of their overlap
+
+    yfinance back-adjusts history after splits and dividends, so if the
+    stored closes no longer match fresh ones the stored history is stale.
+    The earliest overlapping bars are used because they sit on the same
+    side of any recent corporate action as the older stored history.
+
+    Returns:
+        Price factor to multiply older stored prices by, or None if they still match
+    """
+    stored_close = pd.Series(stored['Close'].to_numpy(dtype=np.float64), index=_naive_days(stored.index))
+    fresh_close = pd.Series(fresh['Close'].to_numpy(dtype=np.float64), index=_naive_days(fresh.index))
+
+    overlap = stored_close.index.intersection(fresh_close.index)[:sample]
+    if not len(overlap):
+        return None
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factors = fresh_close.loc[overlap].to_numpy() / stored_close.loc[overlap].to_numpy()
+    factors = factors[np.isfinite(factors)]
+    if not len(factors):
+        return None
+
+    factor = float(np.median(factors))
+    return None if abs(factor - 1) <= tolerance else factor
+
+
+def _nearest_split_ratio(ratio: float) -> Optional[float]:
+    """Map a price ratio to a split (ratio > 1) or reverse split (ratio < 1)"""
+    if not np.isfinite(ratio) or ratio <= 0:
+        return None
+    magnitude = ratio if ratio >= 1 else 1 / ratio
+    for candidate in SPLIT_RATIOS:
+        if abs(magnitude / candidate - 1) <= SPLIT_RATIO_TOLERANCE:
+            return candidate if ratio >= 1 else 1 / candidate
+    return None
+
+
+def _naive_days(index: pd.Index) -> pd.DatetimeIndex:
+    """Normalize a (possibly tz-aware) index to naive midnight dates"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+def _day(timestamp) -> str:
+    """ISO date string for a timestamp"""
+    return pd.Timestamp(timestamp).strftime('%Y-%m-%d')
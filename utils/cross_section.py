@@ -0,0 +1,74 @@
+"""
+Cross-Sectional Scoring
+Percentile ranks of each feature across the day's universe, turned into
+layer scores with the same weights as the absolute step scores
+"""
+
+from typing import Dict
+
+import numpy as np
+
+# Layer -> (feature, weight); mirrors the +40/+30/+30 momentum and
+# +50/+50 volume steps, with each step's pass/fail replaced by a percentile
+LAYER_FEATURES = {
+    'momentum_score': (('price_change', 0.4), ('relative_strength', 0.3), ('is_coiling', 0.3)),
+    'volume_score': (('volume_ratio', 0.5), ('is_accumulating', 0.5)),
+}
+
+RANK_FEATURES = tuple(name for layer in LAYER_FEATURES.values() for name, _ in layer)
+
+
+def percentile_rank(values, axis: int = -1) -> np.ndarray:
+    """
+    Mid-rank percentile (0-100) of every value among the others along axis
+
+    Ties share the average of their ranks, so a boolean feature scores
+    the held/not-held groups at the middle of their ranges. NaNs are left
+    out of the ranking and stay NaN.
+
+    Args:
+        values: Array of any shape
+        axis: Axis holding the cross-section (symbols)
+
+    Returns:
+        Float array shaped like values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    moved = np.moveaxis(values, axis, -1)
+    rows = moved.reshape(-1, moved.shape[-1])
+    out = np.full(rows.shape, np.nan)
+
+    for i, row in enumerate(rows):
+        valid = ~np.isnan(row)
+        n = valid.sum()
+        if n == 0:
+            continue
+        ordered = np.sort(row[valid])
+        below = np.searchsorted(ordered, row[valid], side='left')
+        through = np.searchsorted(ordered, row[valid], side='right')
+        # (below + through - 1) / 2 is the 0-based mid-rank
+        out[i, valid] = 100.0 * (below + through - 1) / 2 / max(n - 1, 1) if n > 1 else 50.0
+
+    return np.moveaxis(out.reshape(moved.shape), -1, axis)
+
+
+def cross_sectional_scores(features: Dict[str, np.ndarray], axis: int = -1) -> Dict[str, np.ndarray]:
+    """
+    Percentile-based momentum and volume layer scores
+
+    Args:
+        features: RANK_FEATURES -> arrays with symbols along axis (booleans allowed)
+        axis: Axis holding the cross-section
+
+    Returns:
+        Dictionary with momentum_score and volume_score arrays (0-100);
+        a symbol missing a feature gets that feature's median (50)
+    """
+    scores = {}
+    for layer, weighted in LAYER_FEATURES.items():
+        total = 0.0
+        for name, weight in weighted:
+            ranks = percentile_rank(np.asarray(features[name], dtype=np.float64), axis=axis)
+            total = total + weight * np.where(np.isnan(ranks), 50.0, ranks)
+        scores[layer] = total
+    return scores
@@ -6,15 +6,77 @@ Handles fetching stock market data from various sources
 import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Optional, List, Iterator, Tuple
+import heapq
+import threading
 import time
 
+import numpy as np
+
+from config.config import (
+    CACHE_EXPIRY, FETCH_MAX_CONCURRENCY, FETCH_MIN_CONCURRENCY,
+    FETCH_MAX_RETRIES, FETCH_BACKOFF_SECONDS, FETCH_EMPTY_WINDOW, FETCH_EMPTY_BURST,
+    PANEL_MAX_AGE_DAYS, COMPACT_CACHE, CORPORATE_ACTION_MIN_GAP, CORPORATE_ACTIONS_PATH
+)
+from utils.rate_limiter import AdaptiveRateLimiter
+from utils.price_panel import PricePanel
+from utils.compact_bars import CompactBars, frame_nbytes
+from utils.corporate_actions import CorporateActionDetector, adjust_for_discontinuities
+from utils.logger import setup_logger
+from utils.metrics import REGISTRY
+
+logger = setup_logger(__name__)
+
+FETCH_REQUESTS = REGISTRY.counter('fetch_requests_total', 'Bar fetches by source and outcome', ['source', 'status'])
+FETCH_SECONDS = REGISTRY.histogram('fetch_seconds', 'Yahoo history request latency')
+CACHE_LOOKUPS = REGISTRY.counter('fetch_cache_lookups_total', 'Bar cache lookups by result', ['result'])
+FETCH_CONCURRENCY = REGISTRY.gauge('fetch_concurrency_limit', 'Adaptive rate limiter concurrency limit')
+
+# Fetch outcomes reported by DataFetcher._fetch
+FETCH_OK = 'ok'
+FETCH_EMPTY = 'empty'
+FETCH_THROTTLED = 'throttled'
+FETCH_ERROR = 'error'
+
+THROTTLE_MARKERS = ('too many requests', 'rate limit', '429')
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """Check whether an exception looks like a Yahoo rate-limit response"""
+    if 'ratelimit' in type(error).__name__.lower():
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in THROTTLE_MARKERS)
+
+
 class DataFetcher:
     """Fetch stock market data from Yahoo Finance and other sources"""
     
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 panel: Optional[PricePanel] = None, compact: bool = COMPACT_CACHE):
+        """
+        Args:
+            rate_limiter: Shared rate limiter (one is created if not given)
+            panel: Optional read-only shared price panel to serve bars from
+            compact: Cache pruned, downcast CompactBars instead of DataFrames
+        """
         self.cache = {}
         self.cache_expiry = {}
+        self._cache_lock = threading.Lock()
+        self.panel = panel
+        self.compact = compact
+        self.corporate_actions = CorporateActionDetector(min_gap=CORPORATE_ACTION_MIN_GAP,
+                                                         path=CORPORATE_ACTIONS_PATH)
+        self.corporate_action_listeners = []
+        self._recent_empty = deque(maxlen=FETCH_EMPTY_WINDOW)
+        self._recent_lock = threading.Lock()
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(
+            max_concurrency=FETCH_MAX_CONCURRENCY,
+            min_concurrency=FETCH_MIN_CONCURRENCY,
+            backoff_seconds=FETCH_BACKOFF_SECONDS
+        )
     
     def get_stock_data(self, symbol: str, days: int = 30) -> Optional[pd.DataFrame]:
         """
@@ -27,12 +89,87 @@ class DataFetcher:
         Returns:
             DataFrame with OHLCV data or None if fetch fails
         """
+        data, _ = self._fetch(symbol, days)
+        return data
+    
+    def iter_stock_data(self, symbols: List[str], days: int = 30,
+                        max_retries: int = FETCH_MAX_RETRIES) -> Iterator[Tuple[str, Optional[pd.DataFrame], str]]:
+        """
+        Fetch many symbols concurrently under the adaptive rate limiter
+        
+        Symbols that fail with a throttling response or an error are
+        requeued (up to max_retries times, each after a growing backoff)
+        instead of being dropped. An
+        empty frame is final (delisted or not yet trading) unless it is part
+        of a burst of empty frames, which Yahoo serves when throttling.
+        Results are yielded as soon as each symbol completes.
+        
+        Args:
+            symbols: Stock ticker symbols
+            days: Number of days of historical data
+            max_retries: Retries per symbol before giving up
+        
+        Yields:
+            (symbol, data, status) tuples; data is None unless status is 'ok'
+        """
+        attempts = {}
+        delayed = []  # (ready time, symbol) heap of retries waiting out their backoff
+        
+        with ThreadPoolExecutor(max_workers=self.rate_limiter.max_concurrency) as executor:
+            pending = {executor.submit(self._fetch, symbol, days): symbol for symbol in symbols}
+            
+            while pending or delayed:
+                now = time.time()
+                while delayed and delayed[0][0] <= now:
+                    _, symbol = heapq.heappop(delayed)
+                    pending[executor.submit(self._fetch, symbol, days)] = symbol
+                
+                timeout = delayed[0][0] - now if delayed else None
+                if not pending:
+                    time.sleep(max(timeout, 0))
+                    continue
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    symbol = pending.pop(future)
+                    data, status = future.result()
+                    
+                    retryable = status in (FETCH_THROTTLED, FETCH_ERROR)
+                    if retryable and attempts.get(symbol, 0) < max_retries:
+                        # Back off before retrying so a flapping endpoint
+                        # isn't hammered at full speed
+                        attempts[symbol] = attempts.get(symbol, 0) + 1
+                        ready = time.time() + self.rate_limiter.backoff_seconds * attempts[symbol]
+                        heapq.heappush(delayed, (ready, symbol))
+                        continue
+                    
+                    yield symbol, data, status
+    
+    def _fetch(self, symbol: str, days: int) -> Tuple[Optional[pd.DataFrame], str]:
+        """Fetch one symbol through the shared panel, cache and rate limiter"""
+        # Serve from the shared panel when the loader has kept it current
+        if self.panel is not None:
+            data = self._from_panel(symbol, days)
+            if data is not None:
+                FETCH_REQUESTS.inc(source='panel', status=FETCH_OK)
+                return data, FETCH_OK
+        
         # Check cache
         cache_key = f"{symbol}_{days}"
-        if cache_key in self.cache:
+        cached = self.cache.get(cache_key)
+        if cached is not None:
             if time.time() < self.cache_expiry.get(cache_key, 0):
-                return self.cache[cache_key]
+                CACHE_LOOKUPS.inc(result='hit')
+                FETCH_REQUESTS.inc(source='cache', status=FETCH_OK)
+                if isinstance(cached, CompactBars):
+                    return cached.to_frame(), FETCH_OK
+                return cached, FETCH_OK
         
+        CACHE_LOOKUPS.inc(result='miss')
+        
+        self.rate_limiter.acquire()
+        status = FETCH_ERROR
+        started = time.perf_counter()
         try:
             # Fetch data from Yahoo Finance
             end_date = datetime.now()
@@ -41,18 +178,106 @@ class DataFetcher:
             ticker = yf.Ticker(symbol)
             data = ticker.history(start=start_date, end=end_date)
             
+            burst = self._empty_burst(data.empty)
             if data.empty:
-                return None
+                # Yahoo answers throttled requests with empty frames too, but
+                # a lone empty frame is just a ticker with no bars
+                status = FETCH_THROTTLED if burst else FETCH_EMPTY
+                return None, status
+            
+            # Splits/dividends make every other cached window for this
+            # symbol stale; check before compaction prunes those columns
+            data = self._handle_corporate_actions(symbol, data)
             
             # Cache the data
-            self.cache[cache_key] = data
-            self.cache_expiry[cache_key] = time.time() + 300  # 5 min cache
+            entry = CompactBars.from_frame(data) if self.compact else data
+            with self._cache_lock:
+                self.cache[cache_key] = entry
+                self.cache_expiry[cache_key] = time.time() + CACHE_EXPIRY
+            if self.compact:
+                data = entry.to_frame()
             
-            return data
+            status = FETCH_OK
+            return data, status
             
         except Exception as e:
-            print(f"Error fetching data for {symbol}: {e}")
+            if is_throttle_error(e):
+                status = FETCH_THROTTLED
+            logger.warning("Error fetching data for %s: %s", symbol, e,
+                           extra={'symbol': symbol, 'status': status})
+            return None, status
+        
+        finally:
+            # Failed and throttled requests count toward latency too
+            FETCH_SECONDS.observe(time.perf_counter() - started)
+            self.rate_limiter.release(throttled=status == FETCH_THROTTLED,
+                                      failed=status in (FETCH_ERROR, FETCH_EMPTY))
+            FETCH_REQUESTS.inc(source='yahoo', status=status)
+            FETCH_CONCURRENCY.set(self.rate_limiter.limit)
+    
+    def _empty_burst(self, empty: bool) -> bool:
+        """
+        Record whether a Yahoo response was empty and report whether it is
+        part of a burst of empty responses across symbols (throttling)
+        rather than one delisted or newly listed ticker
+        """
+        with self._recent_lock:
+            self._recent_empty.append(empty)
+            return empty and sum(self._recent_empty) >= FETCH_EMPTY_BURST * FETCH_EMPTY_WINDOW
+    
+    def add_corporate_action_listener(self, listener):
+        """
+        Register a callback invoked as listener(symbol, events) when a
+        split, dividend or price discontinuity is detected in fresh bars
+        """
+        self.corporate_action_listeners.append(listener)
+    
+    def invalidate(self, symbol: str):
+        """Drop every cached window for one symbol, keeping all others warm"""
+        with self._cache_lock:
+            for cache_key in [key for key in self.cache if key.rsplit('_', 1)[0] == symbol]:
+                self.cache.pop(cache_key, None)
+                self.cache_expiry.pop(cache_key, None)
+    
+    def _handle_corporate_actions(self, symbol: str, data: pd.DataFrame) -> pd.DataFrame:
+        """Repair confirmed unadjusted splits; invalidate stale state for new corporate actions"""
+        events = self.corporate_actions.detect(symbol, data)
+        if not events:
+            return data
+        
+        # Yahoo occasionally serves a split unadjusted; repair the series on
+        # every fetch of it, not only the first one that noticed
+        if any(event['type'] == 'discontinuity' for event in events):
+            data = adjust_for_discontinuities(data, events)
+        
+        new_events = self.corporate_actions.unhandled(symbol, events)
+        if new_events:
+            self.invalidate(symbol)
+            for listener in self.corporate_action_listeners:
+                listener(symbol, new_events)
+        
+        return data
+    
+    def cache_nbytes(self) -> int:
+        """Approximate bytes held by cached bars"""
+        with self._cache_lock:
+            entries = list(self.cache.values())
+        return sum(
+            entry.nbytes if isinstance(entry, CompactBars) else frame_nbytes(entry)
+            for entry in entries
+        )
+    
+    def _from_panel(self, symbol: str, days: int) -> Optional[pd.DataFrame]:
+        """Read a symbol's bars from the shared panel if it is fresh enough"""
+        last_date = self.panel.last_date
+        if last_date is None:
+            return None
+        
+        oldest_allowed = np.datetime64(datetime.now().date()) - np.timedelta64(PANEL_MAX_AGE_DAYS, 'D')
+        if last_date < oldest_allowed:
             return None
+        
+        return self.panel.get_frame(symbol, days=days + 10)
     
     def get_current_price(self, symbol: str) -> Optional[float]:
         """Get current stock price"""
@@ -65,6 +290,58 @@ class DataFetcher:
             pass
         return None
     
+    def get_current_prices(self, symbols: List[str], chunk_size: int = 200,
+                           timeout: float = 10) -> Dict[str, float]:
+        """
+        Get current prices for many symbols with one download per chunk
+    
+        Args:
+            symbols: Stock ticker symbols
+            chunk_size: Symbols per Yahoo request
+            timeout: Seconds allowed per request
+    
+        Returns:
+            Dictionary of symbol -> last traded price (symbols without a
+            quote are left out)
+        """
+        prices = {}
+        for start in range(0, len(symbols), chunk_size):
+            chunk = list(symbols[start:start + chunk_size])
+    
+            self.rate_limiter.acquire()
+            status = FETCH_ERROR
+            started = time.perf_counter()
+            try:
+                data = yf.download(chunk, period='1d', interval='1m', progress=False,
+                                   threads=True, group_by='column', auto_adjust=False,
+                                   timeout=timeout)
+                burst = self._empty_burst(data.empty)
+                if data.empty:
+                    status = FETCH_THROTTLED if burst else FETCH_EMPTY
+                    continue
+    
+                close = data['Close']
+                if isinstance(close, pd.Series):
+                    close = close.to_frame(chunk[0])
+                last = close.ffill().iloc[-1]
+                prices.update({symbol: float(price) for symbol, price in last.items() if pd.notna(price)})
+                status = FETCH_OK
+    
+            except Exception as e:
+                if is_throttle_error(e):
+                    status = FETCH_THROTTLED
+                logger.warning("Error fetching quotes for %d symbols: %s", len(chunk), e,
+                               extra={'status': status})
+    
+            finally:
+                FETCH_SECONDS.observe(time.perf_counter() - started)
+                self.rate_limiter.release(throttled=status == FETCH_THROTTLED,
+                                      failed=status in (FETCH_ERROR, FETCH_EMPTY))
+                FETCH_REQUESTS.inc(source='quotes', status=status)
+                FETCH_CONCURRENCY.set(self.rate_limiter.limit)
+    
+        return prices
+    
     def get_sector_performance(self) -> dict:
         """Get sector performance data"""
         # Simplified - in production would fetch real sector data
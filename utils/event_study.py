@@ -0,0 +1,165 @@
+"""
+Event Study Engine
+Labels every large move in the local bar store and measures how well the
+detector's scores anticipated it
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from utils.signal_matrix import backtest_scores, layer_scores, shift
+
+
+class EventStudy:
+    """
+    Vectorized event study over (date x symbol) price matrices
+
+    An event is any day a symbol closes more than move_threshold above the
+    previous close. For each event the detector's scores on the preceding
+    lookback_days trading days are examined; a score at or above
+    score_threshold counts as a signal. All events are joined against the
+    score matrix with shifted boolean masks, so the cost is a few array
+    passes per lookback day regardless of the number of events.
+    """
+
+    def __init__(self, move_threshold: float = 0.10, lookback_days: int = 5,
+                 score_threshold: float = 60, scorer: str = 'technical'):
+        """
+        Args:
+            move_threshold: Minimum one-day return that labels an event
+            lookback_days: Trading days before an event searched for signals
+            score_threshold: Minimum score to count as a signal
+            scorer: 'technical' (detector layers) or 'simple' (backtest score)
+        """
+        self.move_threshold = move_threshold
+        self.lookback_days = lookback_days
+        self.score_threshold = score_threshold
+        self.scorer = scorer
+        # Arrays from the last run(), reused by event_table()
+        self._last_run = None
+
+    def label_events(self, close: np.ndarray) -> np.ndarray:
+        """
+        Label event days
+
+        Args:
+            close: (dates, symbols) closing prices
+
+        Returns:
+            Boolean (dates, symbols) event mask
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = close / shift(close, 1) - 1
+        return returns >= self.move_threshold
+
+    def score(self, fields: Dict[str, np.ndarray]) -> np.ndarray:
+        """Compute the detector score for every cell"""
+        if self.scorer == 'simple':
+            return backtest_scores(fields['Close'], fields['Volume'])
+        return layer_scores(fields['High'], fields['Low'], fields['Close'], fields['Volume'])['technical_score']
+
+    def run(self, dates, symbols: List[str], fields: Dict[str, np.ndarray]) -> Dict:
+        """
+        Run the study
+
+        Args:
+            dates: Date axis of the matrices
+            symbols: Symbol axis of the matrices
+            fields: 'High'/'Low'/'Close'/'Volume' -> (dates, symbols) arrays
+
+        Returns:
+            Report with hit rate, lead times, false positives and the mean
+            score profile over the days before events
+        """
+        close = np.asarray(fields['Close'], dtype=np.float64)
+        events = self.label_events(close)
+        scores = self.score(fields)
+        signals = scores >= self.score_threshold  # NaN compares False
+
+        n = self.lookback_days
+
+        # Earliest signal lag before each event (0 = not detected)
+        lead = np.zeros(close.shape, dtype=np.int16)
+        score_profile = {}
+        for k in range(1, n + 1):
+            lagged_signal = _shift_bool(signals, k)
+            lead = np.where(events & lagged_signal, k, lead)
+
+            lagged_scores = shift(scores, k)[events]
+            score_profile[f"t-{k}"] = _round(np.nanmean(lagged_scores)) if np.isfinite(lagged_scores).any() else None
+
+        # Signals followed by an event within the lookback window
+        followed = np.zeros(close.shape, dtype=bool)
+        for k in range(1, n + 1):
+            followed |= _shift_bool(events, -k)
+
+        event_rows, event_cols = np.nonzero(events)
+        event_leads = lead[event_rows, event_cols]
+        detected = event_leads > 0
+
+        n_signals = int(signals.sum())
+        true_positives = int((signals & followed).sum())
+
+        self._last_run = {'fields': fields, 'close': close, 'events': events, 'lead': lead}
+
+        return {
+            'symbols': len(symbols),
+            'trading_days': len(dates),
+            'move_threshold': self.move_threshold,
+            'lookback_days': n,
+            'score_threshold': self.score_threshold,
+            'events': int(len(event_rows)),
+            'events_detected': int(detected.sum()),
+            'hit_rate': _round(detected.mean() * 100) if len(event_rows) else None,
+            'mean_lead_days': _round(event_leads[detected].mean()) if detected.any() else None,
+            'lead_time_histogram': {f"t-{k}": int((event_leads == k).sum()) for k in range(1, n + 1)},
+            'signals': n_signals,
+            'false_positives': n_signals - true_positives,
+            'precision': _round(true_positives / n_signals * 100) if n_signals else None,
+            'score_profile': score_profile
+        }
+
+    def event_table(self, dates, symbols: List[str], fields: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """
+        One row per labelled event with its move and earliest signal lag
+
+        Reuses the event and lead arrays from the last run() over the same
+        fields, so the scores are only computed once per study.
+
+        Returns:
+            DataFrame with date, symbol, move_pct and lead_days columns
+        """
+        if self._last_run is None or self._last_run['fields'] is not fields:
+            self.run(dates, symbols, fields)
+        close = self._last_run['close']
+        events = self._last_run['events']
+        lead = self._last_run['lead']
+
+        rows, cols = np.nonzero(events)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            moves = close[rows, cols] / close[rows - 1, cols] - 1
+
+        return pd.DataFrame({
+            'date': pd.DatetimeIndex(np.asarray(dates)[rows]),
+            'symbol': np.asarray(symbols, dtype=object)[cols],
+            'move_pct': np.round(moves * 100, 1),
+            'lead_days': lead[rows, cols]
+        })
+
+
+def _shift_bool(mask: np.ndarray, periods: int) -> np.ndarray:
+    """Shift a boolean mask by rows (positive = from the past), False-filled"""
+    out = np.zeros(mask.shape, dtype=bool)
+    if periods > 0:
+        out[periods:] = mask[:-periods]
+    elif periods < 0:
+        out[:periods] = mask[-periods:]
+    else:
+        out[:] = mask
+    return out
+
+
+def _round(value) -> float:
+    return round(float(value), 2)
@@ -0,0 +1,226 @@
+"""
+Exit Rules
+Vectorized stop-loss, partial-sell, profit-target and trailing-stop
+evaluation shared by the portfolio simulator and the live position monitor
+"""
+
+from typing import Dict
+
+import numpy as np
+
+from config.config import (
+    MICROCAP_PROFIT_TARGET, LARGECAP_PROFIT_TARGET, STOP_LOSS_PERCENT,
+    PARTIAL_SELL_AT, PARTIAL_SELL_FRACTION, TRAIL_STOP_ACTIVATION, TRAIL_STOP_DISTANCE
+)
+
+# Exit reason codes
+EXIT_OPEN = 0
+EXIT_STOP = 1
+EXIT_TRAIL = 2
+EXIT_TARGET = 3
+EXIT_TIME = 4
+
+EXIT_REASONS = {
+    EXIT_OPEN: 'open',
+    EXIT_STOP: 'stop_loss',
+    EXIT_TRAIL: 'trailing_stop',
+    EXIT_TARGET: 'profit_target',
+    EXIT_TIME: 'max_hold'
+}
+
+
+class ExitRules:
+    """Exit rule parameters (fractions of the entry price)"""
+
+    def __init__(self, microcap_target: float = MICROCAP_PROFIT_TARGET,
+                 largecap_target: float = LARGECAP_PROFIT_TARGET,
+                 stop_loss: float = STOP_LOSS_PERCENT,
+                 partial_at: float = PARTIAL_SELL_AT,
+                 partial_fraction: float = PARTIAL_SELL_FRACTION,
+                 trail_activation: float = TRAIL_STOP_ACTIVATION,
+                 trail_distance: float = TRAIL_STOP_DISTANCE):
+        self.microcap_target = microcap_target
+        self.largecap_target = largecap_target
+        self.stop_loss = stop_loss
+        self.partial_at = partial_at
+        self.partial_fraction = partial_fraction
+        self.trail_activation = trail_activation
+        self.trail_distance = trail_distance
+
+    def profit_targets(self, is_microcap) -> np.ndarray:
+        """Per-position profit target fraction"""
+        return np.where(np.asarray(is_microcap, dtype=bool), self.microcap_target, self.largecap_target)
+
+    def levels(self, entry, peak, profit_target) -> Dict[str, np.ndarray]:
+        """
+        Price levels implied by the rules
+
+        Args:
+            entry: (P,) entry prices
+            peak: (P,) or (P, H) highest price seen so far
+            profit_target: Scalar or (P,) target fractions
+
+        Returns:
+            stop (fixed or trailing, whichever is higher) and whether the
+            trailing stop is the binding one, shaped like peak; partial and
+            target levels, shaped (P,)
+        """
+        entry = np.asarray(entry, dtype=np.float64)
+        peak = np.asarray(peak, dtype=np.float64)
+
+        # Stops follow the peak's shape; partial and target are per position
+        per_bar = entry[:, None] if peak.ndim == 2 else entry
+        stop_level = per_bar * (1 - self.stop_loss)
+        trail_active = peak >= per_bar * (1 + self.trail_activation)
+        trail_level = np.where(trail_active, peak * (1 - self.trail_distance), -np.inf)
+
+        return {
+            'stop': np.maximum(stop_level, trail_level),
+            'trailing': trail_level > stop_level,
+            'partial': entry * (1 + self.partial_at),
+            'target': entry * (1 + np.asarray(profit_target, dtype=np.float64))
+        }
+
+
+def evaluate_exits(entry, high, low, close, rules: ExitRules, profit_target,
+                   open_=None) -> Dict[str, np.ndarray]:
+    """
+    Walk every position's forward bars at once and find its exits
+
+    Each row is one position; column 0 is the first bar after entry. Bars
+    past the end of the data are NaN. Rules are checked on every bar:
+    stop (the higher of the fixed stop and, once activated, the trailing
+    stop off the previous bars' peak), then the partial sell and the
+    profit target. If a bar touches both a stop and a target, the stop is
+    assumed to have come first. Gaps through a level fill at the open.
+
+    Args:
+        entry: (P,) entry prices
+        high, low, close: (P, H) forward bars
+        rules: Exit rule parameters
+        profit_target: Scalar or (P,) target fractions
+        open_: Optional (P, H) opens for gap fills
+
+    Returns:
+        Dictionary of (P,) arrays: exit_bar, exit_price, exit_reason,
+        partial_bar (-1 if none), partial_price and gross_return
+    """
+    entry = np.asarray(entry, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    n_positions, horizon = close.shape
+    rows = np.arange(n_positions)
+
+    # Peak through the previous bar (the entry price before the first bar)
+    running_peak = np.maximum.accumulate(np.where(np.isnan(high), -np.inf, high), axis=1)
+    peak = np.concatenate([entry[:, None], np.maximum(running_peak[:, :-1], entry[:, None])], axis=1)
+
+    levels = rules.levels(entry, peak, profit_target)
+    with np.errstate(invalid='ignore'):
+        stop_hit = low <= levels['stop']
+        target_hit = high >= levels['target'][:, None]
+        partial_hit = high >= levels['partial'][:, None]
+
+    stop_bar = _first(stop_hit)
+    target_bar = _first(target_hit)
+
+    # Positions with no rule exit leave at the last available close
+    valid = ~np.isnan(close)
+    last_bar = np.where(valid.any(axis=1), horizon - 1 - np.argmax(valid[:, ::-1], axis=1), 0)
+
+    exit_bar = np.minimum(np.minimum(stop_bar, target_bar), last_bar)
+    exit_reason = np.where(
+        stop_bar <= np.minimum(target_bar, last_bar),
+        np.where(levels['trailing'][rows, np.minimum(stop_bar, horizon - 1)], EXIT_TRAIL, EXIT_STOP),
+        np.where(target_bar <= last_bar, EXIT_TARGET,
+                 np.where(valid[:, -1], EXIT_TIME, EXIT_OPEN))
+    )
+
+    stop_price = levels['stop'][rows, exit_bar]
+    target_price = levels['target']
+    if open_ is not None:
+        bar_open = np.asarray(open_, dtype=np.float64)[rows, exit_bar]
+        stop_price = np.where(bar_open < stop_price, bar_open, stop_price)
+        target_price = np.where(bar_open > target_price, bar_open, target_price)
+
+    exit_price = np.select(
+        [(exit_reason == EXIT_STOP) | (exit_reason == EXIT_TRAIL), exit_reason == EXIT_TARGET],
+        [stop_price, target_price],
+        close[rows, exit_bar]
+    )
+
+    # Partial sell: before the final exit, or on the target bar when its level is lower
+    partial_bar = _first(partial_hit)
+    took_partial = (partial_bar < exit_bar) | (
+        (partial_bar == exit_bar) & (exit_reason == EXIT_TARGET) & (levels['partial'] < levels['target'])
+    )
+    partial_price = levels['partial']
+    if open_ is not None:
+        partial_open = np.asarray(open_, dtype=np.float64)[rows, np.minimum(partial_bar, horizon - 1)]
+        partial_price = np.where(partial_open > partial_price, partial_open, partial_price)
+
+    fraction = np.where(took_partial, rules.partial_fraction, 0.0)
+    gross_return = (fraction * partial_price + (1 - fraction) * exit_price) / entry - 1
+
+    return {
+        'exit_bar': exit_bar,
+        'exit_price': exit_price,
+        'exit_reason': exit_reason,
+        'partial_bar': np.where(took_partial, partial_bar, -1),
+        'partial_price': np.where(took_partial, partial_price, np.nan),
+        'gross_return': gross_return
+    }
+
+
+def _first(mask: np.ndarray) -> np.ndarray:
+    """Column of the first True in each row (the row length if none)"""
+    return np.where(mask.any(axis=1), np.argmax(mask, axis=1), mask.shape[1])
+
+
+def check_triggers(entry, peak, price, rules: ExitRules, profit_target,
+                   partial_taken=None) -> Dict[str, np.ndarray]:
+    """
+    Evaluate the rules for every open position at one price update
+
+    The live counterpart of evaluate_exits: instead of walking forward
+    bars, each position is checked once against its latest price, with the
+    peak (including this price) carried between updates by the caller.
+
+    Args:
+        entry: (P,) entry prices
+        peak: (P,) highest price seen before this update
+        price: (P,) latest prices (NaN when no quote arrived)
+        rules: Exit rule parameters
+        profit_target: Scalar or (P,) target fractions
+        partial_taken: Optional (P,) flags for positions already partly sold
+
+    Returns:
+        Dictionary of (P,) arrays: peak (updated), stop, reason (EXIT_STOP,
+        EXIT_TRAIL, EXIT_TARGET or EXIT_OPEN for no exit) and partial (True
+        where the partial-sell level was reached for the first time)
+    """
+    entry = np.asarray(entry, dtype=np.float64)
+    price = np.asarray(price, dtype=np.float64)
+    peak = np.fmax(np.asarray(peak, dtype=np.float64), price)
+    if partial_taken is None:
+        partial_taken = np.zeros(len(entry), dtype=bool)
+
+    levels = rules.levels(entry, peak, profit_target)
+    with np.errstate(invalid='ignore'):
+        stop_hit = price <= levels['stop']
+        target_hit = price >= levels['target']
+        partial_hit = price >= levels['partial']
+
+    reason = np.select(
+        [stop_hit & levels['trailing'], stop_hit, target_hit],
+        [EXIT_TRAIL, EXIT_STOP, EXIT_TARGET],
+        EXIT_OPEN
+    )
+
+    return {
+        'peak': peak,
+        'stop': levels['stop'],
+        'reason': reason,
+        'partial': partial_hit & ~np.asarray(partial_taken, dtype=bool) & (reason == EXIT_OPEN)
+    }
@@ -0,0 +1,337 @@
+"""
+Incremental Feature State
+Per-symbol rolling state so daily re-scoring only processes new bars
+"""
+
+import json
+import os
+from collections import deque
+from typing import Optional, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from config.config import MOMENTUM_DAYS, VOLUME_LOOKBACK_DAYS, MIN_ACCUMULATION_DAYS
+
+# Window lengths used by the scoring layers
+COIL_WINDOW = 5
+LIQUIDITY_WINDOW = 5
+PUMP_WINDOW = 10
+RS_DAYS = 7
+BUFFER_SIZE = max(VOLUME_LOOKBACK_DAYS, MOMENTUM_DAYS, RS_DAYS, PUMP_WINDOW, MIN_ACCUMULATION_DAYS + 1)
+
+# Relative tolerance when checking stored bars against fresh data
+PRICE_TOLERANCE = 1e-4
+
+EMA_SPANS = {'ema_12': 12, 'ema_26': 26}
+SIGNAL_SPAN = 9
+
+
+class RollingExtreme:
+    """O(1) amortized sliding-window max (or min) using a monotonic deque"""
+
+    def __init__(self, window: int, use_max: bool = True, items: Optional[List] = None):
+        self.window = window
+        self.use_max = use_max
+        self.items = deque(tuple(item) for item in (items or []))
+
+    def push(self, index: int, value: float):
+        """Add the bar at position index and evict bars outside the window (NaN is skipped, like pandas)"""
+        if not np.isnan(value):
+            if self.use_max:
+                while self.items and self.items[-1][1] <= value:
+                    self.items.pop()
+            else:
+                while self.items and self.items[-1][1] >= value:
+                    self.items.pop()
+            self.items.append((index, value))
+
+        while self.items and self.items[0][0] <= index - self.window:
+            self.items.popleft()
+
+    @property
+    def value(self) -> float:
+        return self.items[0][1] if self.items else float('nan')
+
+
+class SymbolFeatureState:
+    """
+    Rolling feature state for one symbol
+
+    Holds the last BUFFER_SIZE bars, running volume/close sums, sliding
+    extrema for the coil and pump-and-dump windows, MACD EWMs and the last
+    layer scores. Pushing a bar costs O(1) regardless of lookback length.
+
+    Missing (NaN) values are left out of the sums and extrema and counted
+    separately, so window means skip them the way pandas' mean() does in
+    the full recompute instead of going NaN for the rest of the window.
+    """
+
+    def __init__(self):
+        self.n_bars = 0
+        self.last_date = None
+        self.closes = deque(maxlen=BUFFER_SIZE)
+        self.lows = deque(maxlen=BUFFER_SIZE)
+        self.volumes = deque(maxlen=BUFFER_SIZE)
+
+        self.sums = {'volume_lookback': 0.0, 'volume_5': 0.0, 'close_5': 0.0}
+        self.counts = {name: 0 for name in self.sums}  # Non-NaN values in each window
+        self.extremes = {
+            'high_5': RollingExtreme(COIL_WINDOW, use_max=True),
+            'low_5': RollingExtreme(COIL_WINDOW, use_max=False),
+            'high_10': RollingExtreme(PUMP_WINDOW, use_max=True),
+            'low_10': RollingExtreme(PUMP_WINDOW, use_max=False),
+        }
+        self.emas = {}
+        self.scores = {}
+
+    def push(self, date: str, high: float, low: float, close: float, volume: float):
+        """Roll the state forward by one bar"""
+        self._roll_sum('volume_lookback', self.volumes, VOLUME_LOOKBACK_DAYS, volume)
+        self._roll_sum('volume_5', self.volumes, LIQUIDITY_WINDOW, volume)
+        self._roll_sum('close_5', self.closes, COIL_WINDOW, close)
+
+        index = self.n_bars
+        self.extremes['high_5'].push(index, high)
+        self.extremes['low_5'].push(index, low)
+        self.extremes['high_10'].push(index, high)
+        self.extremes['low_10'].push(index, low)
+
+        for name, span in EMA_SPANS.items():
+            self.emas[name] = _ema_step(self.emas.get(name), close, span)
+        macd = self.emas['ema_12'] - self.emas['ema_26']
+        self.emas['macd_signal'] = _ema_step(self.emas.get('macd_signal'), macd, SIGNAL_SPAN)
+
+        self.closes.append(close)
+        self.lows.append(low)
+        self.volumes.append(volume)
+        self.n_bars += 1
+        self.last_date = date
+
+    def _windows(self) -> List:
+        """(sum name, bar buffer, window length) for each running sum"""
+        return [
+            ('volume_lookback', self.volumes, VOLUME_LOOKBACK_DAYS),
+            ('volume_5', self.volumes, LIQUIDITY_WINDOW),
+            ('close_5', self.closes, COIL_WINDOW),
+        ]
+
+    def _roll_sum(self, name: str, buffer: deque, window: int, value: float):
+        """Add value to a running window sum, dropping the bar that falls out (NaN counts as absent)"""
+        if len(buffer) >= window and not np.isnan(buffer[-window]):
+            self.sums[name] -= buffer[-window]
+            self.counts[name] -= 1
+        if not np.isnan(value):
+            self.sums[name] += value
+            self.counts[name] += 1
+
+    def _window_mean(self, name: str, exclude_last: Optional[float] = None) -> float:
+        """Mean of a window's non-NaN values, optionally without the current bar's value"""
+        total, count = self.sums[name], self.counts[name]
+        if exclude_last is not None and not np.isnan(exclude_last):
+            total, count = total - exclude_last, count - 1
+        return total / count if count > 0 else float('nan')
+
+    def features(self) -> Dict:
+        """
+        Derive the scoring features from the current state
+
+        Returns:
+            Feature dictionary matching PreMoverDetector._compute_features
+        """
+        n = self.n_bars
+        closes, lows, volumes = self.closes, self.lows, self.volumes
+        current_volume = volumes[-1]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_volume = self._window_mean('volume_lookback', exclude_last=current_volume)
+
+            is_coiling = False
+            if n >= COIL_WINDOW:
+                price_range = self.extremes['high_5'].value - self.extremes['low_5'].value
+                is_coiling = bool(price_range / np.float64(self._window_mean('close_5')) < 0.05)
+
+            is_accumulating = False
+            if n >= MIN_ACCUMULATION_DAYS + 1:
+                recent_lows = list(lows)[-(MIN_ACCUMULATION_DAYS + 1):]
+                higher_lows = all(recent_lows[i] >= recent_lows[i - 1] * 0.98 for i in range(1, len(recent_lows)))
+                is_accumulating = higher_lows and volumes[-1] > volumes[-(MIN_ACCUMULATION_DAYS + 1)]
+
+            is_pump_and_dump = False
+            if n >= PUMP_WINDOW:
+                low_10 = self.extremes['low_10'].value
+                volatility = (self.extremes['high_10'].value - low_10) / np.float64(low_10)
+                volume_drop = np.float64(current_volume) / self._window_mean('volume_5', exclude_last=current_volume)
+                is_pump_and_dump = bool(volatility > 0.5 and volume_drop < 0.3)
+
+        return {
+            'current_price': closes[-1],
+            'price_change': closes[-1] / closes[-MOMENTUM_DAYS] - 1,
+            'relative_strength': 1.0 + (closes[-1] / closes[-RS_DAYS] - 1),
+            'is_coiling': is_coiling,
+            'current_volume': current_volume,
+            'avg_volume': avg_volume,
+            'is_accumulating': is_accumulating,
+            'avg_volume_5': self._window_mean('volume_5'),
+            'is_pump_and_dump': is_pump_and_dump,
+            'macd': self.emas['ema_12'] - self.emas['ema_26'],
+            'macd_signal': self.emas['macd_signal'],
+        }
+
+    def to_dict(self) -> Dict:
+        """Serialize for the on-disk store"""
+        return {
+            'n_bars': self.n_bars,
+            'last_date': self.last_date,
+            'closes': list(self.closes),
+            'lows': list(self.lows),
+            'volumes': list(self.volumes),
+            'sums': self.sums,
+            'counts': self.counts,
+            'extremes': {name: list(ext.items) for name, ext in self.extremes.items()},
+            'emas': self.emas,
+            'scores': self.scores
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict) -> 'SymbolFeatureState':
+        """Restore a state saved with to_dict"""
+        state = cls()
+        state.n_bars = payload['n_bars']
+        state.last_date = payload['last_date']
+        state.closes.extend(payload['closes'])
+        state.lows.extend(payload['lows'])
+        state.volumes.extend(payload['volumes'])
+        if 'counts' in payload:
+            state.sums, state.counts = payload['sums'], payload['counts']
+        else:
+            # Saved before NaN-aware sums; rebuild them from the bar buffers
+            for name, buffer, window in state._windows():
+                values = np.asarray(list(buffer)[-window:], dtype=np.float64)
+                state.sums[name] = float(np.nansum(values))
+                state.counts[name] = int(np.sum(~np.isnan(values)))
+        for name, ext in state.extremes.items():
+            state.extremes[name] = RollingExtreme(ext.window, ext.use_max, payload['extremes'][name])
+        state.emas = payload['emas']
+        state.scores = payload.get('scores', {})
+        return state
+
+
+class FeatureStateStore:
+    """
+    Persisted per-symbol feature states
+
+    update() rolls a symbol's state forward over the bars that arrived since
+    it was saved. If the stored last bar is missing from the new data (a gap)
+    or its close no longer matches (split/dividend back-adjustment), the
+    state is rebuilt from the full frame instead.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: JSON file to load from and save to (in-memory only if None)
+        """
+        self.path = path
+        self.states = {}
+        self.stats = {'rolled': 0, 'rebuilt': 0}
+
+        if path and os.path.exists(path):
+            with open(path) as f:
+                payload = json.load(f)
+            self.states = {symbol: SymbolFeatureState.from_dict(state) for symbol, state in payload.items()}
+
+    def update(self, symbol: str, data: pd.DataFrame) -> Dict:
+        """
+        Bring a symbol's state up to date with data and return its features
+
+        Args:
+            symbol: Stock ticker symbol
+            data: Price data ending at the latest bar
+
+        Returns:
+            Feature dictionary
+        """
+        closes = data['Close'].to_numpy(dtype=np.float64)
+
+        # Only the tail can contain the stored last bar, so only parse that
+        offset = max(len(data) - BUFFER_SIZE, 0)
+        tail_dates = _date_strings(data.index[offset:])
+
+        state = self.states.get(symbol)
+        start = self._resume_position(state, tail_dates, closes[offset:]) if state is not None else None
+
+        if start is None:
+            state = SymbolFeatureState()
+            start = 0
+            dates = _date_strings(data.index[:offset]) + tail_dates
+            self.stats['rebuilt'] += 1
+        else:
+            start += offset
+            dates = [None] * offset + tail_dates
+            self.stats['rolled'] += 1
+
+        highs = data['High'].to_numpy(dtype=np.float64)
+        lows = data['Low'].to_numpy(dtype=np.float64)
+        volumes = data['Volume'].to_numpy(dtype=np.float64)
+        for i in range(start, len(data)):
+            state.push(dates[i], float(highs[i]), float(lows[i]), float(closes[i]), float(volumes[i]))
+
+        self.states[symbol] = state
+        return state.features()
+
+    def _resume_position(self, state: SymbolFeatureState, dates: List[str], closes: np.ndarray) -> Optional[int]:
+        """Index (within dates) of the first new bar, or None if the state must be rebuilt"""
+        try:
+            pos = dates.index(state.last_date)
+        except ValueError:
+            return None  # Gap: stored bar no longer in the window
+
+        stored_close = state.closes[-1]
+        if not (np.isfinite(stored_close) and np.isfinite(closes[pos])):
+            return None  # Can't tell whether history was re-adjusted; NaN compares as a match
+        if abs(closes[pos] - stored_close) > PRICE_TOLERANCE * abs(stored_close):
+            return None  # History was re-adjusted (split/dividend) or bar revised
+
+        return pos + 1
+
+    def record_scores(self, symbol: str, scores: Dict):
+        """Remember the latest layer scores for a symbol"""
+        if symbol in self.states:
+            self.states[symbol].scores = scores
+
+    def last_scores(self, symbol: str) -> Dict:
+        """Layer scores from the previous scan"""
+        state = self.states.get(symbol)
+        return state.scores if state else {}
+
+    def invalidate(self, symbol: str):
+        """Drop a symbol's state so the next update rebuilds it"""
+        self.states.pop(symbol, None)
+
+    def save(self):
+        """Persist all states"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({symbol: state.to_dict() for symbol, state in self.states.items()}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _ema_step(previous: Optional[float], value: float, span: int) -> float:
+    """One step of an adjust=False exponential moving average (a NaN bar leaves it unchanged)"""
+    if previous is None or np.isnan(previous):
+        return value
+    if np.isnan(value):
+        return previous
+    alpha = 2.0 / (span + 1)
+    return alpha * value + (1 - alpha) * previous
+
+
+def _date_strings(index: pd.Index) -> List[str]:
+    """ISO date strings for a (possibly tz-aware) DatetimeIndex"""
+    return [ts.strftime('%Y-%m-%d') for ts in pd.DatetimeIndex(index)]
@@ -0,0 +1,118 @@
+"""
+Multi-Horizon Momentum
+Returns and volume ratios over many lookbacks from prefix sums, so each
+extra horizon costs O(1) per symbol
+"""
+
+from typing import Dict, Iterable
+
+import numpy as np
+
+from config.config import MOMENTUM_DAYS, MIN_PRICE_CHANGE, MOMENTUM_HORIZONS, VOLUME_LOOKBACK_DAYS
+
+MAX_HORIZON = 20
+
+
+class HorizonFeatures:
+    """
+    Prefix sums over one symbol's bars (1-D) or a whole panel (2-D, dates x symbols)
+
+    The cumulative log return up to bar i is log(close[i]) - log(close[0]),
+    so an h-bar return is a difference of two prefix values; volume
+    averages come from a cumulative volume sum and a running count of bars
+    with volume. Building the sums is one O(n) pass, and every
+    (horizon, bar) lookup after that is O(1).
+    """
+
+    def __init__(self, close, volume, horizons: Iterable[int] = MOMENTUM_HORIZONS,
+                 baseline: int = VOLUME_LOOKBACK_DAYS):
+        """
+        Args:
+            close: Closing prices, oldest first
+            volume: Volumes aligned with close
+            horizons: Lookbacks in bars (1 to 20)
+            baseline: Bars before each horizon window that its volume is compared against
+        """
+        self.horizons = sorted(set(int(h) for h in horizons))
+        if not self.horizons or self.horizons[0] < 1 or self.horizons[-1] > MAX_HORIZON:
+            raise ValueError(f"Horizons must be between 1 and {MAX_HORIZON} bars: {list(horizons)}")
+        self.baseline = baseline
+
+        close = np.asarray(close, dtype=np.float64)
+        volume = np.asarray(volume, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.log_close = np.log(close)
+
+        # Prefix arrays carry a leading zero row: sum of bars [a, b) = p[b] - p[a]
+        zeros = np.zeros((1,) + volume.shape[1:])
+        valid = ~np.isnan(volume)
+        self.volume_sum = np.concatenate([zeros, np.cumsum(np.where(valid, volume, 0.0), axis=0)])
+        self.volume_count = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+        self.n = close.shape[0]
+
+    def returns(self, horizon: int) -> np.ndarray:
+        """horizon-bar simple return ending at every bar (NaN until enough history)"""
+        out = np.full(self.log_close.shape, np.nan)
+        if horizon < self.n:
+            out[horizon:] = np.expm1(self.log_close[horizon:] - self.log_close[:-horizon])
+        return out
+
+    def volume_ratios(self, horizon: int) -> np.ndarray:
+        """
+        Average volume of the last horizon bars over the average of the
+        baseline bars before them, ending at every bar
+        """
+        end = np.arange(1, self.n + 1)
+        start = end - horizon
+        base_start = np.maximum(start - self.baseline, 0)
+        start = np.maximum(start, 0)
+        window = self._mean(start, end)
+        base = self._mean(base_start, start)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(base > 0, window / base, np.nan)
+
+    def latest(self) -> Dict[str, float]:
+        """
+        Features at the last bar: return_<h>d and volume_ratio_<h>d for
+        every horizon, in O(1) each
+        """
+        features = {}
+        last = self.n - 1
+        for h in self.horizons:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                features[f'return_{h}d'] = np.expm1(self.log_close[last] - self.log_close[last - h]) \
+                    if h <= last else np.nan
+
+                start = max(self.n - h, 0)
+                base_start = max(start - self.baseline, 0)
+                base = self._mean(base_start, start)
+                features[f'volume_ratio_{h}d'] = np.where(base > 0, self._mean(start, self.n) / base, np.nan)[()] \
+                    if start > 0 else np.nan
+        return features
+
+    def _mean(self, start, end):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (self.volume_sum[end] - self.volume_sum[start]) / (self.volume_count[end] - self.volume_count[start])
+
+
+def horizon_threshold(horizon: int) -> float:
+    """
+    MIN_PRICE_CHANGE is set for MOMENTUM_DAYS; other horizons scale it by
+    sqrt(horizon / MOMENTUM_DAYS), the way volatility scales with time
+    """
+    return MIN_PRICE_CHANGE * np.sqrt(horizon / MOMENTUM_DAYS)
+
+
+def horizon_breadth(returns: Dict[int, np.ndarray]):
+    """
+    Fraction of horizons whose return clears its scaled threshold
+
+    Args:
+        returns: horizon -> return (scalar or array)
+
+    Returns:
+        Value(s) in [0, 1]; NaN returns count as not clearing
+    """
+    with np.errstate(invalid='ignore'):
+        hits = [np.asarray(r) >= horizon_threshold(h) for h, r in returns.items()]
+    return np.mean(hits, axis=0)
@@ -0,0 +1,210 @@
+"""
+Compiled Kernels
+O(n) rolling extrema, streaks and rolling means over whole arrays.
+Uses Numba when installed and falls back to pure NumPy otherwise.
+"""
+
+import numpy as np
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    numba = None
+    NUMBA_AVAILABLE = False
+
+# All kernels work along axis 0 of 1-D (time,) or 2-D (time, symbols)
+# arrays and return NaN (or 0 for streaks) until the window fills. A NaN
+# inside a window makes that window's extreme NaN.
+
+
+# ----------------------------------------------------------------------
+# Pure NumPy implementations
+# ----------------------------------------------------------------------
+
+def _np_rolling_extreme(values: np.ndarray, window: int, use_max: bool) -> np.ndarray:
+    """van Herk / Gil-Werman sliding extreme: O(n) per column, no Python loop over rows"""
+    op = np.maximum if use_max else np.minimum
+    fill = -np.inf if use_max else np.inf
+
+    n = values.shape[0]
+    out = np.full(values.shape, np.nan)
+    if n < window or window < 1:
+        return out
+
+    # Pad to a whole number of blocks
+    n_blocks = -(-n // window)
+    padded = np.full((n_blocks * window,) + values.shape[1:], fill)
+    padded[:n] = values
+    blocks = padded.reshape((n_blocks, window) + values.shape[1:])
+
+    # Running extreme from the start of each block and from its end
+    prefix = op.accumulate(blocks, axis=1).reshape(padded.shape)
+    suffix = np.flip(op.accumulate(np.flip(blocks, axis=1), axis=1), axis=1).reshape(padded.shape)
+
+    # Window [i - w + 1, i] = suffix at its start combined with prefix at its end
+    out[window - 1:] = op(suffix[:n - window + 1], prefix[window - 1:n])
+
+    # np.maximum/minimum propagate NaN only when the block boundary hits it,
+    # so mask windows containing NaN explicitly
+    out[_np_window_has_nan(values, window)] = np.nan
+    return out
+
+
+def _np_window_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Cumulative-sum window totals (values must be finite)"""
+    out = np.full(values.shape, np.nan)
+    csum = np.cumsum(np.concatenate([np.zeros((1,) + values.shape[1:]), values]), axis=0)
+    out[window - 1:] = csum[window:] - csum[:-window]
+    return out
+
+
+def _np_window_has_nan(values: np.ndarray, window: int) -> np.ndarray:
+    return _np_window_sum(np.isnan(values).astype(np.float64), window) > 0
+
+
+def _np_rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    n = values.shape[0]
+    if n < window or window < 1:
+        return np.full(values.shape, np.nan)
+    # Sum with NaN as zero so one gap doesn't poison every later window
+    out = _np_window_sum(np.nan_to_num(values, nan=0.0), window)
+    out[_np_window_has_nan(values, window)] = np.nan
+    return out
+
+
+def _np_ratio_streak(values: np.ndarray, ratio: float) -> np.ndarray:
+    """Length of the run of values[i] >= values[i-1] * ratio ending at each row"""
+    cond = np.zeros(values.shape, dtype=bool)
+    cond[1:] = values[1:] >= values[:-1] * ratio
+    counts = np.cumsum(cond, axis=0)
+    last_reset = np.maximum.accumulate(np.where(cond, 0, counts), axis=0)
+    return (counts - last_reset).astype(np.int64)
+
+
+# ----------------------------------------------------------------------
+# Numba implementations (monotonic deque, one pass per column)
+# ----------------------------------------------------------------------
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True)
+    def _nb_rolling_extreme(values, window, use_max):
+        n, m = values.shape
+        out = np.full((n, m), np.nan)
+        dq = np.empty(n, dtype=np.int64)
+        for j in range(m):
+            head = 0
+            tail = 0
+            last_nan = -1
+            for i in range(n):
+                x = values[i, j]
+                if np.isnan(x):
+                    last_nan = i
+                else:
+                    if use_max:
+                        while tail > head and values[dq[tail - 1], j] <= x:
+                            tail -= 1
+                    else:
+                        while tail > head and values[dq[tail - 1], j] >= x:
+                            tail -= 1
+                    dq[tail] = i
+                    tail += 1
+                while tail > head and dq[head] <= i - window:
+                    head += 1
+                if i >= window - 1 and last_nan <= i - window and tail > head:
+                    out[i, j] = values[dq[head], j]
+        return out
+
+    @numba.njit(cache=True)
+    def _nb_rolling_sum(values, window):
+        n, m = values.shape
+        out = np.full((n, m), np.nan)
+        for j in range(m):
+            total = 0.0
+            last_nan = -1
+            for i in range(n):
+                x = values[i, j]
+                if np.isnan(x):
+                    last_nan = i
+                else:
+                    total += x
+                if i >= window:
+                    y = values[i - window, j]
+                    if not np.isnan(y):
+                        total -= y
+                if i >= window - 1 and last_nan <= i - window:
+                    out[i, j] = total
+        return out
+
+    @numba.njit(cache=True)
+    def _nb_ratio_streak(values, ratio):
+        n, m = values.shape
+        out = np.zeros((n, m), dtype=np.int64)
+        for j in range(m):
+            for i in range(1, n):
+                if values[i, j] >= values[i - 1, j] * ratio:
+                    out[i, j] = out[i - 1, j] + 1
+        return out
+
+
+class Kernels:
+    """Kernel backend selector ('numba', 'numpy' or 'auto')"""
+
+    def __init__(self, backend: str = 'auto'):
+        if backend == 'auto':
+            backend = 'numba' if NUMBA_AVAILABLE else 'numpy'
+        if backend == 'numba' and not NUMBA_AVAILABLE:
+            raise ImportError("numba backend requested but numba is not installed")
+        if backend not in ('numba', 'numpy'):
+            raise ValueError(f"Unknown kernel backend: {backend}")
+        self.backend = backend
+
+    def rolling_max(self, values, window: int) -> np.ndarray:
+        """Trailing window maximum along axis 0"""
+        return self._extreme(values, window, True)
+
+    def rolling_min(self, values, window: int) -> np.ndarray:
+        """Trailing window minimum along axis 0"""
+        return self._extreme(values, window, False)
+
+    def rolling_sum(self, values, window: int) -> np.ndarray:
+        """Trailing window sum along axis 0"""
+        values, squeeze = _as_2d(values)
+        if self.backend == 'numba':
+            out = _nb_rolling_sum(values, window)
+        else:
+            out = _np_rolling_sum(values, window)
+        return out[:, 0] if squeeze else out
+
+    def rolling_mean(self, values, window: int) -> np.ndarray:
+        """Trailing window mean along axis 0"""
+        return self.rolling_sum(values, window) / window
+
+    def ratio_streak(self, values, ratio: float = 1.0) -> np.ndarray:
+        """
+        Consecutive-bar streak length ending at each row, where a bar
+        continues the streak if values[i] >= values[i-1] * ratio
+        (e.g. ratio=0.98 on lows counts "higher lows" within 2%)
+        """
+        values, squeeze = _as_2d(values)
+        if self.backend == 'numba':
+            out = _nb_ratio_streak(values, ratio)
+        else:
+            out = _np_ratio_streak(values, ratio)
+        return out[:, 0] if squeeze else out
+
+    def _extreme(self, values, window: int, use_max: bool) -> np.ndarray:
+        values, squeeze = _as_2d(values)
+        if self.backend == 'numba':
+            out = _nb_rolling_extreme(values, window, use_max)
+        else:
+            out = _np_rolling_extreme(values, window, use_max)
+        return out[:, 0] if squeeze else out
+
+
+def _as_2d(values):
+    """View input as a contiguous float64 (time, columns) array"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        return np.ascontiguousarray(values[:, None]), True
+    return np.ascontiguousarray(values), False
@@ -3,48 +3,191 @@ Logger Utility
 Provides consistent logging across the application
 """
 
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+from collections import Counter
 from datetime import datetime
 
-def setup_logger(name: str, log_file: str = None, level=logging.INFO) -> logging.Logger:
+from config.config import LOG_STRUCTURED, LOG_ASYNC, LOG_SAMPLE_RATE
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'taskName'}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# One background listener per output (console or console + file)
+_listeners = {}
+_listeners_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including extra={...} fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                event[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            event['exc'] = record.exc_text
+        return json.dumps(event, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep every record at INFO and above, and one in every 1/rate DEBUG records
+    per message template
+
+    Dropped records are only counted (by template, so "%s: Below threshold"
+    aggregates across symbols); flush() logs one summary line per template.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.interval = 0 if rate <= 0 else max(1, round(1 / rate))
+        self.seen = Counter()
+        self.dropped = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.interval == 1:
+            return True
+        key = (record.name, str(record.msg))
+        with self._lock:
+            self.seen[key] += 1
+            if self.interval and self.seen[key] % self.interval == 1:
+                return True
+            self.dropped[key] += 1
+        return False
+
+    def flush(self, logger: logging.Logger):
+        """Log and reset the counts of dropped DEBUG records"""
+        with self._lock:
+            dropped, self.dropped = self.dropped, Counter()
+            self.seen.clear()
+        for (name, template), count in dropped.items():
+            logger.info("Sampled out %d debug lines from %s: %r", count, name, template,
+                        extra={'sampled_out': count, 'template': template})
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread
+
+    The stock handler merges msg % args before enqueuing, which puts the
+    formatting cost back on the calling thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+
+def setup_logger(name: str, log_file: str = None, level=logging.INFO,
+                 structured: bool = LOG_STRUCTURED, use_queue: bool = LOG_ASYNC,
+                 sample_rate: float = LOG_SAMPLE_RATE) -> logging.Logger:
     """
     Setup logger with console and file handlers
-    
+
     Args:
         name: Logger name
         log_file: Optional log file path
         level: Logging level
-    
+        structured: Write JSON events instead of plain text lines
+        use_queue: Enqueue records and write them from a background thread
+        sample_rate: Fraction of DEBUG records kept
+
     Returns:
         Configured logger instance
     """
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    
+
     # Avoid adding handlers multiple times
     if logger.handlers:
         return logger
-    
+
+    if use_queue:
+        handler = LazyQueueHandler(_get_listener(log_file, structured))
+        handler.setLevel(level)
+        handlers = [handler]
+    else:
+        handlers = _output_handlers(log_file, level, structured)
+
+    sampler = SamplingFilter(sample_rate)
+    for handler in handlers:
+        handler.addFilter(sampler)
+        logger.addHandler(handler)
+
+    return logger
+
+
+def flush_sampled(logger: logging.Logger):
+    """Log a summary of DEBUG records dropped by the logger's sampling filter"""
+    for handler in logger.handlers:
+        for log_filter in handler.filters:
+            if isinstance(log_filter, SamplingFilter):
+                log_filter.flush(logger)
+                return
+
+
+def stop_listeners():
+    """Drain queued records and stop background writers"""
+    with _listeners_lock:
+        listeners = list(_listeners.values())
+        _listeners.clear()
+    for listener in listeners:
+        listener.stop()
+
+
+def _output_handlers(log_file, level, structured):
+    """Console handler plus an optional file handler"""
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(level)
-    console_format = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
+    console_handler.setFormatter(
+        JsonFormatter() if structured else logging.Formatter(TEXT_FORMAT, datefmt='%Y-%m-%d %H:%M:%S')
     )
-    console_handler.setFormatter(console_format)
-    logger.addHandler(console_handler)
-    
+    handlers = [console_handler]
+
     # File handler (if log_file specified)
     if log_file:
         os.makedirs(os.path.dirname(log_file), exist_ok=True)
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(level)
-        file_format = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        file_handler.setFormatter(file_format)
-        logger.addHandler(file_handler)
-    
-    return logger
+        file_handler.setFormatter(JsonFormatter() if structured else logging.Formatter(TEXT_FORMAT))
+        handlers.append(file_handler)
+
+    return handlers
+
+
+def _get_listener(log_file, structured) -> queue.Queue:
+    """Queue feeding the background listener for this output, started on first use"""
+    key = (log_file, structured)
+    with _listeners_lock:
+        listener = _listeners.get(key)
+        if listener is None:
+            listener = logging.handlers.QueueListener(
+                # Loggers sharing the listener gate their own levels
+                queue.SimpleQueue(), *_output_handlers(log_file, logging.NOTSET, structured),
+                respect_handler_level=True
+            )
+            listener.start()
+            _listeners[key] = listener
+        return listener.queue
+
+
+atexit.register(stop_listeners)
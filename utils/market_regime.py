@@ -0,0 +1,175 @@
+"""
+Market Regime
+Breadth, index trend and volatility regime of the whole market, computed
+from the price panel once per panel update and served from a cache
+"""
+
+import warnings
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.config import (
+    REGIME_INDEX_SYMBOL, REGIME_TREND_DAYS, REGIME_VOLATILITY_DAYS,
+    REGIME_HIGH_VOLATILITY_PCT, REGIME_LOW_VOLATILITY_PCT, PANEL_MAX_AGE_DAYS
+)
+
+RISK_ON = 'risk_on'
+NEUTRAL = 'neutral'
+RISK_OFF = 'risk_off'
+
+# Share of symbols above their trend SMA that counts as broad / narrow participation
+BROAD_BREADTH = 0.6
+NARROW_BREADTH = 0.4
+
+# Bars the trend SMA's slope is measured over
+SLOPE_DAYS = 5
+
+
+def compute_regime(close: np.ndarray, symbols: List[str], last_date=None,
+                   index_symbol: Optional[str] = REGIME_INDEX_SYMBOL,
+                   trend_days: int = REGIME_TREND_DAYS,
+                   volatility_days: int = REGIME_VOLATILITY_DAYS,
+                   high_volatility_pct: float = REGIME_HIGH_VOLATILITY_PCT,
+                   low_volatility_pct: float = REGIME_LOW_VOLATILITY_PCT) -> Optional[Dict]:
+    """
+    Classify the market at the last bar
+
+    Args:
+        close: (dates, symbols) closes, oldest row first
+        symbols: Symbol axis of close
+        last_date: Date of the last row (reported only)
+        index_symbol: Symbol whose closes are the index; without it (or
+                      without enough of its history) the index is the
+                      cumulative median daily return across symbols
+        trend_days: SMA length for the index trend and for breadth
+        volatility_days: Realized volatility window
+        high_volatility_pct: Percentile of past volatility above which it is "high"
+        low_volatility_pct: Percentile below which it is "low"
+
+    Returns:
+        Dictionary with the regime label and its inputs, or None without
+        trend_days + SLOPE_DAYS bars
+    """
+    close = np.asarray(close, dtype=np.float64)
+    if close.shape[0] < trend_days + SLOPE_DAYS:
+        return None
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Breadth: symbols with a full trend window that close above its SMA
+        window = close[-trend_days:]
+        complete = np.all(~np.isnan(window), axis=0)
+        above = window[-1] > window.mean(axis=0)
+        breadth = float(above[complete].mean()) if complete.any() else np.nan
+
+        moved = ~np.isnan(close[-1]) & ~np.isnan(close[-2])
+        advancers = float((close[-1] > close[-2])[moved].mean()) if moved.any() else np.nan
+
+        index, index_name = None, 'median'
+        j = symbols.index(index_symbol) if index_symbol in symbols else None
+        if j is not None and np.sum(~np.isnan(close[:, j])) >= trend_days + volatility_days:
+            index, index_name = close[:, j], index_symbol
+        else:
+            with warnings.catch_warnings():
+                # Rows where no symbol has two bars yet
+                warnings.simplefilter('ignore', RuntimeWarning)
+                median_return = np.nanmedian(close[1:] / close[:-1] - 1, axis=1)
+            index = np.concatenate([[1.0], np.cumprod(1 + np.nan_to_num(median_return))])
+
+        # Trend: price against its SMA, and the SMA's own slope
+        index = index[~np.isnan(index)]
+        sma = index[-trend_days:].mean()
+        prior_sma = index[-trend_days - SLOPE_DAYS:-SLOPE_DAYS].mean()
+        index_vs_sma = index[-1] / sma - 1
+        if index_vs_sma > 0 and sma > prior_sma:
+            trend = 'up'
+        elif index_vs_sma < 0 and sma < prior_sma:
+            trend = 'down'
+        else:
+            trend = 'flat'
+
+        # Volatility: today's realized volatility against every past window
+        log_returns = np.diff(np.log(index))
+        volatility, volatility_pct, volatility_regime = np.nan, np.nan, 'normal'
+        if len(log_returns) >= volatility_days:
+            windows = np.lib.stride_tricks.sliding_window_view(log_returns, volatility_days)
+            history = windows.std(axis=1, ddof=1) * np.sqrt(252)
+            volatility = float(history[-1])
+            volatility_pct = float(100.0 * np.mean(history <= volatility))
+            if volatility_pct >= high_volatility_pct:
+                volatility_regime = 'high'
+            elif volatility_pct <= low_volatility_pct:
+                volatility_regime = 'low'
+
+    if volatility_regime == 'high' and (trend == 'down' or breadth < BROAD_BREADTH):
+        label = RISK_OFF
+    elif trend == 'down' and breadth <= NARROW_BREADTH:
+        label = RISK_OFF
+    elif trend == 'up' and breadth >= BROAD_BREADTH and volatility_regime != 'high':
+        label = RISK_ON
+    else:
+        label = NEUTRAL
+
+    return {
+        'label': label,
+        'date': str(last_date) if last_date is not None else None,
+        'breadth': round(breadth, 3),
+        'advancers': round(advancers, 3),
+        'index': index_name,
+        'trend': trend,
+        'index_vs_sma': round(float(index_vs_sma), 4),
+        'volatility': round(volatility, 4),
+        'volatility_pct': round(volatility_pct, 1),
+        'volatility_regime': volatility_regime,
+        'symbols': int(complete.sum())
+    }
+
+
+class RegimeCache:
+    """
+    Market regime of a price panel, recomputed only when the panel changes
+
+    The scan calls update() once (after the panel loader's latest append is
+    visible); every layer then reads `current`, a plain attribute, instead
+    of each symbol recomputing market-wide context.
+    """
+
+    def __init__(self, panel, max_age_days: int = PANEL_MAX_AGE_DAYS, **options):
+        """
+        Args:
+            panel: PricePanel to classify
+            max_age_days: Report no regime when the panel's last bar is older
+            **options: Passed to compute_regime
+        """
+        self.panel = panel
+        self.max_age_days = max_age_days
+        self.options = options
+        self.current = None
+        self.stats = {'computed': 0, 'cached': 0}
+        self._key = None
+        self._regime = None
+
+    def update(self) -> Optional[Dict]:
+        """
+        Pick up panel changes and return the (possibly cached) regime
+
+        Returns:
+            Regime dictionary, or None if the panel is stale or too short
+        """
+        self.panel.refresh()
+        last_date = self.panel.last_date
+        key = (self.panel.n_dates, len(self.panel.symbols), str(last_date))
+
+        if key == self._key:
+            self.stats['cached'] += 1
+        else:
+            self._key = key
+            self.stats['computed'] += 1
+            self._regime = compute_regime(self.panel.field('Close'), self.panel.symbols, last_date,
+                                          **self.options) if last_date is not None else None
+
+        oldest_allowed = np.datetime64(datetime.now().date()) - np.timedelta64(self.max_age_days, 'D')
+        fresh = last_date is not None and last_date >= oldest_allowed
+        self.current = self._regime if fresh else None
+        return self.current
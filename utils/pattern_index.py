@@ -0,0 +1,343 @@
+"""
+Pattern Index
+Nearest-neighbour search over every symbol-day in the price panel, so a
+current setup can be matched against the historical setups that looked
+like it and what they did next
+"""
+
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config.config import (
+    PATTERN_WINDOW, PATTERN_SEGMENTS, PATTERN_FORWARD_DAYS, PATTERN_NEIGHBORS,
+    PATTERN_TABLES, PATTERN_BITS
+)
+from utils.metrics import REGISTRY
+
+META_FILE = 'meta.json'
+ARRAYS = ('vectors', 'rows', 'forward', 'dates', 'center', 'scale', 'planes', 'keys', 'order')
+
+QUERY_SECONDS = REGISTRY.histogram('pattern_query_seconds', 'Pattern index nearest-neighbour query latency',
+                                   buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25))
+
+# Average bucket size the hash width is capped to on small indexes
+TARGET_BUCKET = 64
+
+# Bits flipped per table when probing neighbouring buckets (those whose
+# projections lie closest to zero, where a near neighbour most likely differs)
+PROBES = 4
+
+
+class PatternIndex:
+    """
+    Random-projection LSH index of price/volume window vectors
+
+    Every window of `window` bars ending on a panel date becomes one
+    fixed-length vector: the log-price path relative to the last close
+    and the log volume relative to the window's mean, each averaged down
+    to `segments` points. Dimensions are standardized across the index so
+    price and volume weigh the same.
+
+    Each of `tables` hash tables keys a vector by the signs of `bits`
+    random projections; a query probes its own bucket and the buckets one
+    uncertain bit away in every table, then ranks that candidate set by
+    exact distance. Windows whose forward returns are not known yet (the last
+    max(forward_days) dates) are left out.
+
+    Arrays are saved as .npy files and memory-mapped on load, so every
+    scan process shares one copy through the page cache.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        self.meta = meta
+        self.window = meta['window']
+        self.segments = meta['segments']
+        self.forward_days = meta['forward_days']
+        self.symbols = meta['symbols']
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @classmethod
+    def build(cls, panel, window: int = PATTERN_WINDOW, segments: int = PATTERN_SEGMENTS,
+              forward_days: Optional[List[int]] = None, tables: int = PATTERN_TABLES,
+              bits: int = PATTERN_BITS, chunk_dates: int = 64, seed: int = 0) -> 'PatternIndex':
+        """
+        Index every complete window in a price panel
+
+        Args:
+            panel: PricePanel (or anything with dates, symbols and field())
+            window: Bars per window
+            segments: Points each of the price and volume paths is reduced to
+            forward_days: Horizons whose forward returns are stored
+            tables: Hash tables
+            bits: Hash bits per table (capped on small indexes)
+            chunk_dates: Window end dates vectorized at a time
+            seed: Projection seed
+
+        Returns:
+            In-memory PatternIndex (call save() to persist it)
+        """
+        if not 1 <= segments <= window:
+            raise ValueError(f"segments must be between 1 and window ({window}): {segments}")
+        forward_days = sorted(forward_days or PATTERN_FORWARD_DAYS)
+        close = np.asarray(panel.field('Close'), dtype=np.float64)
+        volume = np.asarray(panel.field('Volume'), dtype=np.float64)
+        n_dates = close.shape[0]
+        last_end = n_dates - 1 - forward_days[-1]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_close = np.log(close)
+
+        vectors, rows, forward = [], [], []
+        for start in range(window - 1, last_end + 1, chunk_dates):
+            ends = np.arange(start, min(start + chunk_dates, last_end + 1))
+            raw, valid = _window_features(log_close[ends[0] - window + 1:ends[-1] + 1],
+                                          volume[ends[0] - window + 1:ends[-1] + 1], window, segments)
+
+            with np.errstate(invalid='ignore'):
+                ahead = np.stack([np.expm1(log_close[ends + h] - log_close[ends]) for h in forward_days], axis=-1)
+            valid &= np.all(np.isfinite(ahead), axis=-1)
+
+            date_idx, symbol_idx = np.nonzero(valid)
+            vectors.append(raw[date_idx, symbol_idx].astype(np.float32))
+            rows.append(np.column_stack([ends[date_idx], symbol_idx]).astype(np.int32))
+            forward.append(ahead[date_idx, symbol_idx].astype(np.float32))
+
+        dim = 2 * segments
+        vectors = np.concatenate(vectors) if vectors else np.empty((0, dim), dtype=np.float32)
+        rows = np.concatenate(rows) if rows else np.empty((0, 2), dtype=np.int32)
+        forward = np.concatenate(forward) if forward else np.empty((0, len(forward_days)), dtype=np.float32)
+
+        center = vectors.mean(axis=0) if len(vectors) else np.zeros(dim, dtype=np.float32)
+        scale = vectors.std(axis=0) if len(vectors) else np.ones(dim, dtype=np.float32)
+        scale = np.where(scale > 0, scale, 1).astype(np.float32)
+        vectors = (vectors - center) / scale
+
+        bits = int(min(bits, max(1, np.log2(max(len(vectors), 2) / TARGET_BUCKET))))
+        planes = np.random.default_rng(seed).standard_normal((tables, dim, bits)).astype(np.float32)
+        keys, order = [], []
+        for plane in planes:
+            table_keys = _hash(vectors, plane)
+            table_order = np.argsort(table_keys, kind='stable').astype(np.int32)
+            keys.append(table_keys[table_order])
+            order.append(table_order)
+
+        arrays = {
+            'vectors': vectors,
+            'rows': rows,
+            'forward': forward,
+            'dates': np.asarray(panel.dates, dtype='datetime64[D]'),
+            'center': center.astype(np.float32),
+            'scale': scale,
+            'planes': planes,
+            'keys': np.array(keys, dtype=np.uint32).reshape(tables, len(vectors)),
+            'order': np.array(order, dtype=np.int32).reshape(tables, len(vectors)),
+        }
+        meta = {
+            'window': window,
+            'segments': segments,
+            'forward_days': forward_days,
+            'symbols': list(panel.symbols),
+            'bits': bits,
+            'size': len(vectors),
+            'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        return cls(arrays, meta)
+
+    def save(self, path: str):
+        """Write the arrays, then the metadata (readers key off meta.json)"""
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAYS:
+            tmp_path = os.path.join(path, f'{name}.tmp.npy')
+            np.save(tmp_path, getattr(self, name))
+            os.replace(tmp_path, os.path.join(path, f'{name}.npy'))
+
+        tmp_path = os.path.join(path, META_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, os.path.join(path, META_FILE))
+
+    @classmethod
+    def load(cls, path: str) -> 'PatternIndex':
+        """Memory-map a saved index"""
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        # Plain ndarray views of the maps: slicing a np.memmap costs more than the lookup
+        arrays = {name: np.asarray(np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')) for name in ARRAYS}
+        return cls(arrays, meta)
+
+    def vectorize(self, close, volume) -> Optional[np.ndarray]:
+        """
+        Standardized vector of the window ending at the last bar
+
+        Args:
+            close: Closing prices, oldest first (at least `window` bars)
+            volume: Volumes aligned with close
+
+        Returns:
+            Vector, or None without a full window of usable bars
+        """
+        close = np.asarray(close, dtype=np.float64)[-self.window:]
+        volume = np.asarray(volume, dtype=np.float64)[-self.window:]
+        if len(close) < self.window:
+            return None
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            raw, valid = _window_features(np.log(close)[:, None], volume[:, None], self.window, self.segments)
+        if not valid[0, 0]:
+            return None
+        return ((raw[0, 0] - self.center) / self.scale).astype(np.float32)
+
+    def query(self, vector: np.ndarray, k: int = PATTERN_NEIGHBORS) -> List[Dict]:
+        """
+        The k nearest historical windows
+
+        Overlapping windows of one symbol are near-duplicates of each
+        other, so only the closest of any run within `window` bars is kept.
+
+        Args:
+            vector: Output of vectorize()
+            k: Neighbours to return
+
+        Returns:
+            Matches, nearest first: symbol, date, distance and
+            forward_<h>d returns
+        """
+        started = time.perf_counter()
+        candidates = self._candidates(vector)
+        if len(candidates) < k * 4:
+            # Sparse buckets (an unusual setup): fall back to an exact scan
+            candidates = np.arange(len(self.vectors))
+
+        distances = np.sqrt(np.sum((self.vectors[candidates] - vector) ** 2, axis=1))
+
+        # Walk a short sorted list first; only a run of near-duplicates
+        # longer than it needs the full ordering
+        shortlist = min(k * 8, len(distances))
+        for limit in (shortlist, len(distances)):
+            nearest = np.argpartition(distances, limit - 1)[:limit] if limit < len(distances) \
+                else np.arange(limit)
+            ranked = nearest[np.argsort(distances[nearest], kind='stable')]
+            matches = self._distinct(candidates[ranked], distances[ranked], k)
+            if len(matches) == k or limit == len(distances):
+                break
+
+        QUERY_SECONDS.observe(time.perf_counter() - started)
+        return matches
+
+    def analogues(self, data: pd.DataFrame, k: int = PATTERN_NEIGHBORS) -> Optional[Dict]:
+        """
+        Historical analogues of a symbol's latest window
+
+        Args:
+            data: OHLCV frame (as DataFetcher returns it)
+            k: Neighbours to return
+
+        Returns:
+            Dictionary with matches and, per horizon, the mean forward return
+            and the fraction of matches that rose; None without a full window
+        """
+        vector = self.vectorize(data['Close'].to_numpy(), data['Volume'].to_numpy())
+        if vector is None or len(self) == 0:
+            return None
+
+        matches = self.query(vector, k)
+        outcomes = {}
+        for h in self.forward_days:
+            returns = np.array([match[f'forward_{h}d'] for match in matches])
+            outcomes[f'{h}d'] = {
+                'mean_return': round(float(returns.mean()), 4),
+                'hit_rate': round(float(np.mean(returns > 0)), 2)
+            }
+        return {'matches': matches, 'outcomes': outcomes}
+
+    def _distinct(self, rows: np.ndarray, distances: np.ndarray, k: int) -> List[Dict]:
+        """First k rows, nearest first, at least `window` bars apart within a symbol"""
+        matches = []
+        taken = {}
+        for row, distance in zip(rows, distances):
+            date_idx, symbol_idx = (int(value) for value in self.rows[row])
+            if any(abs(date_idx - other) < self.window for other in taken.get(symbol_idx, ())):
+                continue
+            taken.setdefault(symbol_idx, []).append(date_idx)
+
+            match = {
+                'symbol': self.symbols[symbol_idx],
+                'date': str(self.dates[date_idx]),
+                'distance': round(float(distance), 4)
+            }
+            for h, value in zip(self.forward_days, self.forward[row]):
+                match[f'forward_{h}d'] = round(float(value), 4)
+            matches.append(match)
+            if len(matches) == k:
+                break
+        return matches
+
+    def _candidates(self, vector: np.ndarray) -> np.ndarray:
+        """Union of the query's bucket and its nearest neighbouring buckets in every table"""
+        found = []
+        for plane, keys, order in zip(self.planes, self.keys, self.order):
+            projections = vector @ plane
+            key = np.uint32(_hash(vector[None, :], plane)[0])
+            uncertain = np.argsort(np.abs(projections))[:PROBES]
+            probes = np.concatenate([[key], key ^ (np.uint32(1) << uncertain.astype(np.uint32))]).astype(np.uint32)
+            lo = np.searchsorted(keys, probes, side='left')
+            hi = np.searchsorted(keys, probes, side='right')
+            found.extend(order[a:b] for a, b in zip(lo, hi) if b > a)
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int32)
+
+
+def open_pattern_index(path: str) -> Optional[PatternIndex]:
+    """Load an index if one has been built at path"""
+    if not os.path.exists(os.path.join(path, META_FILE)):
+        return None
+    return PatternIndex.load(path)
+
+
+def _window_features(log_close: np.ndarray, volume: np.ndarray, window: int, segments: int):
+    """
+    Raw (unstandardized) vectors of every window in a block of bars
+
+    Args:
+        log_close: (bars, symbols) log closes
+        volume: (bars, symbols) volumes
+        window: Bars per window
+        segments: Points per path
+
+    Returns:
+        ((windows, symbols, 2 * segments) vectors, (windows, symbols) validity mask)
+        for the windows ending at bars window-1 .. bars-1
+    """
+    price = sliding_window_view(log_close, window, axis=0)
+    price = price - price[..., -1:]
+    volumes = sliding_window_view(volume, window, axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_volume = volumes.mean(axis=-1, keepdims=True)
+        relative_volume = np.clip(np.log(np.maximum(volumes, 1.0) / mean_volume), -3.0, 3.0)
+
+    # Piecewise-aggregate each path down to `segments` points
+    bounds = np.linspace(0, window, segments + 1).astype(int)
+    widths = np.diff(bounds)
+    raw = np.concatenate([
+        np.add.reduceat(price, bounds[:-1], axis=-1) / widths,
+        np.add.reduceat(relative_volume, bounds[:-1], axis=-1) / widths
+    ], axis=-1)
+
+    valid = np.all(np.isfinite(raw), axis=-1) & (mean_volume[..., 0] > 0)
+    return raw, valid
+
+
+def _hash(vectors: np.ndarray, plane: np.ndarray) -> np.ndarray:
+    """Bucket key of each vector: the signs of its projections as bits"""
+    signs = (vectors @ plane) > 0
+    return (signs.astype(np.uint32) << np.arange(plane.shape[1], dtype=np.uint32)).sum(axis=-1, dtype=np.uint32)
@@ -0,0 +1,280 @@
+"""
+Portfolio Simulator
+Turns a (date x symbol) signal matrix into trades under the configured
+sizing and exit rules, with a daily equity curve and a trade log
+"""
+
+import heapq
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.exit_rules import ExitRules, evaluate_exits, EXIT_REASONS
+from utils.signal_matrix import rolling_mean
+from config.config import (
+    INITIAL_CAPITAL, MAX_POSITION_SIZE, COMMISSION, MICROCAP_DOLLAR_VOLUME, SIM_MAX_HOLD_DAYS
+)
+
+
+class PortfolioSimulator:
+    """
+    Simulate many concurrent positions opened by detector signals
+
+    Every signal's forward path is evaluated against the exit rules in one
+    vectorized pass (see evaluate_exits). Only the cash bookkeeping, which
+    depends on trade order, walks the signals sequentially, and the equity
+    curve is rebuilt from the trade log with array operations.
+
+    A signal on day i enters at day i+1's open (day i's close when no opens
+    are given). Positions are sized at max_position_size of book equity
+    (cash plus open cost basis), capped by available cash; signals for
+    symbols already held or without cash are skipped.
+    """
+
+    def __init__(self, initial_capital: float = INITIAL_CAPITAL,
+                 max_position_size: float = MAX_POSITION_SIZE,
+                 commission: float = COMMISSION,
+                 max_hold_days: int = SIM_MAX_HOLD_DAYS,
+                 rules: Optional[ExitRules] = None,
+                 microcap_dollar_volume: float = MICROCAP_DOLLAR_VOLUME):
+        """
+        Args:
+            initial_capital: Starting cash
+            max_position_size: Fraction of book equity per position
+            commission: Commission as a fraction of each trade's notional
+            max_hold_days: Trading days before a position is closed at market
+            rules: Exit rules (defaults from config)
+            microcap_dollar_volume: 20-day average dollar volume below which
+                                    the micro-cap profit target applies
+        """
+        self.initial_capital = initial_capital
+        self.max_position_size = max_position_size
+        self.commission = commission
+        self.max_hold_days = max_hold_days
+        self.rules = rules or ExitRules()
+        self.microcap_dollar_volume = microcap_dollar_volume
+
+    def run(self, dates, symbols: List[str], fields: Dict[str, np.ndarray],
+            signals: np.ndarray, scores: Optional[np.ndarray] = None) -> Dict:
+        """
+        Run the simulation
+
+        Args:
+            dates: Date axis of the matrices
+            symbols: Symbol axis of the matrices
+            fields: 'High'/'Low'/'Close'/'Volume' (and optionally 'Open')
+                    -> (dates, symbols) arrays
+            signals: Boolean (dates, symbols) entry signals
+            scores: Optional scores; higher scores are filled first on a day
+
+        Returns:
+            Dictionary with 'trades' (DataFrame), 'equity' (DataFrame),
+            'summary' (dict)
+        """
+        close = np.asarray(fields['Close'], dtype=np.float64)
+        n_dates = close.shape[0]
+        opens = fields.get('Open')
+        dates = pd.DatetimeIndex(dates)
+
+        # Candidate entries, in fill order
+        sig_rows, sig_cols = np.nonzero(np.asarray(signals, dtype=bool) & ~np.isnan(close))
+        keep = sig_rows + 1 < n_dates
+        sig_rows, sig_cols = sig_rows[keep], sig_cols[keep]
+        priority = -np.asarray(scores, dtype=np.float64)[sig_rows, sig_cols] if scores is not None else np.zeros(len(sig_rows))
+        order = np.lexsort((np.nan_to_num(priority), sig_rows))
+        sig_rows, sig_cols = sig_rows[order], sig_cols[order]
+
+        if opens is not None:
+            entry = np.asarray(opens, dtype=np.float64)[sig_rows + 1, sig_cols]
+        else:
+            entry = close[sig_rows, sig_cols]
+        tradable = np.isfinite(entry) & (entry > 0)
+        sig_rows, sig_cols, entry = sig_rows[tradable], sig_cols[tradable], entry[tradable]
+
+        paths = self._forward_paths(fields, sig_rows, sig_cols)
+        dollar_volume = rolling_mean(close * np.asarray(fields['Volume'], dtype=np.float64), 20)
+        is_microcap = dollar_volume[sig_rows, sig_cols] < self.microcap_dollar_volume
+        exits = evaluate_exits(entry, paths['High'], paths['Low'], paths['Close'], self.rules,
+                               self.rules.profit_targets(is_microcap), open_=paths.get('Open'))
+
+        trades, skipped = self._fill(sig_rows, sig_cols, entry, exits)
+        equity = self._equity_curve(dates, close, trades)
+        trade_log = self._trade_log(trades, dates, symbols)
+
+        return {
+            'trades': trade_log,
+            'equity': equity,
+            'summary': self._summary(trade_log, equity, len(sig_rows), skipped)
+        }
+
+    def _forward_paths(self, fields, rows, cols) -> Dict[str, np.ndarray]:
+        """(positions, max_hold_days) bars following each signal, NaN past the data"""
+        n_dates = np.asarray(fields['Close']).shape[0]
+        bar_rows = rows[:, None] + 1 + np.arange(self.max_hold_days)
+        in_range = bar_rows < n_dates
+        bar_rows = np.minimum(bar_rows, n_dates - 1)
+
+        paths = {}
+        for name in ('Open', 'High', 'Low', 'Close'):
+            if name in fields and fields[name] is not None:
+                values = np.asarray(fields[name], dtype=np.float64)[bar_rows, cols[:, None]]
+                paths[name] = np.where(in_range, values, np.nan)
+        return paths
+
+    def _fill(self, rows, cols, entry, exits):
+        """Sequential cash bookkeeping over the precomputed exits"""
+        cash = self.initial_capital
+        cost_basis = 0.0
+        held = {}      # column -> position index
+        pending = []   # (day, seq, kind, index) cash events not yet settled
+        trades = []
+        skipped = {'already_held': 0, 'no_cash': 0}
+        fraction = self.rules.partial_fraction
+        seq = 0
+
+        for k in range(len(rows)):
+            entry_day = rows[k] + 1
+
+            # Settle exits that happened before today's open
+            while pending and pending[0][0] < entry_day:
+                _, _, kind, index = heapq.heappop(pending)
+                trade = trades[index]
+                if kind == 'partial':
+                    sold = trade['shares'] * fraction
+                    cash += sold * trade['partial_price'] * (1 - self.commission)
+                    cost_basis -= trade['cost'] * fraction
+                else:
+                    remaining = trade['shares'] * (1 - fraction if trade['partial_day'] >= 0 else 1)
+                    cash += remaining * trade['exit_price'] * (1 - self.commission)
+                    cost_basis -= trade['cost'] * (1 - fraction if trade['partial_day'] >= 0 else 1)
+                    held.pop(trade['col'], None)
+
+            col = cols[k]
+            if col in held:
+                skipped['already_held'] += 1
+                continue
+
+            allocation = min(self.max_position_size * (cash + cost_basis), cash / (1 + self.commission))
+            if allocation <= 0 or allocation < 0.001 * self.initial_capital:
+                skipped['no_cash'] += 1
+                continue
+
+            shares = allocation / entry[k]
+            cash -= allocation * (1 + self.commission)
+            cost_basis += allocation
+
+            partial_day = int(entry_day + exits['partial_bar'][k]) if exits['partial_bar'][k] >= 0 else -1
+            exit_day = int(entry_day + exits['exit_bar'][k])
+            trades.append({
+                'row': int(rows[k]), 'col': int(col), 'entry_day': int(entry_day),
+                'entry_price': float(entry[k]), 'shares': shares, 'cost': allocation,
+                'partial_day': partial_day, 'partial_price': float(exits['partial_price'][k]),
+                'exit_day': exit_day, 'exit_price': float(exits['exit_price'][k]),
+                'exit_reason': EXIT_REASONS[int(exits['exit_reason'][k])]
+            })
+            held[col] = len(trades) - 1
+
+            if partial_day >= 0:
+                heapq.heappush(pending, (partial_day, seq, 'partial', len(trades) - 1))
+                seq += 1
+            heapq.heappush(pending, (exit_day, seq, 'exit', len(trades) - 1))
+            seq += 1
+
+        return trades, skipped
+
+    def _equity_curve(self, dates, close, trades) -> pd.DataFrame:
+        """Daily cash, marked-to-market positions and drawdown"""
+        n_dates, n_symbols = close.shape
+        cash_flow = np.zeros(n_dates)
+        share_delta = np.zeros((n_dates, n_symbols))
+        fraction = self.rules.partial_fraction
+
+        if trades:
+            t = pd.DataFrame(trades)
+            partial = t['partial_day'].to_numpy() >= 0
+            remaining = np.where(partial, 1 - fraction, 1.0)
+
+            np.add.at(cash_flow, t['entry_day'].to_numpy(), -t['cost'].to_numpy() * (1 + self.commission))
+            np.add.at(share_delta, (t['entry_day'].to_numpy(), t['col'].to_numpy()), t['shares'].to_numpy())
+
+            p = t[partial]
+            np.add.at(cash_flow, p['partial_day'].to_numpy(),
+                      p['shares'].to_numpy() * fraction * p['partial_price'].to_numpy() * (1 - self.commission))
+            np.add.at(share_delta, (p['partial_day'].to_numpy(), p['col'].to_numpy()),
+                      -p['shares'].to_numpy() * fraction)
+
+            # Positions still open at the end stay marked to market
+            closed = t['exit_reason'].to_numpy() != 'open'
+            c = t[closed]
+            np.add.at(cash_flow, c['exit_day'].to_numpy(),
+                      c['shares'].to_numpy() * remaining[closed] * c['exit_price'].to_numpy() * (1 - self.commission))
+            np.add.at(share_delta, (c['exit_day'].to_numpy(), c['col'].to_numpy()),
+                      -c['shares'].to_numpy() * remaining[closed])
+
+        cash = self.initial_capital + np.cumsum(cash_flow)
+        holdings = np.cumsum(share_delta, axis=0)
+        positions_value = np.nansum(holdings * _ffill(close), axis=1)
+        equity = cash + positions_value
+        peak = np.maximum.accumulate(equity)
+
+        return pd.DataFrame({
+            'cash': cash,
+            'positions_value': positions_value,
+            'equity': equity,
+            'drawdown_pct': (equity / peak - 1) * 100
+        }, index=dates)
+
+    def _trade_log(self, trades, dates, symbols) -> pd.DataFrame:
+        """One row per position with dates, prices and net P&L"""
+        columns = ['symbol', 'signal_date', 'entry_date', 'entry_price', 'shares', 'partial_date',
+                   'partial_price', 'exit_date', 'exit_price', 'exit_reason', 'bars_held', 'pnl', 'return_pct']
+        if not trades:
+            return pd.DataFrame(columns=columns)
+
+        t = pd.DataFrame(trades)
+        fraction = np.where(t['partial_day'] >= 0, self.rules.partial_fraction, 0.0)
+        proceeds = t['shares'] * (fraction * t['partial_price'].fillna(0) + (1 - fraction) * t['exit_price'])
+        pnl = proceeds * (1 - self.commission) - t['cost'] * (1 + self.commission)
+        symbols = np.asarray(symbols, dtype=object)
+
+        return pd.DataFrame({
+            'symbol': symbols[t['col']],
+            'signal_date': dates[t['row']],
+            'entry_date': dates[t['entry_day']],
+            'entry_price': t['entry_price'].round(4),
+            'shares': t['shares'].round(4),
+            'partial_date': [dates[d] if d >= 0 else pd.NaT for d in t['partial_day']],
+            'partial_price': t['partial_price'].round(4),
+            'exit_date': dates[t['exit_day']],
+            'exit_price': t['exit_price'].round(4),
+            'exit_reason': t['exit_reason'],
+            'bars_held': t['exit_day'] - t['entry_day'] + 1,
+            'pnl': pnl.round(2),
+            'return_pct': (pnl / t['cost'] * 100).round(2)
+        }, columns=columns)
+
+    def _summary(self, trade_log: pd.DataFrame, equity: pd.DataFrame, n_signals: int, skipped: Dict) -> Dict:
+        final_equity = float(equity['equity'].iloc[-1]) if len(equity) else self.initial_capital
+        closed = trade_log[trade_log['exit_reason'] != 'open']
+        return {
+            'initial_capital': self.initial_capital,
+            'final_equity': round(final_equity, 2),
+            'total_return_pct': round((final_equity / self.initial_capital - 1) * 100, 2),
+            'max_drawdown_pct': round(float(equity['drawdown_pct'].min()), 2) if len(equity) else 0.0,
+            'signals': n_signals,
+            'trades': len(trade_log),
+            'skipped': skipped,
+            'win_rate_pct': round(float((closed['pnl'] > 0).mean() * 100), 1) if len(closed) else None,
+            'avg_return_pct': round(float(closed['return_pct'].mean()), 2) if len(closed) else None,
+            'avg_bars_held': round(float(closed['bars_held'].mean()), 1) if len(closed) else None,
+            'exits': trade_log['exit_reason'].value_counts().to_dict()
+        }
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs down each column (leading NaNs become 0)"""
+    index = np.where(np.isnan(values), 0, np.arange(values.shape[0])[:, None])
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = values[index, np.arange(values.shape[1])]
+    return np.nan_to_num(filled, nan=0.0)
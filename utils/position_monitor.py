@@ -0,0 +1,287 @@
+"""
+Position Monitor
+Watches open positions intraday and raises alerts when a stop-loss,
+trailing stop, partial sell or profit target triggers
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from utils.exit_rules import ExitRules, check_triggers, EXIT_OPEN, EXIT_REASONS
+from utils.logger import setup_logger
+from utils.metrics import REGISTRY
+from config.config import (
+    POSITIONS_PATH, REALTIME_REFRESH, QUOTE_TIMEOUT, MONITOR_MAX_LATENCY
+)
+
+logger = setup_logger(__name__)
+
+MONITOR_TICKS = REGISTRY.counter('monitor_ticks_total', 'Position monitor price updates')
+MONITOR_ALERTS = REGISTRY.counter('monitor_alerts_total', 'Exit-rule alerts by type', ['type'])
+ALERT_LATENCY = REGISTRY.histogram('monitor_alert_latency_seconds', 'Quote arrival to alert emission',
+                                   buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2, 5))
+OPEN_POSITIONS = REGISTRY.gauge('monitor_open_positions', 'Positions being monitored')
+
+
+class PositionMonitor:
+    """
+    Open positions held as parallel arrays and checked in one batch
+
+    Each tick fetches every quote in one batched request, then evaluates
+    all positions at once with check_triggers. Alerts are handed to the
+    registered listeners as soon as the batch is evaluated, so the delay
+    after the quotes arrive does not grow with the number of alerts.
+    A position that hits a stop or its target is dropped after alerting;
+    a partial-sell alert is raised once per position.
+    """
+
+    def __init__(self, fetcher=None, rules: Optional[ExitRules] = None,
+                 path: Optional[str] = POSITIONS_PATH,
+                 max_latency: float = MONITOR_MAX_LATENCY):
+        """
+        Args:
+            fetcher: DataFetcher used for batched quotes
+            rules: Exit rules (defaults from config)
+            path: JSON file positions are loaded from and saved to (None to
+                  keep them in memory only)
+            max_latency: Seconds after the quotes arrive before a late alert
+                         is logged
+        """
+        if fetcher is None:
+            from utils.data_fetcher import DataFetcher
+            fetcher = DataFetcher()
+        self.fetcher = fetcher
+        self.rules = rules or ExitRules()
+        self.path = path
+        self.max_latency = max_latency
+        self.alert_listeners = []
+
+        self.symbols = []
+        self.entry = np.empty(0)
+        self.shares = np.empty(0)
+        self.peak = np.empty(0)
+        self.target = np.empty(0)
+        self.partial_taken = np.empty(0, dtype=bool)
+        self.opened_at = []
+        self._stop = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Positions
+    # ------------------------------------------------------------------
+
+    def add_position(self, symbol: str, entry_price: float, shares: float = 0,
+                     is_microcap: bool = False, peak: Optional[float] = None,
+                     partial_taken: bool = False, opened_at: Optional[str] = None):
+        """
+        Start monitoring a position (replaces an existing one for the symbol)
+
+        Args:
+            symbol: Stock ticker symbol
+            entry_price: Average entry price
+            shares: Share count (informational; alerts do not depend on it)
+            is_microcap: Use the micro-cap profit target
+            peak: Highest price since entry (defaults to the entry price)
+            partial_taken: Whether the partial sell already happened
+            opened_at: ISO timestamp of the entry
+        """
+        self.remove_position(symbol)
+        self.symbols.append(symbol)
+        self.entry = np.append(self.entry, float(entry_price))
+        self.shares = np.append(self.shares, float(shares))
+        self.peak = np.append(self.peak, float(peak if peak is not None else entry_price))
+        self.target = np.append(self.target, self.rules.profit_targets(is_microcap))
+        self.partial_taken = np.append(self.partial_taken, bool(partial_taken))
+        self.opened_at.append(opened_at or datetime.now().isoformat())
+        OPEN_POSITIONS.set(len(self.symbols))
+
+    def remove_position(self, symbol: str) -> bool:
+        """Stop monitoring a symbol; returns False if it was not held"""
+        if symbol not in self.symbols:
+            return False
+        self._keep(np.array([s != symbol for s in self.symbols], dtype=bool))
+        return True
+
+    @property
+    def positions(self) -> List[Dict]:
+        return [
+            {
+                'symbol': symbol,
+                'entry_price': float(self.entry[i]),
+                'shares': float(self.shares[i]),
+                'is_microcap': bool(self.target[i] == self.rules.microcap_target),
+                'peak': float(self.peak[i]),
+                'partial_taken': bool(self.partial_taken[i]),
+                'opened_at': self.opened_at[i]
+            }
+            for i, symbol in enumerate(self.symbols)
+        ]
+
+    def load(self) -> int:
+        """Load positions from self.path; returns how many were loaded"""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+
+        for position in state.get('positions', []):
+            self.add_position(
+                position['symbol'], position['entry_price'], position.get('shares', 0),
+                is_microcap=position.get('is_microcap', False), peak=position.get('peak'),
+                partial_taken=position.get('partial_taken', False), opened_at=position.get('opened_at')
+            )
+        return len(self.symbols)
+
+    def save(self):
+        """Atomically write positions (with their peaks) to self.path"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'saved_at': datetime.now().isoformat(), 'positions': self.positions}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _keep(self, mask: np.ndarray):
+        self.symbols = [symbol for symbol, keep in zip(self.symbols, mask) if keep]
+        self.opened_at = [opened for opened, keep in zip(self.opened_at, mask) if keep]
+        self.entry = self.entry[mask]
+        self.shares = self.shares[mask]
+        self.peak = self.peak[mask]
+        self.target = self.target[mask]
+        self.partial_taken = self.partial_taken[mask]
+        OPEN_POSITIONS.set(len(self.symbols))
+
+    # ------------------------------------------------------------------
+    # Monitoring
+    # ------------------------------------------------------------------
+
+    def add_alert_listener(self, listener: Callable[[Dict], None]):
+        """Register a callback invoked as listener(alert) for every alert"""
+        self.alert_listeners.append(listener)
+
+    def check(self, prices: Dict[str, float], received_at: Optional[float] = None) -> List[Dict]:
+        """
+        Evaluate every position against one set of quotes
+
+        Args:
+            prices: symbol -> latest price (missing symbols are skipped)
+            received_at: time.perf_counter() when the quotes arrived
+
+        Returns:
+            Alerts raised by this update
+        """
+        if not self.symbols:
+            return []
+        received_at = received_at if received_at is not None else time.perf_counter()
+
+        price = np.array([prices.get(symbol, np.nan) for symbol in self.symbols], dtype=np.float64)
+        triggers = check_triggers(self.entry, self.peak, price, self.rules, self.target, self.partial_taken)
+        self.peak = triggers['peak']
+
+        exits = triggers['reason'] != EXIT_OPEN
+        alert_rows = np.flatnonzero(exits | triggers['partial'])
+        now = datetime.now().isoformat()
+        alerts = []
+        for i in alert_rows:
+            if exits[i]:
+                alert_type = EXIT_REASONS[int(triggers['reason'][i])]
+                level = triggers['stop'][i] if alert_type != 'profit_target' else self.entry[i] * (1 + self.target[i])
+            else:
+                alert_type = 'partial_sell'
+                level = self.entry[i] * (1 + self.rules.partial_at)
+            alerts.append({
+                'type': alert_type,
+                'symbol': self.symbols[i],
+                'price': round(float(price[i]), 4),
+                'level': round(float(level), 4),
+                'entry_price': float(self.entry[i]),
+                'return_pct': round(float((price[i] / self.entry[i] - 1) * 100), 2),
+                'shares': float(self.shares[i] * (self.rules.partial_fraction if alert_type == 'partial_sell' else 1)),
+                'timestamp': now
+            })
+
+        self.partial_taken = self.partial_taken | triggers['partial']
+        if exits.any():
+            self._keep(~exits)
+
+        self._emit(alerts, received_at)
+        return alerts
+
+    def tick(self) -> List[Dict]:
+        """Fetch quotes for every position in one batch and check them"""
+        if not self.symbols:
+            return []
+        prices = self.fetcher.get_current_prices(self.symbols, timeout=QUOTE_TIMEOUT)
+        received_at = time.perf_counter()
+        MONITOR_TICKS.inc()
+
+        missing = len(self.symbols) - sum(symbol in prices for symbol in self.symbols)
+        if missing:
+            logger.warning("No quote for %d of %d positions", missing, len(self.symbols))
+        return self.check(prices, received_at)
+
+    def run(self, interval: float = REALTIME_REFRESH, iterations: Optional[int] = None) -> int:
+        """
+        Tick on a fixed schedule until stopped
+
+        Ticks are scheduled from the start time rather than from the end of
+        the previous tick, so slow quote requests do not make the schedule
+        drift; a tick that overruns the interval is logged and the next one
+        starts immediately.
+
+        Args:
+            interval: Seconds between ticks
+            iterations: Stop after this many ticks (default: run until stop())
+
+        Returns:
+            Number of alerts raised
+        """
+        self._stop.clear()
+        raised = 0
+        ticks = 0
+        next_tick = time.monotonic()
+
+        while not self._stop.is_set() and (iterations is None or ticks < iterations):
+            tick_started = next_tick = time.monotonic()
+            raised += len(self.tick())
+            ticks += 1
+            if self.path:
+                self.save()
+
+            elapsed = time.monotonic() - tick_started
+            if elapsed > interval:
+                logger.warning("Monitor tick took %.1fs (interval %.0fs)", elapsed, interval)
+            if iterations is not None and ticks >= iterations:
+                break
+            self._stop.wait(max(0.0, next_tick + interval - time.monotonic()))
+
+        return raised
+
+    def stop(self):
+        self._stop.set()
+
+    def _emit(self, alerts: List[Dict], received_at: float):
+        for alert in alerts:
+            latency = time.perf_counter() - received_at
+            alert['latency_ms'] = round(latency * 1000, 3)
+            ALERT_LATENCY.observe(latency)
+            MONITOR_ALERTS.inc(type=alert['type'])
+            if latency > self.max_latency:
+                logger.warning("Alert for %s went out %.2fs after quotes arrived", alert['symbol'], latency)
+            logger.info("%s %s at %.2f (level %.2f, %+.1f%%)", alert['type'], alert['symbol'],
+                        alert['price'], alert['level'], alert['return_pct'],
+                        extra={'symbol': alert['symbol'], 'alert': alert['type'], 'latency_ms': alert['latency_ms']})
+            for listener in self.alert_listeners:
+                try:
+                    listener(alert)
+                except Exception as e:
+                    logger.error("Alert listener failed for %s: %s", alert['symbol'], e)
@@ -0,0 +1,425 @@
+"""
+Shared Price Panel
+Memory-mapped dates x symbols x fields bar store shared across processes
+"""
+
+import glob
+import json
+import os
+from typing import Optional, List, Dict
+
+import numpy as np
+import pandas as pd
+
+from utils.corporate_actions import history_adjustment
+
+PANEL_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+META_FILE = 'meta.json'
+DATES_FILE = 'dates.npy'
+BARS_FILE = 'bars.npy'
+
+
+class PricePanel:
+    """
+    Fixed-layout memory-mapped price panel
+
+    On disk a panel is a directory holding:
+        meta.json  - field names, symbol index, row count, layout version
+                     and the current dates/bars file names
+        dates.npy  - datetime64[D] date axis (date_capacity,)
+        bars.npy   - float array (date_capacity, symbol_capacity, n_fields)
+
+    One loader process opens the panel writable and appends bars; any number
+    of readers (scanner, backtester, worker pools) open it read-only and get
+    numpy views straight onto the page cache, so N readers share one copy
+    of the data and never deserialize it.
+
+    Appending dates and writing bars happen in place. Anything that moves
+    existing rows (inserting earlier dates, rolling off the oldest when
+    full) writes a new generation of dates/bars files and swaps it in by
+    committing meta, so attached readers keep a consistent view of the old
+    generation until they refresh().
+    """
+
+    def __init__(self, path: str, writable: bool = False):
+        """
+        Open an existing panel
+
+        Args:
+            path: Panel directory
+            writable: Open for writing (only the loader process should)
+        """
+        self.path = path
+        self.writable = writable
+        self._load()
+
+    @classmethod
+    def create(cls, path: str, symbols: Optional[List[str]] = None, date_capacity: int = 520,
+               symbol_capacity: int = 1024, fields: Optional[List[str]] = None,
+               dtype: str = 'float64') -> 'PricePanel':
+        """
+        Create an empty panel on disk and open it writable
+
+        Args:
+            path: Panel directory
+            symbols: Initial symbols to register
+            date_capacity: Number of dates the panel can hold
+            symbol_capacity: Number of symbols the panel can hold
+            fields: Bar fields to store (default OHLCV)
+            dtype: Storage dtype for bar values
+
+        Returns:
+            Writable PricePanel
+        """
+        fields = fields or PANEL_FIELDS
+        symbols = list(symbols or [])
+        symbol_capacity = max(symbol_capacity, len(symbols))
+
+        os.makedirs(path, exist_ok=True)
+
+        dates = np.lib.format.open_memmap(
+            os.path.join(path, DATES_FILE), mode='w+', dtype='datetime64[D]', shape=(date_capacity,)
+        )
+        dates[:] = np.datetime64('NaT')
+        dates.flush()
+
+        bars = np.lib.format.open_memmap(
+            os.path.join(path, BARS_FILE), mode='w+', dtype=dtype,
+            shape=(date_capacity, symbol_capacity, len(fields))
+        )
+        bars[:] = np.nan
+        bars.flush()
+        del dates, bars
+
+        _write_meta(path, {
+            'fields': fields,
+            'symbols': symbols,
+            'n_dates': 0,
+            'version': 1,
+            'dates_file': DATES_FILE,
+            'bars_file': BARS_FILE
+        })
+
+        return cls(path, writable=True)
+
+    def _load(self):
+        """(Re)attach the memory maps and symbol index"""
+        with open(os.path.join(self.path, META_FILE)) as f:
+            self.meta = json.load(f)
+
+        mode = 'r+' if self.writable else 'r'
+        self._dates = np.load(os.path.join(self.path, self.meta.get('dates_file', DATES_FILE)), mmap_mode=mode)
+        self._bars = np.load(os.path.join(self.path, self.meta.get('bars_file', BARS_FILE)), mmap_mode=mode)
+
+        self.fields = self.meta['fields']
+        self.symbols = self.meta['symbols']
+        self.n_dates = self.meta['n_dates']
+        self.version = self.meta['version']
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.field_index = {field: i for i, field in enumerate(self.fields)}
+
+    def __reduce__(self):
+        # Pickle as a path so worker pools re-attach instead of copying bars
+        return (PricePanel, (self.path, False))
+
+    def refresh(self) -> bool:
+        """
+        Pick up rows and symbols appended by the loader since attaching
+
+        Returns:
+            True if the panel changed
+        """
+        with open(os.path.join(self.path, META_FILE)) as f:
+            meta = json.load(f)
+
+        if meta['n_dates'] == self.n_dates and meta['version'] == self.version \
+                and len(meta['symbols']) == len(self.symbols):
+            return False
+
+        self._load()
+        return True
+
+    # ------------------------------------------------------------------
+    # Read-only views
+    # ------------------------------------------------------------------
+
+    @property
+    def dates(self) -> np.ndarray:
+        """Filled part of the date axis (view)"""
+        return self._dates[:self.n_dates]
+
+    @property
+    def last_date(self) -> Optional[np.datetime64]:
+        """Most recent date in the panel"""
+        return self._dates[self.n_dates - 1] if self.n_dates else None
+
+    @property
+    def bars(self) -> np.ndarray:
+        """Filled bars as a (dates, symbols, fields) view"""
+        return self._bars[:self.n_dates, :len(self.symbols)]
+
+    def field(self, name: str) -> np.ndarray:
+        """
+        Get one field for every date and symbol
+
+        Args:
+            name: Field name, e.g. 'Close'
+
+        Returns:
+            (dates, symbols) view onto the memory map
+        """
+        return self.bars[:, :, self.field_index[name]]
+
+    def symbol_bars(self, symbol: str) -> Optional[np.ndarray]:
+        """
+        Get all bars for one symbol
+
+        Returns:
+            (dates, fields) view or None if the symbol is not in the panel
+        """
+        j = self.symbol_index.get(symbol)
+        if j is None:
+            return None
+        return self._bars[:self.n_dates, j]
+
+    def get_frame(self, symbol: str, days: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Get a symbol's bars as a DataFrame shaped like yfinance history
+
+        Args:
+            symbol: Stock ticker symbol
+            days: Optional calendar-day window ending at the last panel date
+
+        Returns:
+            DataFrame with OHLCV columns or None if the symbol has no bars
+        """
+        values = self.symbol_bars(symbol)
+        if values is None:
+            return None
+
+        dates = self.dates
+        if days is not None and self.n_dates:
+            start = np.searchsorted(dates, self.last_date - np.timedelta64(days, 'D'))
+            values = values[start:]
+            dates = dates[start:]
+
+        valid = ~np.isnan(values[:, self.field_index['Close']])
+        if not valid.any():
+            return None
+
+        return pd.DataFrame(values[valid], index=pd.DatetimeIndex(dates[valid]), columns=self.fields)
+
+    # ------------------------------------------------------------------
+    # Loader-side writes
+    # ------------------------------------------------------------------
+
+    def upsert(self, symbol: str, data: pd.DataFrame, commit: bool = True):
+        """
+        Write a symbol's bars into the panel, registering new symbols and
+        adding new dates (earlier, missing or later) as needed
+
+        Args:
+            symbol: Stock ticker symbol
+            data: yfinance-style DataFrame indexed by date
+            commit: Flush and publish to readers now; batch writers pass
+                    False and call commit() once at the end
+        """
+        if not self.writable:
+            raise PermissionError(f"Panel at {self.path} is open read-only")
+
+        if data is None or data.empty:
+            return
+
+        j = self.symbol_index.get(symbol)
+        if j is None:
+            if len(self.symbols) >= self._bars.shape[1]:
+                raise ValueError(f"Panel symbol capacity ({self._bars.shape[1]}) exhausted")
+            j = len(self.symbols)
+            self.symbols.append(symbol)
+            self.symbol_index[symbol] = j
+
+        row_dates = _to_days(data.index)
+        self._extend_dates(row_dates)
+
+        dates = self.dates
+        pos = np.searchsorted(dates, row_dates)
+        in_axis = (pos < len(dates)) & (dates[np.minimum(pos, len(dates) - 1)] == row_dates)
+
+        for k, field in enumerate(self.fields):
+            if field in data.columns:
+                self._bars[pos[in_axis], j, k] = data[field].to_numpy(dtype=self._bars.dtype)[in_axis]
+
+        if commit:
+            self.commit()
+
+    def adjust_history(self, symbol: str, before, price_factor: float, commit: bool = True):
+        """
+        Re-adjust a symbol's stored bars older than a date after a split or
+        dividend, leaving every other symbol untouched
+
+        Args:
+            symbol: Stock ticker symbol
+            before: Bars strictly before this date are adjusted
+            price_factor: Multiplier for prices (volume is divided by it)
+            commit: Flush and publish to readers now (see upsert)
+        """
+        j = self.symbol_index.get(symbol)
+        if j is None or not self.n_dates:
+            return
+
+        end = np.searchsorted(self.dates, _to_days(pd.DatetimeIndex([before]))[0])
+        for k, field in enumerate(self.fields):
+            if field == 'Volume':
+                self._bars[:end, j, k] /= price_factor
+            else:
+                self._bars[:end, j, k] *= price_factor
+
+        self.version += 1
+        if commit:
+            self.commit()
+
+    def commit(self):
+        """Flush written bars and publish the row count and symbol index to readers"""
+        self._dates.flush()
+        self._bars.flush()
+        _write_meta(self.path, self._meta())
+
+    def _extend_dates(self, row_dates: np.ndarray):
+        """Add dates missing from the axis, keeping the newest date_capacity of them"""
+        dates = self.dates
+        new_dates = np.setdiff1d(row_dates, dates)
+        if not len(new_dates):
+            return
+
+        # Later dates with room to spare are appended in place; readers
+        # only see rows below their committed n_dates
+        capacity = len(self._dates)
+        last = self.last_date
+        if (last is None or new_dates[0] > last) and self.n_dates + len(new_dates) <= capacity:
+            self._dates[self.n_dates:self.n_dates + len(new_dates)] = new_dates
+            self.n_dates += len(new_dates)
+            return
+
+        self._relayout(np.union1d(dates, new_dates)[-capacity:])
+
+    def _relayout(self, axis: np.ndarray):
+        """
+        Move existing rows onto a new date axis in a new generation of files
+
+        The old files stay in place (and mapped by any attached readers)
+        until the next relayout, so a reader that read meta just before the
+        swap can still open them.
+        """
+        previous = self._meta()
+        self.version += 1
+        dates_file = f"dates.{self.version}.npy"
+        bars_file = f"bars.{self.version}.npy"
+
+        new_dates = np.lib.format.open_memmap(
+            os.path.join(self.path, dates_file), mode='w+', dtype='datetime64[D]', shape=self._dates.shape
+        )
+        new_dates[:] = np.datetime64('NaT')
+        new_dates[:len(axis)] = axis
+
+        new_bars = np.lib.format.open_memmap(
+            os.path.join(self.path, bars_file), mode='w+', dtype=self._bars.dtype, shape=self._bars.shape
+        )
+        new_bars[:] = np.nan
+        old_dates = self.dates
+        kept = np.isin(old_dates, axis)
+        new_bars[np.searchsorted(axis, old_dates[kept])] = self._bars[:self.n_dates][kept]
+
+        self._dates, self._bars = new_dates, new_bars
+        self.n_dates = len(axis)
+        self.meta['dates_file'], self.meta['bars_file'] = dates_file, bars_file
+        self.commit()
+
+        # Drop generations older than the one just replaced
+        keep = {dates_file, bars_file, previous['dates_file'], previous['bars_file']}
+        for path in glob.glob(os.path.join(self.path, '*.npy')):
+            if os.path.basename(path) not in keep:
+                os.remove(path)
+
+    def _meta(self) -> dict:
+        return {
+            'fields': self.fields,
+            'symbols': self.symbols,
+            'n_dates': self.n_dates,
+            'version': self.version,
+            'dates_file': self.meta.get('dates_file', DATES_FILE),
+            'bars_file': self.meta.get('bars_file', BARS_FILE)
+        }
+
+
+class PanelLoader:
+    """Single writer process that keeps a PricePanel up to date"""
+
+    def __init__(self, panel_dir: str, data_fetcher, date_capacity: int = 520,
+                 symbol_capacity: int = 1024):
+        """
+        Args:
+            panel_dir: Panel directory (created if missing)
+            data_fetcher: DataFetcher used to download bars
+            date_capacity: Date capacity for a newly created panel
+            symbol_capacity: Symbol capacity for a newly created panel
+        """
+        if os.path.exists(os.path.join(panel_dir, META_FILE)):
+            self.panel = PricePanel(panel_dir, writable=True)
+        else:
+            self.panel = PricePanel.create(panel_dir, date_capacity=date_capacity,
+                                           symbol_capacity=symbol_capacity)
+        self.data_fetcher = data_fetcher
+
+    def update(self, symbols: List[str], days: int) -> Dict[str, str]:
+        """
+        Fetch bars for symbols and write them into the panel
+
+        Args:
+            symbols: Stock ticker symbols
+            days: Days of history to fetch per symbol
+
+        Returns:
+            Fetch status per symbol
+        """
+        statuses = {}
+        for symbol, data, status in self.data_fetcher.iter_stock_data(symbols, days=days):
+            statuses[symbol] = status
+            if data is None:
+                continue
+            
+            # Re-adjust older stored bars if Yahoo back-adjusted this symbol
+            stored = self.panel.get_frame(symbol)
+            if stored is not None:
+                factor = history_adjustment(stored, data)
+                if factor is not None:
+                    self.panel.adjust_history(symbol, data.index[0], factor, commit=False)
+            
+            self.panel.upsert(symbol, data, commit=False)
+        
+        # One flush and meta write per batch rather than per symbol
+        self.panel.commit()
+        return statuses
+
+
+def open_panel(panel_dir: str) -> Optional[PricePanel]:
+    """Attach read-only to a panel if one exists at panel_dir"""
+    if not os.path.exists(os.path.join(panel_dir, META_FILE)):
+        return None
+    return PricePanel(panel_dir)
+
+
+def _to_days(index: pd.Index) -> np.ndarray:
+    """Convert a (possibly tz-aware) DatetimeIndex to datetime64[D]"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values.astype('datetime64[D]')
+
+
+def _write_meta(path: str, meta: dict):
+    """Atomically replace the panel metadata"""
+    tmp_path = os.path.join(path, META_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(path, META_FILE))
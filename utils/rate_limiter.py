@@ -0,0 +1,92 @@
+"""
+Adaptive Rate Limiter
+AIMD-style concurrency control for throttled data sources (Yahoo Finance)
+"""
+
+import threading
+import time
+
+
+class AdaptiveRateLimiter:
+    """
+    Additive-increase / multiplicative-decrease concurrency controller
+
+    Every successful request grows the allowed concurrency by roughly one
+    slot per "round" of requests; every throttled request halves it and
+    pauses new requests for a cooldown period. Failed requests (connection
+    errors, empty answers) say nothing about the rate and leave the limit
+    alone. Over time the limit settles just below the highest rate the data
+    source tolerates.
+    """
+
+    def __init__(self, max_concurrency: int = 8, min_concurrency: int = 1,
+                 backoff_seconds: float = 2.0, decrease_factor: float = 0.5):
+        """
+        Args:
+            max_concurrency: Upper bound on simultaneous requests
+            min_concurrency: Lower bound on simultaneous requests
+            backoff_seconds: Pause applied after a throttled response
+            decrease_factor: Multiplier applied to the limit on throttling
+        """
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.backoff_seconds = backoff_seconds
+        self.decrease_factor = decrease_factor
+
+        self.limit = float(min_concurrency)
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.successes = 0
+        self.throttles = 0
+        self.failures = 0
+
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Block until a request slot is available and no cooldown is active"""
+        with self._cond:
+            while True:
+                wait = self.cooldown_until - time.time()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self._cond.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, throttled: bool = False, failed: bool = False):
+        """
+        Release a request slot and adjust the concurrency limit
+
+        Args:
+            throttled: True if the request was rejected or returned no data
+                       because of rate limiting
+            failed: True if the request failed for another reason; the
+                    limit is neither raised nor lowered
+        """
+        with self._cond:
+            self.in_flight -= 1
+
+            if failed and not throttled:
+                self.failures += 1
+            elif throttled:
+                self.throttles += 1
+                # Only back off once per cooldown window, otherwise a burst of
+                # in-flight failures would collapse the limit to the minimum
+                if time.time() >= self.cooldown_until:
+                    self.limit = max(self.min_concurrency, self.limit * self.decrease_factor)
+                    self.cooldown_until = time.time() + self.backoff_seconds
+            else:
+                self.successes += 1
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Return current limiter state"""
+        with self._cond:
+            return {
+                'concurrency_limit': round(self.limit, 2),
+                'in_flight': self.in_flight,
+                'successes': self.successes,
+                'throttles': self.throttles,
+                'failures': self.failures
+            }
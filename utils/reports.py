@@ -0,0 +1,362 @@
+"""
+Scan Reports
+Streaming report writer and lazy reader: newline-delimited JSON or a
+compact binary record format, optionally gzip/zstd compressed
+"""
+
+import gzip
+import io
+import json
+import os
+import struct
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+from utils.logger import setup_logger
+from utils.serialization import json_default
+
+logger = setup_logger(__name__)
+
+FORMATS = ('json', 'ndjson', 'binary')
+COMPRESSIONS = (None, 'gzip', 'zstd')
+EXTENSIONS = {'json': '.json', 'ndjson': '.ndjson', 'binary': '.pmr', 'gzip': '.gz', 'zstd': '.zst'}
+
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+BINARY_MAGIC = b'PMR1'
+
+# Binary frames: 1-byte type, 4-byte little-endian payload length, payload
+FRAME_HEADER, FRAME_RECORD, FRAME_SUMMARY = 0, 1, 2
+FRAME = struct.Struct('<BI')
+
+# Binary records keep these as packed float64s (a presence bit each) and
+# only the remaining keys as JSON
+NUMERIC_FIELDS = (
+    'probability_score', 'momentum_score', 'volume_score', 'sector_score',
+    'catalyst_score', 'current_price', 'volume_change_pct'
+)
+NUMBERS = struct.Struct(f'<B{len(NUMERIC_FIELDS)}d')
+
+
+def report_path(stem: str, format: str, compression: Optional[str] = None) -> str:
+    """File name for a report: stem plus the format's (and compression's) extension"""
+    compression = _usable(compression)
+    return stem + EXTENSIONS[format] + (EXTENSIONS[compression] if compression else '')
+
+
+def format_for_path(path: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    (format, compression) a file name's extension asks for
+
+    Returns:
+        None if the name does not end in a report extension
+    """
+    stem, compression = path, None
+    for name in ('gzip', 'zstd'):
+        if stem.endswith(EXTENSIONS[name]):
+            stem, compression = stem[:-len(EXTENSIONS[name])], name
+    for format in FORMATS:
+        if stem.endswith(EXTENSIONS[format]):
+            return format, compression
+    return None
+
+
+class ReportWriter:
+    """
+    Writes one report record at a time, so memory stays flat however many
+    symbols a report holds
+
+    A report is a header (scan metadata), any number of records (one per
+    symbol) and a summary written on close. In 'ndjson' each of those is
+    one line tagged with its type; in 'binary' each is a length-prefixed
+    frame; 'json' is the original single indented document, still written
+    incrementally. Output goes to a temporary file that replaces the
+    target only when the report is closed cleanly.
+    """
+
+    def __init__(self, path: str, format: str = 'ndjson', compression: Optional[str] = None,
+                 header: Optional[Dict] = None):
+        """
+        Args:
+            path: Output file
+            format: 'json', 'ndjson' or 'binary'
+            compression: None, 'gzip' or 'zstd' (gzip is used when zstandard
+                         is not installed)
+            header: Scan metadata written before the records
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Unknown report format: {format}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown report compression: {compression}")
+        if compression != _usable(compression):
+            logger.warning("zstandard is not installed; compressing %s with gzip", path)
+            compression = _usable(compression)
+
+        self.path = path
+        self.format = format
+        self.compression = compression
+        self.count = 0
+        self.closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._tmp_path = f"{path}.tmp"
+        self._raw = open(self._tmp_path, 'wb')
+        if compression == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=GZIP_LEVEL, mtime=0)
+        elif compression == 'zstd':
+            self._stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+
+        header = dict(header or {})
+        header.setdefault('scan_time', datetime.now().isoformat())
+        if format == 'ndjson':
+            self._line({'type': 'header', **header})
+        elif format == 'binary':
+            self._stream.write(BINARY_MAGIC)
+            self._frame(FRAME_HEADER, _dumps(header).encode('utf-8'))
+        else:
+            self._stream.write(_dumps(header, indent=2)[:-2].encode('utf-8') + b',\n  "candidates": [')
+
+    def write(self, record: Dict):
+        """Append one record"""
+        if self.format == 'ndjson':
+            self._line({'type': 'record', **record})
+        elif self.format == 'binary':
+            self._frame(FRAME_RECORD, _encode_record(record))
+        else:
+            text = _dumps(record, indent=2).replace('\n', '\n    ')
+            self._stream.write((',\n    ' if self.count else '\n    ').encode('utf-8') + text.encode('utf-8'))
+        self.count += 1
+
+    def close(self, summary: Optional[Dict] = None) -> str:
+        """
+        Write the summary and move the finished report into place
+
+        Args:
+            summary: Trailing metadata (the record count is added as
+                     candidates_found)
+
+        Returns:
+            Report path
+        """
+        if self.closed:
+            return self.path
+
+        summary = {'candidates_found': self.count, **(summary or {})}
+        if self.format == 'ndjson':
+            self._line({'type': 'summary', **summary})
+        elif self.format == 'binary':
+            self._frame(FRAME_SUMMARY, _dumps(summary).encode('utf-8'))
+        else:
+            trailer = _dumps(summary, indent=2)[1:]
+            self._stream.write(('\n  ],' if self.count else '],').encode('utf-8') + trailer.encode('utf-8'))
+
+        self._finish()
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self):
+        """Discard a partly written report"""
+        if not self.closed:
+            self._finish()
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _line(self, value: Dict):
+        self._stream.write(_dumps(value).encode('utf-8') + b'\n')
+
+    def _frame(self, frame_type: int, payload: bytes):
+        self._stream.write(FRAME.pack(frame_type, len(payload)) + payload)
+
+    def _finish(self):
+        self.closed = True
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+
+
+class ReportReader:
+    """
+    Lazy reader for any report ReportWriter produces
+
+    The format and compression are sniffed from the file's first bytes.
+    Records are decoded one at a time as they are iterated; the header is
+    read on open, the summary once the records have been passed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            start = f.read(4)
+        if start.startswith(GZIP_MAGIC):
+            self.compression = 'gzip'
+        elif start == ZSTD_MAGIC:
+            if not ZSTD_AVAILABLE:
+                raise ImportError(f"{path} is zstd-compressed but zstandard is not installed")
+            self.compression = 'zstd'
+        else:
+            self.compression = None
+
+        with self._open() as stream:
+            first = stream.read(4)
+        if first == BINARY_MAGIC:
+            self.format = 'binary'
+        elif first[:1] == b'{' and first[1:2] != b'\n':
+            self.format = 'ndjson'
+        else:
+            self.format = 'json'
+
+        self._summary = None
+        self._document = None
+        items = self._items()
+        self.header = next(items)[1]
+        items.close()
+
+    @property
+    def summary(self) -> Dict:
+        """Trailing metadata (reads past the records the first time)"""
+        if self._summary is None:
+            for kind, value in self._items():
+                if kind == 'summary':
+                    self._summary = value
+        return self._summary
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Yield records in the order they were written"""
+        for kind, value in self._items():
+            if kind == 'record':
+                yield value
+            elif kind == 'summary':
+                self._summary = value
+
+    def to_dict(self) -> Dict:
+        """The whole report in the original save_results layout"""
+        candidates = list(self)
+        summary = dict(self.summary)
+        return {
+            **self.header,
+            'candidates_found': summary.pop('candidates_found', len(candidates)),
+            **summary,
+            'candidates': candidates
+        }
+
+    def _open(self):
+        raw = open(self.path, 'rb')
+        if self.compression == 'gzip':
+            return gzip.GzipFile(fileobj=raw, mode='rb')
+        if self.compression == 'zstd':
+            return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+        return raw
+
+    def _items(self) -> Iterator:
+        """(kind, value) pairs: one header, the records, one summary"""
+        if self.format == 'json':
+            # The original layout is one document; it is parsed once and kept
+            if self._document is None:
+                with self._open() as stream:
+                    self._document = json.load(stream)
+            document = dict(self._document)
+            candidates = document.pop('candidates', [])
+            summary = {key: document.pop(key) for key in ('candidates_found', 'coverage') if key in document}
+            yield 'header', document
+            for record in candidates:
+                yield 'record', record
+            yield 'summary', summary
+            return
+
+        with self._open() as stream:
+            if self.format == 'ndjson':
+                for line in stream:
+                    value = json.loads(line)
+                    yield value.pop('type'), value
+                return
+
+            stream.read(len(BINARY_MAGIC))
+            kinds = {FRAME_HEADER: 'header', FRAME_RECORD: 'record', FRAME_SUMMARY: 'summary'}
+            while True:
+                prefix = stream.read(FRAME.size)
+                if len(prefix) < FRAME.size:
+                    return
+                frame_type, length = FRAME.unpack(prefix)
+                payload = stream.read(length)
+                if frame_type == FRAME_RECORD:
+                    yield 'record', _decode_record(payload)
+                else:
+                    yield kinds[frame_type], json.loads(payload)
+
+
+def open_report(path: str) -> ReportReader:
+    """Open a report for lazy reading"""
+    return ReportReader(path)
+
+
+def load_report(path: str) -> Dict:
+    """Read a whole report into the original save_results layout"""
+    return ReportReader(path).to_dict()
+
+
+def _usable(compression: Optional[str]) -> Optional[str]:
+    """zstd when requested and installed, else gzip in its place"""
+    return 'gzip' if compression == 'zstd' and not ZSTD_AVAILABLE else compression
+
+
+def _encode_record(record: Dict) -> bytes:
+    """Symbol, presence mask and numeric fields packed; everything else as JSON"""
+    symbol = str(record.get('symbol', '')).encode('utf-8')
+    mask = 0
+    numbers = []
+    rest = {}
+    for key, value in record.items():
+        if key != 'symbol' and key not in NUMERIC_FIELDS:
+            rest[key] = value
+    for i, name in enumerate(NUMERIC_FIELDS):
+        value = record.get(name)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            mask |= 1 << i
+            numbers.append(float(value))
+        else:
+            numbers.append(0.0)
+            if name in record:
+                rest[name] = value
+    extra = _dumps(rest).encode('utf-8') if rest else b''
+    return bytes([len(symbol)]) + symbol + NUMBERS.pack(mask, *numbers) + extra
+
+
+def _decode_record(payload: bytes) -> Dict:
+    n = payload[0]
+    record = {'symbol': payload[1:1 + n].decode('utf-8')}
+    mask, *numbers = NUMBERS.unpack_from(payload, 1 + n)
+    for i, name in enumerate(NUMERIC_FIELDS):
+        if mask & (1 << i):
+            record[name] = numbers[i]
+    extra = payload[1 + n + NUMBERS.size:]
+    if extra:
+        record.update(json.loads(extra))
+    return record
+
+
+def _dumps(value, indent: Optional[int] = None) -> str:
+    """Compact JSON (indented for the 'json' format); NumPy scalars become Python numbers"""
+    separators = None if indent else (',', ':')
+    return json.dumps(value, indent=indent, separators=separators, default=json_default)
@@ -0,0 +1,17 @@
+"""
+Serialization Helpers
+JSON encoding shared by checkpoints, snapshots, shard results and reports
+"""
+
+
+def json_default(value):
+    """
+    json.dump(s) fallback for values the encoder can't handle
+
+    NumPy scalars (found throughout analysis dictionaries and catalyst
+    responses) become the equivalent Python number; anything else is
+    written as its string form.
+    """
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
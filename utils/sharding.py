@@ -0,0 +1,477 @@
+"""
+Scan Sharding
+Splits a scan universe across worker hosts with consistent hashing and a
+file-spool task queue, then merges the workers' top candidates
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import socket
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.logger import setup_logger
+from utils.serialization import json_default
+
+logger = setup_logger(__name__)
+
+
+class ConsistentHashRing:
+    """
+    Consistent hash ring with virtual nodes
+
+    Removing a node only moves the keys that node owned, so a worker
+    dropping out mid-scan reshuffles just its own symbols.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 64):
+        """
+        Args:
+            nodes: Initial node names
+            replicas: Virtual points per node (more = more even split)
+        """
+        self.replicas = replicas
+        self._points = []  # sorted hashes
+        self._owners = {}  # hash -> node
+        for node in nodes:
+            self.add_node(node)
+
+    def add_node(self, node: str):
+        for i in range(self.replicas):
+            point = _hash(f"{node}#{i}")
+            if point not in self._owners:
+                self._owners[point] = node
+                self._points.insert(bisect_right(self._points, point), point)
+
+    def remove_node(self, node: str):
+        self._points = [point for point in self._points if self._owners[point] != node]
+        self._owners = {point: owner for point, owner in self._owners.items() if owner != node}
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(set(self._owners.values()))
+
+    def node_for(self, key: str, exclude: Iterable[str] = ()) -> Optional[str]:
+        """
+        Node owning a key (first point clockwise from its hash)
+
+        Args:
+            key: Key to place
+            exclude: Nodes to skip; the next node clockwise takes the key
+
+        Returns:
+            Node name, or None if every node is excluded
+        """
+        if not self._points:
+            return None
+        exclude = set(exclude)
+        start = bisect_right(self._points, _hash(key))
+        for offset in range(len(self._points)):
+            owner = self._owners[self._points[(start + offset) % len(self._points)]]
+            if owner not in exclude:
+                return owner
+        return None
+
+    def partition(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """Group keys by owning node, preserving input order"""
+        groups = {}
+        for key in keys:
+            groups.setdefault(self.node_for(key), []).append(key)
+        return groups
+
+
+class SpoolQueue:
+    """
+    Task queue on a (possibly network-shared) directory
+
+    Layout under root:
+        tasks/<worker>/<shard>.json       queued for a worker
+        leases/<worker>/<shard>.json      claimed, in progress
+        results/<scan_id>/<shard>.json    finished shard results
+        workers/<worker>.json             heartbeats
+
+    Every write goes to a temp file and is renamed into place, and a claim
+    is a rename from tasks/ to leases/, so concurrent readers never see
+    partial files and a task is claimed at most once. A lease's mtime is
+    its claim time. Heartbeats and lease ages compare wall-clock times, so
+    worker hosts need synchronized clocks.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        for sub in ('tasks', 'leases', 'results', 'workers'):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+
+    def put(self, worker: str, task: Dict):
+        """Queue a task in a worker's inbox"""
+        _atomic_write_json(os.path.join(self._dir('tasks', worker), f"{task['shard_id']}.json"), task)
+
+    def claim(self, worker: str) -> Optional[Dict]:
+        """Move the oldest task in a worker's inbox to its leases and return it"""
+        inbox = self._dir('tasks', worker)
+        leases = self._dir('leases', worker)
+        for name in sorted(os.listdir(inbox)):
+            if not name.endswith('.json'):
+                continue
+            try:
+                os.rename(os.path.join(inbox, name), os.path.join(leases, name))
+                os.utime(os.path.join(leases, name))
+            except FileNotFoundError:
+                continue  # Taken back by the coordinator
+            return _read_json(os.path.join(leases, name))
+        return None
+
+    def complete(self, worker: str, task: Dict, result: Dict):
+        """Publish a shard result and release its lease"""
+        path = os.path.join(self._dir('results', task['scan_id']), f"{task['shard_id']}.json")
+        _atomic_write_json(path, result)
+        try:
+            os.remove(os.path.join(self._dir('leases', worker), f"{task['shard_id']}.json"))
+        except FileNotFoundError:
+            pass
+
+    def lease_age(self, worker: str, shard_id: str) -> Optional[float]:
+        """Seconds since a worker claimed a shard, or None if it is not leased"""
+        try:
+            return time.time() - os.path.getmtime(os.path.join(self.root, 'leases', worker, f"{shard_id}.json"))
+        except FileNotFoundError:
+            return None
+
+    def results(self, scan_id: str, skip: Iterable[str] = ()) -> Dict[str, Dict]:
+        """Finished shard results for a scan, keyed by shard id"""
+        directory = self._dir('results', scan_id)
+        skip = set(skip)
+        found = {}
+        for name in os.listdir(directory):
+            shard_id = name[:-len('.json')]
+            if name.endswith('.json') and shard_id not in skip:
+                found[shard_id] = _read_json(os.path.join(directory, name))
+        return found
+
+    def take_back(self, worker: str) -> int:
+        """Remove a worker's queued and leased tasks, returning how many there were"""
+        removed = 0
+        for sub in ('tasks', 'leases'):
+            directory = os.path.join(self.root, sub, worker)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                try:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def heartbeat(self, worker: str):
+        _atomic_write_json(os.path.join(self.root, 'workers', f"{worker}.json"), {
+            'worker': worker,
+            'host': socket.gethostname(),
+            'pid': os.getpid(),
+            'time': time.time()
+        })
+
+    def live_workers(self, max_age: float) -> List[str]:
+        """Workers whose last heartbeat is at most max_age seconds old"""
+        directory = os.path.join(self.root, 'workers')
+        cutoff = time.time() - max_age
+        live = []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith('.json'):
+                continue
+            beat = _read_json(os.path.join(directory, name))
+            if beat and beat.get('time', 0) >= cutoff:
+                live.append(beat['worker'])
+        return live
+
+    def _dir(self, sub: str, name: str) -> str:
+        path = os.path.join(self.root, sub, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+
+class ShardCoordinator:
+    """
+    Partition a scan across live workers and merge their top candidates
+
+    Symbols are assigned to workers on a consistent hash ring and queued
+    in chunks of shard_size. A worker whose heartbeat goes stale for
+    lease_timeout seconds, or that holds one shard's lease for longer than
+    shard_deadline (hung, with only its heartbeat thread alive), is removed
+    from the ring and its unfinished shards are rehashed over the remaining
+    workers. A shard whose scan fails is requeued on the next ring node
+    that has not tried it yet, up to max_attempts tries in total.
+    """
+
+    def __init__(self, spool: SpoolQueue, workers: Optional[List[str]] = None, shard_size: int = 200,
+                 lease_timeout: float = 60, top_k: int = 10, replicas: int = 64,
+                 shard_deadline: float = 900, max_attempts: int = 3):
+        """
+        Args:
+            spool: Shared task queue
+            workers: Worker ids to use (default: every worker with a live heartbeat)
+            shard_size: Maximum symbols per task
+            lease_timeout: Heartbeat age after which a worker counts as dead
+            top_k: Candidates kept after merging
+            replicas: Virtual points per worker on the hash ring
+            shard_deadline: Seconds a claimed shard may run before its worker counts as hung
+            max_attempts: Workers a failing shard is tried on before giving up
+        """
+        self.spool = spool
+        self.workers = workers
+        self.shard_size = shard_size
+        self.lease_timeout = lease_timeout
+        self.top_k = top_k
+        self.replicas = replicas
+        self.shard_deadline = shard_deadline
+        self.max_attempts = max_attempts
+
+        self.ring = None
+        self.pending = {}  # shard_id -> {'worker': ..., 'symbols': [...], 'tried': [...]}
+        self._next_shard = 0
+
+    def run(self, symbols: List[str], timeout: float = 3600,
+            poll_interval: float = 1.0) -> Tuple[List[Dict], Dict]:
+        """
+        Distribute a scan and wait for it to finish
+
+        Returns:
+            (top candidates by probability score, scan summary)
+        """
+        workers = self.workers or self.spool.live_workers(self.lease_timeout)
+        if not workers:
+            raise RuntimeError(f"No live scan workers in spool {self.spool.root}")
+
+        scan_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        self.ring = ConsistentHashRing(workers, self.replicas)
+        self.pending = {}
+        self._assign(scan_id, list(dict.fromkeys(symbols)))
+        logger.info(f"Scan {scan_id}: {len(self.pending)} shards queued for {len(workers)} workers")
+
+        results = {}
+        seen = set()
+        unassigned = []
+        failed = []
+        reassigned = retried = 0
+        deadline = time.time() + timeout
+
+        while self.pending and time.time() < deadline:
+            for shard_id, result in self.spool.results(scan_id, skip=seen).items():
+                seen.add(shard_id)
+                shard = self.pending.pop(shard_id, None)
+                if shard is None:
+                    continue  # Finished late by a worker already written off
+                if result.get('error'):
+                    logger.warning(f"Shard {shard_id} failed on {shard['worker']}: {result['error']}")
+                    if self._retry(scan_id, shard):
+                        retried += 1
+                        continue
+                results[shard_id] = result
+
+            busy = {shard['worker'] for shard in self.pending.values()}
+            dead = busy - set(self.spool.live_workers(self.lease_timeout))
+            hung = {}
+            for shard_id, shard in self.pending.items():
+                age = self.spool.lease_age(shard['worker'], shard_id)
+                if shard['worker'] not in dead and age is not None and age > self.shard_deadline:
+                    hung[shard['worker']] = shard_id
+
+            for worker in sorted(dead | set(hung)):
+                stuck = self.pending.pop(hung[worker]) if worker in hung else None
+                orphaned = self._remove_worker(worker)
+                if stuck is not None:
+                    logger.warning(f"Worker {worker} held shard {hung[worker]} past its "
+                                   f"{self.shard_deadline}s deadline; reassigning its shards")
+                    if self._retry(scan_id, stuck):
+                        retried += 1
+                    else:
+                        failed.extend(stuck['symbols'])
+                else:
+                    logger.warning(f"Worker {worker} missed its heartbeat; reassigning {len(orphaned)} symbols")
+                if self.ring.nodes:
+                    reassigned += self._assign(scan_id, orphaned)
+                else:
+                    unassigned.extend(orphaned)
+
+            if self.pending:
+                time.sleep(poll_interval)
+
+        timed_out = [symbol for shard in self.pending.values() for symbol in shard['symbols']]
+        return self._merge(symbols, results, reassigned, retried, unassigned, failed, timed_out)
+
+    def _assign(self, scan_id: str, symbols: List[str]) -> int:
+        """Queue symbols on their ring owners in shard_size chunks; returns shards queued"""
+        queued = 0
+        for worker, owned in self.ring.partition(symbols).items():
+            for start in range(0, len(owned), self.shard_size):
+                self._queue(scan_id, worker, owned[start:start + self.shard_size], [])
+                queued += 1
+        return queued
+
+    def _retry(self, scan_id: str, shard: Dict) -> bool:
+        """Requeue a failed shard on the next ring node that has not tried it; False once out of tries"""
+        tried = shard['tried'] + [shard['worker']]
+        if len(tried) >= self.max_attempts:
+            return False
+        worker = self.ring.node_for(shard['symbols'][0], exclude=tried)
+        if worker is None:
+            return False
+        self._queue(scan_id, worker, shard['symbols'], tried)
+        return True
+
+    def _queue(self, scan_id: str, worker: str, symbols: List[str], tried: List[str]):
+        shard_id = f"{self._next_shard:05d}"
+        self._next_shard += 1
+        self.spool.put(worker, {'scan_id': scan_id, 'shard_id': shard_id, 'symbols': symbols})
+        self.pending[shard_id] = {'worker': worker, 'symbols': symbols, 'tried': tried}
+
+    def _remove_worker(self, worker: str) -> List[str]:
+        """Drop a dead worker, returning the symbols of its unfinished shards"""
+        self.ring.remove_node(worker)
+        self.spool.take_back(worker)
+        orphaned = []
+        for shard_id in [s for s, shard in self.pending.items() if shard['worker'] == worker]:
+            orphaned.extend(self.pending.pop(shard_id)['symbols'])
+        return orphaned
+
+    def _merge(self, symbols, results, reassigned, retried, unassigned, failed,
+               timed_out) -> Tuple[List[Dict], Dict]:
+        """Merge shard results into top-K candidates and a scan summary"""
+        best = {}
+        fetch_failures = []
+        fetched = analyzed = 0
+        for result in results.values():
+            fetched += result['symbols_fetched']
+            analyzed += result['symbols_analyzed']
+            fetch_failures.extend(result['fetch_failures'])
+            for candidate in result['candidates']:
+                # A reassigned shard may have been finished twice
+                previous = best.get(candidate['symbol'])
+                if previous is None or candidate['probability_score'] > previous['probability_score']:
+                    best[candidate['symbol']] = candidate
+
+        fetch_failures.extend({'symbol': s, 'status': 'no_workers'} for s in unassigned)
+        fetch_failures.extend({'symbol': s, 'status': 'worker_hung'} for s in failed)
+        fetch_failures.extend({'symbol': s, 'status': 'timeout'} for s in timed_out)
+
+        top = heapq.nlargest(self.top_k, best.values(), key=lambda c: c['probability_score'])
+        requested = len(set(symbols))
+
+        summary = {
+            'symbols_requested': requested,
+            'symbols_fetched': fetched,
+            'symbols_analyzed': analyzed,
+            'coverage_pct': round(100.0 * fetched / requested, 1) if requested else 100.0,
+            'fetch_failures': fetch_failures,
+            'shards': {
+                'completed': len(results),
+                'reassigned': reassigned,
+                'retried': retried,
+                'timed_out': len(self.pending),
+                'workers': sorted({result['worker'] for result in results.values()})
+            }
+        }
+        return top, summary
+
+
+class ShardWorker:
+    """
+    Claim shards from the spool and scan them
+
+    The scanner is anything with scan_market(symbols) and a
+    last_scan_summary attribute (normally a PreMoverDetector); its
+    candidate list is already the shard's top-K, which is all the
+    coordinator needs to merge an exact global top-K.
+    """
+
+    def __init__(self, spool: SpoolQueue, worker_id: str, scanner, heartbeat_interval: float = 10):
+        self.spool = spool
+        self.worker_id = worker_id
+        self.scanner = scanner
+        self.heartbeat_interval = heartbeat_interval
+        self._stop = threading.Event()
+
+    def run(self, poll_interval: float = 1.0, max_idle: Optional[float] = None) -> int:
+        """
+        Process shards until stopped (or idle for max_idle seconds)
+
+        Returns:
+            Number of shards processed
+        """
+        self.spool.heartbeat(self.worker_id)
+        beat = threading.Thread(target=self._heartbeat_loop, name='shard-heartbeat', daemon=True)
+        beat.start()
+
+        processed = 0
+        idle_since = time.time()
+        try:
+            while not self._stop.is_set():
+                task = self.spool.claim(self.worker_id)
+                if task is None:
+                    if max_idle is not None and time.time() - idle_since >= max_idle:
+                        break
+                    self._stop.wait(poll_interval)
+                    continue
+
+                logger.info(f"Shard {task['scan_id']}/{task['shard_id']}: {len(task['symbols'])} symbols")
+                self.spool.complete(self.worker_id, task, self.process(task))
+                processed += 1
+                idle_since = time.time()
+        finally:
+            self._stop.set()
+        return processed
+
+    def stop(self):
+        self._stop.set()
+
+    def process(self, task: Dict) -> Dict:
+        """Scan one shard and return its compact result"""
+        result = {'scan_id': task['scan_id'], 'shard_id': task['shard_id'], 'worker': self.worker_id}
+        try:
+            candidates = self.scanner.scan_market(task['symbols'])
+            summary = self.scanner.last_scan_summary
+            result.update({
+                'candidates': candidates,
+                'symbols_fetched': summary['symbols_fetched'],
+                'symbols_analyzed': summary['symbols_analyzed'],
+                'fetch_failures': summary['fetch_failures']
+            })
+        except Exception as e:
+            logger.error(f"Shard {task['shard_id']} failed: {e}")
+            # The error marker tells the coordinator to retry the shard elsewhere
+            result.update({
+                'error': f"{type(e).__name__}: {e}",
+                'candidates': [],
+                'symbols_fetched': 0,
+                'symbols_analyzed': 0,
+                'fetch_failures': [{'symbol': s, 'status': 'worker_error'} for s in task['symbols']]
+            })
+        return result
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            self.spool.heartbeat(self.worker_id)
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+def _atomic_write_json(path: str, payload: Dict):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, default=json_default)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
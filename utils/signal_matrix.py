@@ -0,0 +1,164 @@
+"""
+Signal Matrix
+Vectorized (date x symbol) scoring for backtests over a whole price panel
+"""
+
+from typing import Dict
+
+import numpy as np
+
+from utils.kernels import Kernels
+from utils.horizons import HorizonFeatures, horizon_breadth
+from utils.cross_section import cross_sectional_scores
+from config.config import (
+    MOMENTUM_DAYS, MIN_PRICE_CHANGE, MIN_RELATIVE_STRENGTH,
+    UNUSUAL_VOLUME_THRESHOLD, VOLUME_LOOKBACK_DAYS, MIN_ACCUMULATION_DAYS, MIN_LIQUIDITY,
+    KERNEL_BACKEND, USE_MULTI_HORIZON, MOMENTUM_HORIZONS, SCORING_MODE
+)
+
+_kernels = Kernels(KERNEL_BACKEND)
+
+# All inputs are 2-D float arrays shaped (dates, symbols); row i only ever
+# uses rows <= i, so every cell is what the detector would have seen that day.
+
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window sum (NaN until the window fills)"""
+    return _kernels.rolling_sum(values, window)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window mean (NaN until the window fills)"""
+    return _kernels.rolling_mean(values, window)
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window maximum (NaN until the window fills)"""
+    return _kernels.rolling_max(values, window)
+
+
+def rolling_min(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window minimum (NaN until the window fills)"""
+    return _kernels.rolling_min(values, window)
+
+
+def shift(values: np.ndarray, periods: int) -> np.ndarray:
+    """Shift rows down by periods (row i gets row i - periods), NaN-filled"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if periods < len(values):
+        out[periods:] = values[:len(values) - periods]
+    return out
+
+
+def backtest_scores(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """
+    Simple momentum + volume-spike score used by backtest.py, for every cell
+
+    Args:
+        close: (dates, symbols) closing prices
+        volume: (dates, symbols) volumes
+
+    Returns:
+        (dates, symbols) score matrix (NaN where history is too short)
+    """
+    return backtest_layers(close, volume)['score']
+
+
+def backtest_layers(close: np.ndarray, volume: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Components of backtest_scores for every cell
+
+    Returns:
+        Dictionary of (dates, symbols) matrices: momentum_score, volume_score
+        and score (their mean)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        momentum = (close / shift(close, 5) - 1) * 100
+
+        # Average of the 20 bars before each day
+        avg_volume = shift(rolling_mean(volume, 20), 1)
+        volume_spike = np.where(avg_volume > 0, volume / avg_volume, 0.0)
+
+    momentum_score = np.clip(momentum * 10 + 50, 0, 100)
+    volume_score = np.clip((volume_spike - 1) * 50, 0, 100)
+
+    return {
+        'momentum_score': momentum_score,
+        'volume_score': volume_score,
+        'score': (momentum_score + volume_score) / 2
+    }
+
+
+def layer_scores(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Technical detector layers (momentum, volume, red flags) for every cell
+
+    Mirrors PreMoverDetector._compute_features and the layer scoring so a
+    full-universe history can be evaluated in a handful of array operations.
+    With SCORING_MODE = "percentile" the momentum and volume layers are
+    cross-sectional percentile scores for each day instead.
+
+    Returns:
+        Dictionary of (dates, symbols) matrices: momentum_score, volume_score,
+        red_flags and technical_score (sector and catalyst layers neutral)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Layer 1: momentum
+        price_change = close / shift(close, MOMENTUM_DAYS - 1) - 1
+        relative_strength = close / shift(close, 6)
+        coil_range = (rolling_max(high, 5) - rolling_min(low, 5)) / rolling_mean(close, 5)
+
+        if USE_MULTI_HORIZON:
+            horizons = HorizonFeatures(close, volume)
+            price_points = 40.0 * horizon_breadth({h: horizons.returns(h) for h in MOMENTUM_HORIZONS})
+        else:
+            price_points = 40.0 * (price_change >= MIN_PRICE_CHANGE)
+
+        momentum_score = (
+            price_points +
+            30.0 * (relative_strength >= MIN_RELATIVE_STRENGTH) +
+            30.0 * (coil_range < 0.05)
+        )
+
+        # Layer 2: volume
+        avg_volume = shift(rolling_mean(volume, VOLUME_LOOKBACK_DAYS - 1), 1)
+        unusual_volume = volume >= avg_volume * UNUSUAL_VOLUME_THRESHOLD
+
+        higher_low = _kernels.ratio_streak(low, 0.98) >= MIN_ACCUMULATION_DAYS
+        accumulating = higher_low & (volume > shift(volume, MIN_ACCUMULATION_DAYS))
+
+        volume_score = 50.0 * unusual_volume + 50.0 * accumulating
+
+        # Layer 5: red flags
+        illiquid = rolling_mean(volume, 5) < MIN_LIQUIDITY
+        low_10 = rolling_min(low, 10)
+        volatility = (rolling_max(high, 10) - low_10) / low_10
+        volume_drop = volume / shift(rolling_mean(volume, 4), 1)
+        red_flags = illiquid | ((volatility > 0.5) & (volume_drop < 0.3))
+
+        if SCORING_MODE == 'percentile':
+            # Rank each feature across the symbols trading that day; red-flagged
+            # symbols are dropped before ranking, as in the live scan
+            ranked = ~np.isnan(close) & ~red_flags
+            features = {
+                'price_change': price_change,
+                'relative_strength': relative_strength,
+                'is_coiling': coil_range < 0.05,
+                'volume_ratio': volume / avg_volume,
+                'is_accumulating': accumulating
+            }
+            scores = cross_sectional_scores(
+                {name: np.where(ranked, value, np.nan) for name, value in features.items()}, axis=1
+            )
+            momentum_score = np.where(ranked, scores['momentum_score'], np.nan)
+            volume_score = np.where(ranked, scores['volume_score'], np.nan)
+
+    technical_score = momentum_score * 0.30 + volume_score * 0.30 + 50 * 0.20 + 50 * 0.20
+
+    return {
+        'momentum_score': momentum_score,
+        'volume_score': volume_score,
+        'red_flags': red_flags,
+        'technical_score': np.where(red_flags, np.nan, technical_score)
+    }
@@ -0,0 +1,301 @@
+"""
+Scan Snapshots
+Content-addressed record of a scan's inputs (bars, catalyst responses,
+config) so the scan can be replayed offline later
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.rate_limiter import AdaptiveRateLimiter
+from utils.serialization import json_default
+
+BAR_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# Config names never written to a snapshot
+SECRET_PATTERN = re.compile(r'KEY|TOKEN|SECRET|PASSWORD')
+
+
+class BlobStore:
+    """
+    Deduplicated object store keyed by the SHA-256 of each object's content
+
+    Objects are zlib-compressed under objects/<2 hex>/<62 hex>; writing
+    content that is already stored is a no-op, so unchanged bars and
+    repeated config are kept once however many scans reference them.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.stats = {'written': 0, 'deduplicated': 0}
+
+    def put(self, content: bytes) -> str:
+        """Store content and return its digest"""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            self.stats['deduplicated'] += 1
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(zlib.compress(content))
+        os.replace(tmp_path, path)
+        self.stats['written'] += 1
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        with open(self._path(digest), 'rb') as f:
+            return zlib.decompress(f.read())
+
+    def put_json(self, value) -> str:
+        return self.put(json.dumps(value, sort_keys=True, default=json_default).encode('utf-8'))
+
+    def get_json(self, digest: str):
+        return json.loads(self.get(digest))
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, 'objects', digest[:2], digest[2:])
+
+
+class SnapshotRecorder:
+    """
+    Collects one scan's inputs and writes its manifest
+
+    Bars are split into calendar-month chunks before hashing: a daily scan
+    fetches a trailing window, so every month but the current one hashes
+    the same as yesterday's and is stored only once.
+    """
+
+    def __init__(self, root: str, scan_id: Optional[str] = None):
+        """
+        Args:
+            root: Snapshot directory (objects/ and manifests/ live under it)
+            scan_id: Manifest name (default: current timestamp)
+        """
+        self.root = root
+        self.store = BlobStore(root)
+        self.scan_id = scan_id or datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        self.bars = {}        # symbol -> [chunk digests]
+        self.catalysts = {}   # symbol -> digest
+        self.failures = {}    # symbol -> fetch status
+        self.regime = None    # digest of the market regime the scan ran under
+        self.order = []       # symbols in the order their bars arrived
+        self._lock = threading.Lock()
+
+    def record_bars(self, symbol: str, data: pd.DataFrame):
+        digests = [self.store.put(chunk) for chunk in _bar_chunks(data)]
+        with self._lock:
+            self.bars[symbol] = digests
+            self.order.append(symbol)
+
+    def record_failure(self, symbol: str, status: str):
+        with self._lock:
+            self.failures[symbol] = status
+            self.order.append(symbol)
+
+    def record_catalysts(self, symbol: str, catalyst_info: Optional[Dict]):
+        digest = self.store.put_json(catalyst_info)
+        with self._lock:
+            self.catalysts[symbol] = digest
+
+    def record_regime(self, regime: Optional[Dict]):
+        self.regime = self.store.put_json(regime)
+
+    def save(self, stock_list: List[str], config_values: Dict, resumed: Optional[List[str]] = None) -> str:
+        """
+        Write the manifest
+
+        Args:
+            stock_list: Symbols the scan was asked for
+            config_values: Config constants in effect (see capture_config)
+            resumed: Symbols taken from a checkpoint, whose inputs this
+                     process never saw
+
+        Returns:
+            Manifest path
+        """
+        manifest = {
+            'scan_id': self.scan_id,
+            'created_at': datetime.now().isoformat(),
+            'config': self.store.put_json(config_values),
+            'stock_list': self.store.put_json(list(stock_list)),
+            'order': self.order,
+            'bars': self.bars,
+            'catalysts': self.catalysts,
+            'failures': self.failures,
+            'regime': self.regime,
+            'resumed': list(resumed or [])
+        }
+        path = os.path.join(self.root, 'manifests', f"{self.scan_id}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+        return path
+
+
+class Snapshot:
+    """A recorded scan, read back from its manifest"""
+
+    def __init__(self, root: str, scan_id: str):
+        self.root = root
+        self.store = BlobStore(root)
+        with open(os.path.join(root, 'manifests', f"{scan_id}.json")) as f:
+            self.manifest = json.load(f)
+        self.scan_id = self.manifest['scan_id']
+
+    @classmethod
+    def list(cls, root: str) -> List[str]:
+        """Recorded scan ids, oldest first"""
+        directory = os.path.join(root, 'manifests')
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(directory) if name.endswith('.json'))
+
+    @property
+    def config(self) -> Dict:
+        return self.store.get_json(self.manifest['config'])
+
+    @property
+    def config_hash(self) -> str:
+        return self.manifest['config']
+
+    @property
+    def stock_list(self) -> List[str]:
+        return self.store.get_json(self.manifest['stock_list'])
+
+    @property
+    def regime(self) -> Optional[Dict]:
+        digest = self.manifest.get('regime')
+        return self.store.get_json(digest) if digest else None
+
+    def bars(self, symbol: str) -> Optional[pd.DataFrame]:
+        digests = self.manifest['bars'].get(symbol)
+        if digests is None:
+            return None
+        return pd.concat([_decode_chunk(self.store.get(digest)) for digest in digests])
+
+    def catalysts(self, symbol: str) -> Optional[Dict]:
+        digest = self.manifest['catalysts'].get(symbol)
+        return self.store.get_json(digest) if digest else None
+
+
+class ReplayFetcher:
+    """DataFetcher stand-in that serves a snapshot's bars and fetch failures"""
+
+    def __init__(self, snapshot: Snapshot):
+        self.snapshot = snapshot
+        self.rate_limiter = AdaptiveRateLimiter()
+        self.corporate_action_listeners = []
+
+    def get_stock_data(self, symbol: str, days: int = 30) -> Optional[pd.DataFrame]:
+        return self.snapshot.bars(symbol)
+
+    def iter_stock_data(self, symbols: List[str], days: int = 30,
+                        max_retries: int = 0) -> Iterator[Tuple[str, Optional[pd.DataFrame], str]]:
+        """Yield recorded results in the order the original scan received them"""
+        wanted = set(symbols)
+        order = [symbol for symbol in self.snapshot.manifest['order'] if symbol in wanted]
+        seen = set(order)
+        order += [symbol for symbol in symbols if symbol not in seen]
+
+        for symbol in order:
+            data = self.snapshot.bars(symbol)
+            if data is not None:
+                yield symbol, data, 'ok'
+            else:
+                yield symbol, None, self.snapshot.manifest['failures'].get(symbol, 'missing')
+
+    def add_corporate_action_listener(self, listener):
+        self.corporate_action_listeners.append(listener)
+
+
+class ReplayAnalyzer:
+    """AIAnalyzer stand-in that answers with a snapshot's catalyst responses"""
+
+    def __init__(self, snapshot: Snapshot, batch_size: int = 20):
+        self.snapshot = snapshot
+        self.batch_size = batch_size
+        self.batch_stats = {'requests': 0, 'symbols': 0, 'retried': 0, 'failed': 0}
+
+    def detect_catalysts(self, symbol: str, context: Optional[List[str]] = None) -> Optional[Dict]:
+        return self.snapshot.catalysts(symbol)
+
+    def detect_catalysts_batch(self, symbols: List[str], contexts: Optional[Dict] = None) -> Dict[str, Dict]:
+        return {symbol: self.snapshot.catalysts(symbol) for symbol in symbols}
+
+
+def capture_config(module) -> Dict:
+    """JSON-serializable upper-case constants of a config module, minus secrets"""
+    values = {}
+    for name in dir(module):
+        if not name.isupper() or SECRET_PATTERN.search(name):
+            continue
+        value = getattr(module, name)
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            continue
+        values[name] = value
+    return values
+
+
+def restore_config(values: Dict, modules) -> List[str]:
+    """
+    Overwrite config constants in each module that has them
+
+    Modules that did `from config.config import *` hold their own copies,
+    so each one that reads the constants has to be patched.
+
+    Returns:
+        Names whose current value differed from the snapshot
+    """
+    changed = set()
+    for module in modules:
+        for name, value in values.items():
+            if hasattr(module, name):
+                if getattr(module, name) != value:
+                    changed.add(name)
+                setattr(module, name, value)
+    return sorted(changed)
+
+
+def _bar_chunks(data: pd.DataFrame) -> List[bytes]:
+    """Serialize bars as one deterministic byte string per calendar month"""
+    index = pd.DatetimeIndex(data.index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    days = index.values.astype('datetime64[ns]').astype(np.int64)
+    values = np.column_stack([
+        data[name].to_numpy(dtype=np.float64) if name in data else np.full(len(data), np.nan)
+        for name in BAR_FIELDS
+    ])
+    months = index.year * 12 + index.month
+
+    chunks = []
+    for month in pd.unique(months):
+        rows = np.flatnonzero(months == month)
+        chunks.append(
+            np.int64(len(rows)).tobytes() + days[rows].tobytes() + np.ascontiguousarray(values[rows]).tobytes()
+        )
+    return chunks
+
+
+def _decode_chunk(content: bytes) -> pd.DataFrame:
+    n = int(np.frombuffer(content[:8], dtype=np.int64)[0])
+    days = np.frombuffer(content[8:8 + 8 * n], dtype=np.int64)
+    values = np.frombuffer(content[8 + 8 * n:], dtype=np.float64).reshape(n, len(BAR_FIELDS))
+    return pd.DataFrame(values.copy(), index=pd.DatetimeIndex(days.astype('datetime64[ns]'), name='Date'),
+                        columns=list(BAR_FIELDS))
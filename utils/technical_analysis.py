@@ -7,9 +7,26 @@ import pandas as pd
 import numpy as np
 from typing import Optional
 
+from utils.kernels import Kernels
+from utils.metrics import REGISTRY, timed
+
+INDICATOR_SECONDS = REGISTRY.histogram(
+    'indicator_seconds', 'Time spent computing per-symbol technical indicators', ['indicator'],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+)
+
 class TechnicalAnalyzer:
     """Technical analysis tools for stock data"""
     
+    def __init__(self, backend: str = 'auto'):
+        """
+        Args:
+            backend: Kernel backend for whole-array methods
+                     ('numba', 'numpy' or 'auto' = numba if installed)
+        """
+        self.kernels = Kernels(backend)
+    
+    @timed(INDICATOR_SECONDS, indicator='relative_strength')
     def calculate_relative_strength(self, symbol: str, data: pd.DataFrame) -> float:
         """
         Calculate relative strength vs sector
@@ -34,6 +51,7 @@ class TechnicalAnalyzer:
         
         return (1 + recent_return) / (1 + sector_return)
     
+    @timed(INDICATOR_SECONDS, indicator='coiling')
     def detect_coiling_pattern(self, data: pd.DataFrame, window: int = 5) -> bool:
         """
         Detect coiling/compression pattern
@@ -61,6 +79,7 @@ class TechnicalAnalyzer:
         
         return price_range_pct < 0.05
     
+    @timed(INDICATOR_SECONDS, indicator='accumulation')
     def detect_accumulation(self, data: pd.DataFrame, min_days: int = 3) -> bool:
         """
         Detect accumulation pattern (higher lows + rising volume)
@@ -79,7 +98,7 @@ class TechnicalAnalyzer:
         
         # Check for higher lows
         lows = recent_data['Low'].values
-        higher_lows = all(lows[i] >= lows[i-1] * 0.98 for i in range(1, len(lows)))
+        higher_lows = bool(np.all(lows[1:] >= lows[:-1] * 0.98))
         
         # Check for rising volume
         volumes = recent_data['Volume'].values
@@ -87,6 +106,7 @@ class TechnicalAnalyzer:
         
         return higher_lows and rising_volume
     
+    @timed(INDICATOR_SECONDS, indicator='pump_and_dump')
     def is_pump_and_dump(self, data: pd.DataFrame) -> bool:
         """
         Detect potential pump and dump schemes
@@ -112,6 +132,7 @@ class TechnicalAnalyzer:
         
         return volatility > 0.5 and volume_drop < 0.3
     
+    @timed(INDICATOR_SECONDS, indicator='rsi')
     def calculate_rsi(self, data: pd.DataFrame, period: int = 14) -> float:
         """
         Calculate Relative Strength Index
@@ -135,6 +156,7 @@ class TechnicalAnalyzer:
         
         return rsi.iloc[-1]
     
+    @timed(INDICATOR_SECONDS, indicator='macd')
     def calculate_macd(self, data: pd.DataFrame) -> dict:
         """
         Calculate MACD (Moving Average Convergence Divergence)
@@ -158,6 +180,7 @@ class TechnicalAnalyzer:
             'histogram': histogram.iloc[-1]
         }
     
+    @timed(INDICATOR_SECONDS, indicator='breakout')
     def detect_breakout(self, data: pd.DataFrame, lookback: int = 20) -> bool:
         """
         Detect price breakout above resistance
@@ -179,3 +202,74 @@ class TechnicalAnalyzer:
         current_price = data['Close'].iloc[-1]
         
         return current_price > resistance * 1.02  # 2% above resistance
+    
+    # ------------------------------------------------------------------
+    # Whole-array variants for backtests: element i equals the scalar
+    # method's result on data.iloc[:i+1], computed in O(n) for all days
+    # ------------------------------------------------------------------
+    
+    def rolling_max(self, values, window: int) -> np.ndarray:
+        """Trailing rolling maximum over a whole array (O(n))"""
+        return self.kernels.rolling_max(values, window)
+    
+    def rolling_min(self, values, window: int) -> np.ndarray:
+        """Trailing rolling minimum over a whole array (O(n))"""
+        return self.kernels.rolling_min(values, window)
+    
+    def rolling_mean(self, values, window: int) -> np.ndarray:
+        """Trailing rolling mean over a whole array (O(n))"""
+        return self.kernels.rolling_mean(values, window)
+    
+    def coiling_series(self, data: pd.DataFrame, window: int = 5) -> np.ndarray:
+        """
+        Coiling pattern for every day
+        
+        Args:
+            data: Stock price data
+            window: Number of days to check
+        
+        Returns:
+            Boolean array, True where detect_coiling_pattern would be True
+        """
+        high = self.rolling_max(data['High'].to_numpy(), window)
+        low = self.rolling_min(data['Low'].to_numpy(), window)
+        avg_price = self.rolling_mean(data['Close'].to_numpy(), window)
+        
+        with np.errstate(invalid='ignore'):
+            return (high - low) / avg_price < 0.05
+    
+    def accumulation_series(self, data: pd.DataFrame, min_days: int = 3) -> np.ndarray:
+        """
+        Accumulation pattern (higher lows + rising volume) for every day
+        
+        Args:
+            data: Stock price data
+            min_days: Minimum consecutive days required
+        
+        Returns:
+            Boolean array, True where detect_accumulation would be True
+        """
+        higher_low_streak = self.kernels.ratio_streak(data['Low'].to_numpy(), 0.98)
+        
+        volumes = data['Volume'].to_numpy(dtype=np.float64)
+        rising_volume = np.zeros(len(volumes), dtype=bool)
+        rising_volume[min_days:] = volumes[min_days:] > volumes[:-min_days]
+        
+        return (higher_low_streak >= min_days) & rising_volume
+    
+    def breakout_series(self, data: pd.DataFrame, lookback: int = 20) -> np.ndarray:
+        """
+        Breakout above resistance for every day
+        
+        Args:
+            data: Stock price data
+            lookback: Days to look back for resistance level
+        
+        Returns:
+            Boolean array, True where detect_breakout would be True
+        """
+        resistance = np.full(len(data), np.nan)
+        resistance[1:] = self.rolling_max(data['High'].to_numpy(), lookback)[:-1]
+        
+        with np.errstate(invalid='ignore'):
+            return data['Close'].to_numpy() > resistance * 1.02